@@ -0,0 +1,173 @@
+"""
+Columnar analytics over large tables such as the full loan history.
+
+Instead of turning every row into a model object, a query's result is streamed with
+``COPY ... TO STDOUT (FORMAT binary)`` and decoded straight into NumPy arrays, one per column, with a
+single ``numpy.frombuffer`` call. Aggregates are then computed with vectorised NumPy operations, so a
+dashboard over millions of loans costs one sequential read and a few passes over contiguous memory.
+
+Only fixed-width, non-null columns can be decoded this way: select integers, floats and dates
+converted to day numbers, and COALESCE or filter out NULLs in the query.
+"""
+import io
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from database import Database
+from model import DecadeCount, DurationBucket, MonthlyLoans
+from utils import logger
+
+# binary COPY framing: signature, flags and header extension length, then one tuple after another
+COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+COPY_HEADER_SIZE = len(COPY_SIGNATURE) + 8
+COPY_TRAILER = b"\xff\xff"
+
+# network byte order, as sent by the server, for every supported column type
+WIRE_TYPES = {np.dtype(np.int32): ">i4", np.dtype(np.int64): ">i8", np.dtype(np.float64): ">f8"}
+
+# dates are selected as days since this day, which NumPy reads as datetime64[D]
+EPOCH = "DATE '1970-01-01'"
+
+SELECT_BOOK_YEARS = "SELECT year_published FROM book WHERE year_published IS NOT NULL"
+SELECT_LOAN_MONTHS = (
+    f"SELECT date_borrowed - {EPOCH}, COALESCE((date_returned > due_date)::int, 0) FROM loan "
+    "WHERE date_borrowed >= %s"
+)
+SELECT_LOAN_DURATIONS = "SELECT date_returned - date_borrowed FROM loan WHERE date_returned IS NOT NULL"
+
+# upper bounds in days of the loan duration buckets; the last bucket is open-ended
+DURATION_BOUNDS = (7, 14, 21, 28, 42, 60, 90)
+
+
+def decode_binary_copy(data: bytes, columns: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Decodes the output of ``COPY ... TO STDOUT (FORMAT binary)`` into one array per column.
+
+    Every tuple of fixed-width, non-null columns has the same size, so the whole body is read as
+    one structured array without a Python-level loop.
+
+    Args:
+        data (bytes): The complete COPY output.
+        columns (Dict[str, Any]): Column name to NumPy dtype (int32, int64 or float64), in select order.
+
+    Returns:
+        Dict[str, np.ndarray]: The values of every column in native byte order.
+
+    Raises:
+        ValueError: If the data is not binary COPY output of those columns, e.g. because a value is NULL.
+    """
+    if not data.startswith(COPY_SIGNATURE) or not data.endswith(COPY_TRAILER):
+        raise ValueError("Not binary COPY output.")
+    extension = int.from_bytes(data[COPY_HEADER_SIZE - 4:COPY_HEADER_SIZE], "big")
+    body = memoryview(data)[COPY_HEADER_SIZE + extension:-len(COPY_TRAILER)]
+
+    fields = [("field_count", ">i2")]
+    for index, (name, dtype) in enumerate(columns.items()):
+        fields += [(f"length_{index}", ">i4"), (name, WIRE_TYPES[np.dtype(dtype)])]
+    layout = np.dtype(fields)
+    if len(body) % layout.itemsize:
+        raise ValueError("COPY output does not match the requested columns; are there NULL values?")
+
+    rows = np.frombuffer(body, dtype = layout)
+    if len(rows) and (rows["field_count"] != len(columns)).any():
+        raise ValueError(f"Expected {len(columns)} columns per row.")
+    for index, (name, dtype) in enumerate(columns.items()):
+        if len(rows) and (rows[f"length_{index}"] != np.dtype(dtype).itemsize).any():
+            raise ValueError(f"Column '{name}' contains NULL values or values of another type.")
+    return {name: rows[name].astype(dtype) for name, dtype in columns.items()}
+
+
+def fetch_columns(db: Database, query: str, columns: Dict[str, Any], params: Optional[Any] = None) -> Dict[str, np.ndarray]:
+    """
+    Runs ``query`` and returns its result as column arrays.
+
+    Args:
+        db (Database): A connected database.
+        query (str): A SELECT of fixed-width, non-null columns, without a trailing semicolon.
+        columns (Dict[str, Any]): Column name to NumPy dtype, in select order.
+        params (Optional[Any]): Query parameters; COPY takes none, so they are bound client-side.
+
+    Returns:
+        Dict[str, np.ndarray]: The values of every column.
+    """
+    def work(cursor) -> bytes:
+        statement = cursor.mogrify(query, params).decode() if params is not None else query
+        buffer = io.BytesIO()
+        cursor.copy_expert(f"COPY ({statement}) TO STDOUT WITH (FORMAT binary)", buffer)
+        return buffer.getvalue()
+
+    return decode_binary_copy(db.run_in_transaction(work), columns)
+
+
+class Analytics:
+    """
+    Aggregates over whole tables, computed on column arrays rather than row objects.
+    """
+
+    def __init__(self, db: Database) -> None:
+        """
+        Args:
+            db (Database): A connected database.
+        """
+        self.db = db
+
+    def books_per_decade(self) -> List[DecadeCount]:
+        """
+        Counts the books by the decade they were published in.
+
+        Returns:
+            List[DecadeCount]: One entry per decade with any books, oldest first.
+        """
+        try:
+            years = fetch_columns(self.db, SELECT_BOOK_YEARS, {"year": np.int32})["year"]
+        except Exception as e:
+            logger.error(f"Failed to count books per decade: {e}")
+            raise RuntimeError("Failed to count books per decade.")
+        decades, counts = np.unique(years // 10 * 10, return_counts = True)
+        return [DecadeCount(int(decade), int(count)) for decade, count in zip(decades, counts)]
+
+    def loans_per_month(self, since: date) -> List[MonthlyLoans]:
+        """
+        Counts the loans started in each month, and how many of them came back late.
+
+        Args:
+            since (date): The first day to include.
+
+        Returns:
+            List[MonthlyLoans]: One entry per month with any loans, oldest first.
+        """
+        try:
+            columns = fetch_columns(
+                self.db, SELECT_LOAN_MONTHS, {"borrowed": np.int32, "late": np.int32}, params = (since,)
+            )
+        except Exception as e:
+            logger.error(f"Failed to count loans per month since {since}: {e}")
+            raise RuntimeError("Failed to count loans per month.")
+
+        months = columns["borrowed"].astype("datetime64[D]").astype("datetime64[M]")
+        unique_months, month_index = np.unique(months, return_inverse = True)
+        loans = np.bincount(month_index, minlength = len(unique_months))
+        late = np.bincount(month_index, weights = columns["late"], minlength = len(unique_months))
+        return [
+            MonthlyLoans(month.astype("datetime64[D]").item(), int(count), int(late_count))
+            for month, count, late_count in zip(unique_months, loans, late)
+        ]
+
+    def loan_durations(self) -> List[DurationBucket]:
+        """
+        Histogram of how long returned loans were kept.
+
+        Returns:
+            List[DurationBucket]: One entry per bucket of DURATION_BOUNDS, shortest first.
+        """
+        try:
+            days = fetch_columns(self.db, SELECT_LOAN_DURATIONS, {"days": np.int32})["days"]
+        except Exception as e:
+            logger.error(f"Failed to compute loan durations: {e}")
+            raise RuntimeError("Failed to compute loan durations.")
+
+        counts = np.bincount(np.searchsorted(DURATION_BOUNDS, days, side = "left"), minlength = len(DURATION_BOUNDS) + 1)
+        labels = [f"up to {bound} days" for bound in DURATION_BOUNDS] + [f"over {DURATION_BOUNDS[-1]} days"]
+        return [DurationBucket(label, int(count)) for label, count in zip(labels, counts)]
@@ -1,13 +1,70 @@
+"""
+Desktop client. The window is shown before anything touches the database: every tab is a LazyTab
+that imports its view, connects and creates its controller on a worker thread the first time it is
+selected. The views and controllers are therefore imported inside the loaders below, not here.
+"""
+import os
 import sys
+import threading
+from functools import partial
+from typing import Callable
+
 from PyQt5.QtWidgets import (
-    QMainWindow, QApplication, QTabWidget, QStyleFactory, QMessageBox
+    QMainWindow, QApplication, QTabWidget, QStyleFactory, QMessageBox, QWidget
 )
 from PyQt5.QtGui import QFont
 from PyQt5.QtCore import Qt
 
+from database import Database
 from utils import logger
-from view.book_view import BookTab
-from view.query_view import QueryTab
+from view.lazy_tab import LazyTab
+
+_database_ready = False
+_database_lock = threading.Lock()
+
+
+def prepare_database() -> None:
+    """
+    Connects the shared pool and applies pending migrations, once per process. Called by the first
+    tab loader; the other loaders wait for it, so no tab reads from a database being migrated.
+    """
+    global _database_ready
+    with _database_lock:
+        if _database_ready:
+            return
+        db = Database()
+        db.connect()
+        if os.getenv("MIGRATE_ON_STARTUP", "1") == "1":
+            import migrations
+            migrations.migrate(db)
+        _database_ready = True
+
+
+def load_book_tab() -> Callable[[], QWidget]:
+    prepare_database()
+    from controller import BookController
+    from view.book_view import BookTab
+    return partial(BookTab, BookController())
+
+
+def load_query_tab() -> Callable[[], QWidget]:
+    prepare_database()
+    from controller import QueryController
+    from view.query_view import QueryTab
+    return partial(QueryTab, QueryController())
+
+
+def load_loan_tab() -> Callable[[], QWidget]:
+    prepare_database()
+    from controller import LoanController
+    from view.loan_view import LoanTab
+    return partial(LoanTab, LoanController())
+
+
+def load_diagnostics_tab() -> Callable[[], QWidget]:
+    from controller import DiagnosticsController
+    from view.diagnostics_view import DiagnosticsTab
+    return partial(DiagnosticsTab, DiagnosticsController())
 
 
 class MainWindow(QMainWindow):
@@ -42,16 +99,21 @@ class MainWindow(QMainWindow):
 
         self.setCentralWidget(self.tabs)
 
-        self.book_tab = BookTab()
-        self.query_tab = QueryTab()
+        # each tab is built the first time it is shown; see LazyTab
+        self.book_tab = LazyTab("Books", load_book_tab)
+        self.query_tab = LazyTab("Queries", load_query_tab)
         self.tabs.addTab(self.book_tab, "📚 Books")
         self.tabs.addTab(self.query_tab, "🔍 Queries")
+        self.loan_tab = LazyTab("Loans", load_loan_tab)
+        self.tabs.addTab(self.loan_tab, "🔄 Loans")
+        self.diagnostics_tab = LazyTab("Diagnostics", load_diagnostics_tab)
+        self.tabs.addTab(self.diagnostics_tab, "📈 Diagnostics")
 
         self.setFont(QFont("Open Sans", 11))
 
 
-def main():
-    app = QApplication(sys.argv)
+def create_application(argv) -> QApplication:
+    app = QApplication(argv)
 
     app.setStyle(QStyleFactory.create("Fusion"))
 
@@ -66,8 +128,14 @@ def main():
     palette.setColor(palette.Button, Qt.lightGray)
     palette.setColor(palette.ButtonText, Qt.black)
     app.setPalette(palette)
+    return app
+
+
+def main():
+    app = create_application(sys.argv)
 
     try:
+        Database.load_configuration()
         window = MainWindow()
         window.show()
 
@@ -0,0 +1,688 @@
+import os
+import uuid
+from datetime import date
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from psycopg import Error
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import AsyncConnectionPool
+
+import queries
+from cache import BookPageCache, book_keyset
+from database import Database
+from model import Book, BookBorrower, BookPage, Loan, Member, OverdueLoan, Publisher, Staff
+from utils import logger
+
+# rows per statement of a batch write; at most six parameters each
+BATCH_ROWS = 5000
+
+
+class AsyncRepository:
+    """
+    Asyncio counterpart of ``repository.Repository`` built on psycopg 3 and an async connection pool.
+
+    It sends the same SQL text and builds the same model objects as the blocking repository, so the
+    two behave identically; only the I/O model differs. Use it as an async context manager::
+
+        async with AsyncRepository() as repository:
+            books = await repository.get_books_by_author_name("Jane Austen")
+    """
+
+    def __init__(self) -> None:
+        """Reads the connection settings; the pool is opened by ``open`` or ``async with``."""
+        db = Database()
+        self.conninfo = make_conninfo(**{k: v for k, v in db.connection_kwargs().items() if v is not None})
+        self.pool: Optional[AsyncConnectionPool] = None
+        self.page_size = int(os.getenv("BOOK_PAGE_SIZE", "200"))
+        self.page_cache = BookPageCache(int(os.getenv("BOOK_PAGE_CACHE_SIZE", "64")))
+
+    async def open(self) -> None:
+        """Opens the connection pool, sized like the blocking pool."""
+        self.pool = AsyncConnectionPool(
+            self.conninfo,
+            min_size = int(os.getenv("POOL_MIN_SIZE", "1")),
+            max_size = int(os.getenv("POOL_MAX_SIZE", "10")),
+            timeout = float(os.getenv("POOL_TIMEOUT", "5")),
+            open = False
+        )
+        try:
+            await self.pool.open(wait = True)
+        except Exception as e:
+            logger.critical(f"Failed to connect to the database: {e}")
+            raise RuntimeError("Database connection failed.")
+
+    async def close(self) -> None:
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    async def __aenter__(self) -> "AsyncRepository":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def _fetch(self, query: str, params: Optional[Any] = None) -> List[Tuple[Any, ...]]:
+        if self.pool is None:
+            raise RuntimeError("Connection is not established.")
+        try:
+            # the pool commits when the block exits cleanly and rolls back otherwise
+            async with self.pool.connection() as connection:
+                async with connection.cursor() as cursor:
+                    await cursor.execute(query, params)
+                    return await cursor.fetchall() if cursor.description else []
+        except Error as e:
+            raise RuntimeError(f"Error fetching results: {e}")
+
+    async def _fetch_batched(
+            self,
+            query: str,
+            template: str,
+            rows: Sequence[Tuple[Any, ...]]
+    ) -> List[Tuple[Any, ...]]:
+        """
+        Runs a ``VALUES %s`` batch query over ``rows`` in one transaction, BATCH_ROWS rows per
+        statement so no statement exceeds the protocol's limit of 65535 parameters.
+        """
+        if self.pool is None:
+            raise RuntimeError("Connection is not established.")
+        results: List[Tuple[Any, ...]] = []
+        try:
+            async with self.pool.connection() as connection:
+                async with connection.cursor() as cursor:
+                    for start in range(0, len(rows), BATCH_ROWS):
+                        batch = rows[start:start + BATCH_ROWS]
+                        params = [value for row in batch for value in row]
+                        await cursor.execute(queries.expand_values(query, template, len(batch)), params)
+                        results.extend(await cursor.fetchall())
+            return results
+        except Error as e:
+            raise RuntimeError(f"Error executing batch: {e}")
+
+    async def _stream(
+            self,
+            query: str,
+            params: Optional[Tuple[Any, ...]] = None,
+            itersize: Optional[int] = None
+    ) -> AsyncIterator[Sequence[Tuple[Any, ...]]]:
+        if self.pool is None:
+            raise RuntimeError("Connection is not established.")
+        itersize = itersize or int(os.getenv("STREAM_ITERSIZE", "2000"))
+        try:
+            async with self.pool.connection() as connection:
+                async with connection.cursor(name = f"lms_stream_{uuid.uuid4().hex}") as cursor:
+                    await cursor.execute(query, params)
+                    while True:
+                        rows = await cursor.fetchmany(itersize)
+                        if not rows:
+                            break
+                        yield rows
+        except Error as e:
+            raise RuntimeError(f"Error streaming results: {e}")
+
+    async def fetchall_books(self) -> List[Book]:
+        """
+        Fetches all books from the database.
+
+        Returns:
+            List[Book]: A list of Book objects representing all books in the database.
+        """
+        try:
+            return queries.to_books(await self._fetch(queries.SELECT_ALL_BOOKS))
+        except Exception as e:
+            logger.error(f"Failed to fetch all books: {e}")
+            return []
+
+    async def fetch_books_page(
+            self,
+            after: Optional[Tuple] = None,
+            page_size: Optional[int] = None,
+            sort_key: str = "book_id"
+    ) -> BookPage:
+        """
+        Fetches one page of the book listing using keyset pagination.
+
+        Args:
+            after (Optional[Tuple]): The ``next_after`` cursor of the previous page, None for the first page.
+            page_size (Optional[int]): Maximum number of books in the page. Defaults to BOOK_PAGE_SIZE.
+            sort_key (str): Column to order by: book_id, title, author or year_published.
+
+        Returns:
+            BookPage: The books of the page and the cursor of the next one.
+        """
+        page_size = page_size or self.page_size
+        query, params = queries.books_page_query(after, page_size, sort_key)
+
+        page = self.page_cache.get(sort_key, after, page_size)
+        if page is not None:
+            return page
+
+        generation = self.page_cache.generation
+        try:
+            results = await self._fetch(query, params)
+        except Exception as e:
+            logger.error(f"Failed to fetch page of books after {after}: {e}")
+            raise RuntimeError("Failed to fetch books.")
+
+        books = queries.to_books(results[:page_size])
+        next_after = book_keyset(books[-1], sort_key) if len(results) > page_size else None
+        page = BookPage(books = books, next_after = next_after)
+        self.page_cache.put(sort_key, after, page_size, page, generation)
+        return page
+
+    async def stream_books(self, itersize: Optional[int] = None) -> AsyncIterator[List[Book]]:
+        """
+        Streams all books from the database through a server-side cursor.
+
+        Args:
+            itersize (Optional[int]): Number of books per batch. Defaults to STREAM_ITERSIZE.
+
+        Yields:
+            List[Book]: Consecutive batches of Book objects.
+        """
+        try:
+            async for rows in self._stream(queries.SELECT_ALL_BOOKS, itersize = itersize):
+                yield queries.to_books(rows)
+        except Exception as e:
+            logger.error(f"Failed to stream books: {e}")
+            raise RuntimeError("Failed to stream books.")
+
+    async def add_book(self, book: Book) -> Book:
+        """
+        Adds a new book to the database.
+
+        Args:
+            book (Book): The book object to be added.
+
+        Returns:
+            Book: The book as stored, including its generated ID.
+        """
+        try:
+            stored = queries.to_books(await self._fetch(queries.INSERT_BOOK, queries.book_params(book)))[0]
+            self.page_cache.invalidate_book(stored.id, stored)
+            logger.info(f"Book '{book.title}' added successfully.")
+            return stored
+        except Exception as e:
+            logger.error(f"Failed to add book '{book.title}': {e}")
+            raise RuntimeError("Failed to add book.")
+
+    async def add_books(self, books: Sequence[Book]) -> List[Book]:
+        """
+        Adds several books with multi-row INSERTs and one commit.
+
+        Args:
+            books (Sequence[Book]): The books to add; their IDs are ignored.
+
+        Returns:
+            List[Book]: The books as stored, including their generated IDs.
+        """
+        if not books:
+            return []
+        rows = [queries.book_params(book) for book in books]
+        try:
+            stored = queries.to_books(
+                await self._fetch_batched(queries.INSERT_BOOKS, queries.INSERT_BOOKS_TEMPLATE, rows)
+            )
+        except Exception as e:
+            logger.error(f"Failed to add {len(books)} books: {e}")
+            raise RuntimeError("Failed to add books.")
+
+        for book in stored:
+            self.page_cache.invalidate_book(book.id, book)
+        logger.info(f"{len(stored)} books added successfully.")
+        return stored
+
+    async def update_books(self, books: Sequence[Book]) -> List[Book]:
+        """
+        Updates several books with UPDATE ... FROM (VALUES ...) statements and one commit.
+
+        Args:
+            books (Sequence[Book]): The books with updated information.
+
+        Returns:
+            List[Book]: The books as stored after the update; IDs that no longer exist are missing.
+        """
+        if not books:
+            return []
+        rows = [(book.id,) + queries.book_params(book) for book in books]
+        try:
+            stored = queries.to_books(
+                await self._fetch_batched(queries.UPDATE_BOOKS, queries.UPDATE_BOOKS_TEMPLATE, rows)
+            )
+        except Exception as e:
+            logger.error(f"Failed to update {len(books)} books: {e}")
+            raise RuntimeError("Failed to update books.")
+
+        stored_by_id = {book.id: book for book in stored}
+        for book in books:
+            self.page_cache.invalidate_book(book.id, stored_by_id.get(book.id))
+        logger.info(f"{len(stored)} books updated successfully.")
+        return stored
+
+    async def delete_books(self, book_ids: Sequence[int]) -> List[int]:
+        """
+        Deletes several books with a single DELETE ... WHERE book_id = ANY(...) and one commit.
+
+        Args:
+            book_ids (Sequence[int]): The IDs of the books to delete.
+
+        Returns:
+            List[int]: The IDs that were actually deleted.
+        """
+        if not book_ids:
+            return []
+        try:
+            deleted = [row[0] for row in await self._fetch(queries.DELETE_BOOKS, (list(book_ids),))]
+        except Exception as e:
+            logger.error(f"Failed to delete books {list(book_ids)}: {e}")
+            raise RuntimeError("Failed to delete books.")
+
+        for book_id in deleted:
+            self.page_cache.invalidate_book(book_id)
+        logger.info(f"{len(deleted)} books deleted successfully.")
+        return deleted
+
+    async def delete_book_by_id(self, book_id: int) -> bool:
+        """
+        Deletes a book by its ID.
+
+        Args:
+            book_id (int): The ID of the book to delete.
+
+        Returns:
+            bool: True if a book was deleted, False if no book had that ID.
+        """
+        try:
+            deleted = bool(await self._fetch(queries.DELETE_BOOK, (book_id,)))
+            self.page_cache.invalidate_book(book_id)
+            logger.info(f"Book with ID {book_id} deleted successfully.")
+            return deleted
+        except Exception as e:
+            logger.error(f"Failed to delete book with ID {book_id}: {e}")
+            raise RuntimeError("Failed to delete book.")
+
+    async def update_book(self, book: Book) -> Optional[Book]:
+        """
+        Updates the details of a book in the database.
+
+        Args:
+            book (Book): The book object with updated information.
+
+        Returns:
+            Optional[Book]: The book as stored after the update, or None if no book had that ID.
+        """
+        try:
+            results = queries.to_books(await self._fetch(queries.UPDATE_BOOK, queries.book_params(book) + (book.id,)))
+            stored = results[0] if results else None
+            self.page_cache.invalidate_book(book.id, stored)
+            logger.info(f"Book with ID {book.id} updated successfully.")
+            return stored
+        except Exception as e:
+            logger.error(f"Failed to update book with ID {book.id}: {e}")
+            raise RuntimeError("Failed to update book.")
+
+    async def get_books_by_author_name(self, author_name: str) -> List[Book]:
+        """
+        Fetches books by author name.
+
+        Args:
+            author_name (str): The name of the author.
+
+        Returns:
+            List[Book]: A list of books by the given author.
+        """
+        try:
+            return queries.to_books(await self._fetch(queries.SELECT_BOOKS_BY_AUTHOR, (author_name,)))
+        except Exception as e:
+            logger.error(f"Failed to fetch books by author '{author_name}': {e}")
+            return []
+
+    async def search_books(self, text: str, limit: int = 50) -> List[Book]:
+        """
+        Searches books by title and author, tolerating typos and incomplete words.
+
+        Args:
+            text (str): The text typed by the user.
+            limit (int): Maximum number of books returned.
+
+        Returns:
+            List[Book]: The matching books, best match first.
+        """
+        params = queries.search_params(text, limit)
+        if params is None:
+            return []
+        try:
+            return queries.to_books(await self._fetch(queries.SEARCH_BOOKS, params))
+        except Exception as e:
+            logger.error(f"Failed to search books for '{text}': {e}")
+            raise RuntimeError("Failed to search books.")
+
+    async def search_members(self, text: str, limit: int = 50) -> List[Member]:
+        """
+        Searches members by name and email, tolerating typos and incomplete words.
+
+        Args:
+            text (str): The text typed by the user.
+            limit (int): Maximum number of members returned.
+
+        Returns:
+            List[Member]: The matching members, best match first.
+        """
+        params = queries.search_params(text, limit)
+        if params is None:
+            return []
+        try:
+            return queries.to_members(await self._fetch(queries.SEARCH_MEMBERS, params))
+        except Exception as e:
+            logger.error(f"Failed to search members for '{text}': {e}")
+            raise RuntimeError("Failed to search members.")
+
+    async def get_publishers(self) -> List[Publisher]:
+        """
+        Fetches all publishers from the database.
+
+        Returns:
+            List[Publisher]: A list of Publisher objects.
+        """
+        try:
+            return queries.to_publishers(await self._fetch(queries.SELECT_ALL_PUBLISHERS))
+        except Exception as e:
+            logger.error(f"Failed to fetch publishers: {e}")
+            return []
+
+    async def stream_publishers(self, itersize: Optional[int] = None) -> AsyncIterator[List[Publisher]]:
+        """
+        Streams all publishers from the database through a server-side cursor.
+
+        Args:
+            itersize (Optional[int]): Number of publishers per batch. Defaults to STREAM_ITERSIZE.
+
+        Yields:
+            List[Publisher]: Consecutive batches of Publisher objects.
+        """
+        try:
+            async for rows in self._stream(queries.SELECT_ALL_PUBLISHERS, itersize = itersize):
+                yield queries.to_publishers(rows)
+        except Exception as e:
+            logger.error(f"Failed to stream publishers: {e}")
+            raise RuntimeError("Failed to stream publishers.")
+
+    async def get_publishers_page(self, after_id: int = 0, limit: Optional[int] = None) -> List[Publisher]:
+        """
+        Fetches one keyset page of publishers in ID order. Unlike ``stream_publishers`` it holds no
+        connection between pages, however long the reader takes to ask for the next one.
+
+        Args:
+            after_id (int): The last ID of the previous page, 0 for the first page.
+            limit (Optional[int]): Maximum number of publishers. Defaults to BOOK_PAGE_SIZE.
+
+        Returns:
+            List[Publisher]: The publishers of the page; fewer than ``limit`` on the last page.
+        """
+        params = (after_id, limit or self.page_size)
+        try:
+            return queries.to_publishers(await self._fetch(queries.SELECT_PUBLISHERS_PAGE, params))
+        except Exception as e:
+            logger.error(f"Failed to fetch publishers after {after_id}: {e}")
+            raise RuntimeError("Failed to fetch publishers.")
+
+    async def get_all_members(self) -> List[Member]:
+        """
+        Fetches all members from the database.
+
+        Returns:
+            List[Member]: A list of Member objects.
+        """
+        try:
+            return queries.to_members(await self._fetch(queries.SELECT_ALL_MEMBERS))
+        except Exception as e:
+            logger.error(f"Failed to fetch members: {e}")
+            return []
+
+    async def stream_members(self, itersize: Optional[int] = None) -> AsyncIterator[List[Member]]:
+        """
+        Streams all members from the database through a server-side cursor.
+
+        Args:
+            itersize (Optional[int]): Number of members per batch. Defaults to STREAM_ITERSIZE.
+
+        Yields:
+            List[Member]: Consecutive batches of Member objects.
+        """
+        try:
+            async for rows in self._stream(queries.SELECT_ALL_MEMBERS, itersize = itersize):
+                yield queries.to_members(rows)
+        except Exception as e:
+            logger.error(f"Failed to stream members: {e}")
+            raise RuntimeError("Failed to stream members.")
+
+    async def get_members_page(self, after_id: int = 0, limit: Optional[int] = None) -> List[Member]:
+        """
+        Fetches one keyset page of members in ID order, holding no connection between pages.
+
+        Args:
+            after_id (int): The last ID of the previous page, 0 for the first page.
+            limit (Optional[int]): Maximum number of members. Defaults to BOOK_PAGE_SIZE.
+
+        Returns:
+            List[Member]: The members of the page; fewer than ``limit`` on the last page.
+        """
+        params = (after_id, limit or self.page_size)
+        try:
+            return queries.to_members(await self._fetch(queries.SELECT_MEMBERS_PAGE, params))
+        except Exception as e:
+            logger.error(f"Failed to fetch members after {after_id}: {e}")
+            raise RuntimeError("Failed to fetch members.")
+
+    async def get_book_by_name(self, book_name: str) -> Optional[Book]:
+        """
+        Fetches a book by its title.
+
+        Args:
+            book_name (str): The title of the book.
+
+        Returns:
+            Optional[Book]: The Book object if found, otherwise None.
+        """
+        try:
+            result = queries.to_books(await self._fetch(queries.SELECT_BOOK_BY_TITLE, (book_name,)))
+            return result[0] if result else None
+        except Exception as e:
+            logger.error(f"Failed to fetch book '{book_name}': {e}")
+            return None
+
+    async def get_all_members_by_book(self, book_name: str) -> List[BookBorrower]:
+        """
+        Fetches all members who borrowed a specific book.
+
+        Args:
+            book_name (str): The title of the book.
+
+        Returns:
+            List[BookBorrower]: One entry per loan of the book, most recent first.
+        """
+        try:
+            return queries.to_book_borrowers(await self._fetch(queries.SELECT_BORROWERS_BY_BOOK, (book_name,)))
+        except Exception as e:
+            logger.error(f"Failed to fetch members for book '{book_name}': {e}")
+            raise RuntimeError("Failed to fetch members by book.")
+
+    async def get_members_with_loans(self) -> List[Member]:
+        """
+        Fetches the members who have borrowed at least one book.
+
+        Returns:
+            List[Member]: The members with at least one loan, current or returned.
+        """
+        try:
+            return queries.to_members(await self._fetch(queries.SELECT_MEMBERS_WITH_LOANS))
+        except Exception as e:
+            logger.error(f"Failed to fetch members with loans: {e}")
+            raise RuntimeError("Failed to fetch members with loans.")
+
+    async def get_overdue_loans(self, as_of: Optional[date] = None) -> List[OverdueLoan]:
+        """
+        Fetches the loans that are not returned and past their due date.
+
+        Args:
+            as_of (Optional[date]): The day to measure against. Defaults to today.
+
+        Returns:
+            List[OverdueLoan]: The overdue loans, longest overdue first.
+        """
+        try:
+            return queries.to_overdue_loans(
+                await self._fetch(queries.SELECT_OVERDUE_LOANS, {"as_of": as_of or date.today()})
+            )
+        except Exception as e:
+            logger.error(f"Failed to fetch overdue loans: {e}")
+            raise RuntimeError("Failed to fetch overdue loans.")
+
+    async def get_all_loans(self) -> List[Loan]:
+        """
+        Fetches all loans from the database.
+
+        Returns:
+            List[Loan]: A list of Loan objects.
+        """
+        try:
+            return queries.to_loans(await self._fetch(queries.SELECT_ALL_LOANS))
+        except Exception as e:
+            logger.error(f"Failed to fetch loans: {e}")
+            return []
+
+    async def borrow_book(self, book_id: int, member_id: int, staff_id: int, loan_days: int) -> Optional[Loan]:
+        """
+        Lends a book in a single statement. The database refuses a second open loan of the same book,
+        so of several desks lending one copy at the same time exactly one succeeds.
+
+        Args:
+            book_id (int): The book being borrowed.
+            member_id (int): The borrowing member.
+            staff_id (int): The staff member at the desk.
+            loan_days (int): Days until the book is due.
+
+        Returns:
+            Optional[Loan]: The new loan, or None if the book is already on loan.
+        """
+        params = {"book_id": book_id, "member_id": member_id, "staff_id": staff_id, "loan_days": loan_days}
+        try:
+            loans = queries.to_loans(await self._fetch(queries.BORROW_BOOK, params))
+        except Exception as e:
+            logger.error(f"Failed to lend book {book_id} to member {member_id}: {e}")
+            raise RuntimeError("Failed to borrow book.")
+        if loans:
+            logger.info(f"Book {book_id} lent to member {member_id}, due {loans[0].due_date}.")
+        return loans[0] if loans else None
+
+    async def return_book(self, book_id: int) -> Optional[Loan]:
+        """
+        Closes the open loan of a book.
+
+        Args:
+            book_id (int): The book being returned.
+
+        Returns:
+            Optional[Loan]: The closed loan, or None if the book was not on loan.
+        """
+        try:
+            loans = queries.to_loans(await self._fetch(queries.RETURN_BOOK, (book_id,)))
+        except Exception as e:
+            logger.error(f"Failed to return book {book_id}: {e}")
+            raise RuntimeError("Failed to return book.")
+        if loans:
+            logger.info(f"Book {book_id} returned by member {loans[0].member_id}.")
+        return loans[0] if loans else None
+
+    async def renew_loan(self, book_id: int, loan_days: int, max_renewals: int) -> Optional[Loan]:
+        """
+        Extends the open loan of a book that is not overdue and has renewals left.
+
+        Args:
+            book_id (int): The book on loan.
+            loan_days (int): Days added to the due date.
+            max_renewals (int): Renewals allowed per loan.
+
+        Returns:
+            Optional[Loan]: The renewed loan, or None if the book is not on loan, is overdue or has
+            been renewed ``max_renewals`` times.
+        """
+        params = {"book_id": book_id, "loan_days": loan_days, "max_renewals": max_renewals}
+        try:
+            loans = queries.to_loans(await self._fetch(queries.RENEW_LOAN, params))
+        except Exception as e:
+            logger.error(f"Failed to renew the loan of book {book_id}: {e}")
+            raise RuntimeError("Failed to renew loan.")
+        if loans:
+            logger.info(f"Loan of book {book_id} renewed until {loans[0].due_date}.")
+        return loans[0] if loans else None
+
+    async def get_open_loan(self, book_id: int) -> Optional[Loan]:
+        """
+        Fetches the open loan of a book; a book without one is available.
+
+        Args:
+            book_id (int): The book to look up.
+
+        Returns:
+            Optional[Loan]: The open loan, or None if the book is on the shelf.
+        """
+        try:
+            loans = queries.to_loans(await self._fetch(queries.SELECT_OPEN_LOAN, (book_id,)))
+        except Exception as e:
+            logger.error(f"Failed to fetch the open loan of book {book_id}: {e}")
+            raise RuntimeError("Failed to fetch loan.")
+        return loans[0] if loans else None
+
+    async def get_availability(self, book_ids: Sequence[int]) -> Dict[int, bool]:
+        """
+        Tells for several books at once whether they are on the shelf.
+
+        Args:
+            book_ids (Sequence[int]): The books to look up.
+
+        Returns:
+            Dict[int, bool]: True for every book that is not on loan.
+        """
+        if not book_ids:
+            return {}
+        try:
+            return dict(await self._fetch(queries.SELECT_AVAILABILITY, (list(book_ids),)))
+        except Exception as e:
+            logger.error(f"Failed to fetch the availability of books {list(book_ids)}: {e}")
+            raise RuntimeError("Failed to fetch availability.")
+
+    async def get_open_loans(self, member_id: Optional[int] = None, limit: int = 1000) -> List[Loan]:
+        """
+        Fetches the books currently on loan, soonest due first.
+
+        Args:
+            member_id (Optional[int]): Only the loans of this member; all members if None.
+            limit (int): Maximum number of loans when listing every member's.
+
+        Returns:
+            List[Loan]: The open loans.
+        """
+        if member_id is None:
+            query, params = queries.SELECT_OPEN_LOANS, (limit,)
+        else:
+            query, params = queries.SELECT_MEMBER_OPEN_LOANS, (member_id,)
+        try:
+            return queries.to_loans(await self._fetch(query, params))
+        except Exception as e:
+            logger.error(f"Failed to fetch open loans: {e}")
+            raise RuntimeError("Failed to fetch open loans.")
+
+    async def get_all_staff(self) -> List[Staff]:
+        """
+        Fetches all staff members from the database.
+
+        Returns:
+            List[Staff]: A list of Staff objects.
+        """
+        try:
+            return queries.to_staff(await self._fetch(queries.SELECT_ALL_STAFF))
+        except Exception as e:
+            logger.error(f"Failed to fetch staff: {e}")
+            return []
@@ -0,0 +1,89 @@
+"""
+Compares the concurrent throughput of the blocking Repository (driven by a thread pool) with the
+asyncio AsyncRepository (driven by a single event loop) on the same mix of read queries.
+
+Run from the project root against a populated database:
+
+    python -m benchmarks.async_vs_sync --requests 2000 --concurrency 10
+"""
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+from async_repository import AsyncRepository
+from cache import ReferenceCache
+from repository import Repository
+
+AUTHORS = ["Jane Austen", "George Orwell", "Leo Tolstoy", "Herman Melville", "Harper Lee"]
+
+
+def workload(requests: int) -> List[Callable[[Any], Any]]:
+    """The same request mix for both implementations: author lookups, publishers and members."""
+    calls: List[Callable[[Any], Any]] = []
+    for i in range(requests):
+        kind = i % 3
+        if kind == 0:
+            calls.append(lambda repository, author = AUTHORS[i % len(AUTHORS)]: repository.get_books_by_author_name(author))
+        elif kind == 1:
+            calls.append(lambda repository: repository.get_publishers())
+        else:
+            calls.append(lambda repository: repository.get_all_members())
+    return calls
+
+
+def summarise(name: str, requests: int, elapsed: float, concurrency: int) -> Dict[str, Any]:
+    return {
+        "implementation": name,
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 4),
+        "requests_per_second": round(requests / elapsed, 1) if elapsed else None,
+    }
+
+
+def run_sync(requests: int, concurrency: int) -> Dict[str, Any]:
+    # no TTLs: every call reaches the database, as AsyncRepository's do
+    repository = Repository(cache = ReferenceCache(ttls = {}))
+    calls = workload(requests)
+
+    def run(call: Callable[[Any], Any]) -> Any:
+        return call(repository)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers = concurrency) as executor:
+        list(executor.map(run, calls))
+    return summarise("sync", requests, time.perf_counter() - started, concurrency)
+
+
+async def run_async(requests: int, concurrency: int) -> Dict[str, Any]:
+    async with AsyncRepository() as repository:
+        calls = workload(requests)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(call: Callable[[Any], Any]) -> Any:
+            async with semaphore:
+                return await call(repository)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(run(call) for call in calls))
+        return summarise("async", requests, time.perf_counter() - started, concurrency)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type = int, default = 2000)
+    parser.add_argument("--concurrency", type = int, default = 10)
+    args = parser.parse_args()
+
+    results = [
+        run_sync(args.requests, args.concurrency),
+        asyncio.run(run_async(args.requests, args.concurrency)),
+    ]
+    print(json.dumps(results, indent = 2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Measures checkout throughput with many desks lending the same books at once, and checks that no book
+ever ends up on two open loans.
+
+Every worker repeatedly borrows a random book from a small set of available books and, if it got it,
+returns it again. With few books and many workers most checkouts collide, which is the case the
+unique open-loan index and the row locks have to get right.
+
+    python -m benchmarks.circulation --workers 16 --books 50 --seconds 10
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, List
+
+from cache import ReferenceCache
+from repository import Repository
+
+DUPLICATE_OPEN_LOANS = (
+    "SELECT count(*) FROM (SELECT book_id FROM loan WHERE date_returned IS NULL "
+    "GROUP BY book_id HAVING count(*) > 1) AS duplicates;"
+)
+AVAILABLE_BOOKS = (
+    "SELECT book_id FROM book b WHERE NOT EXISTS "
+    "(SELECT 1 FROM loan l WHERE l.book_id = b.book_id AND l.date_returned IS NULL) "
+    "ORDER BY book_id LIMIT %s;"
+)
+
+
+def run(workers: int, books: int, seconds: float, seed: int = 42) -> Dict[str, Any]:
+    # one connection per desk, set before the pool is created
+    os.environ["POOL_MAX_SIZE"] = str(max(workers, int(os.getenv("POOL_MAX_SIZE", "10"))))
+    repository = Repository(cache = ReferenceCache(ttls = {}))
+    db = repository.db
+
+    book_ids = [row[0] for row in db.fetch_results(AVAILABLE_BOOKS, (books,))]
+    member_id = db.fetch_results("SELECT min(member_id) FROM member;")[0][0]
+    staff_id = db.fetch_results("SELECT min(staff_id) FROM staff;")[0][0]
+    if not book_ids or member_id is None or staff_id is None:
+        raise RuntimeError("The database needs available books, a member and a staff member; run benchmarks.seed first.")
+
+    counts = {"checkouts": 0, "conflicts": 0, "returns": 0, "errors": 0}
+    loan_ids: List[int] = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def desk(index: int) -> None:
+        rng = random.Random(seed + index)
+        local = {key: 0 for key in counts}
+        created = []
+        while time.monotonic() < deadline:
+            book_id = rng.choice(book_ids)
+            try:
+                loan = repository.borrow_book(book_id, member_id, staff_id, 21)
+                if loan is None:
+                    local["conflicts"] += 1
+                    continue
+                local["checkouts"] += 1
+                created.append(loan.id)
+                if repository.return_book(book_id) is not None:
+                    local["returns"] += 1
+            except RuntimeError:
+                local["errors"] += 1
+        with lock:
+            for key, value in local.items():
+                counts[key] += value
+            loan_ids.extend(created)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target = desk, args = (i,)) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    duplicates = db.fetch_results(DUPLICATE_OPEN_LOANS)[0][0]
+    # leave the data set as seeded
+    db.execute_query("DELETE FROM loan WHERE loan_id = ANY(%s);", (loan_ids,))
+
+    return {
+        "workers": workers,
+        "books": len(book_ids),
+        "seconds": round(elapsed, 3),
+        **counts,
+        "checkouts_per_second": round(counts["checkouts"] / elapsed, 1),
+        "attempts_per_second": round((counts["checkouts"] + counts["conflicts"]) / elapsed, 1),
+        "duplicate_open_loans": duplicates,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type = int, default = 16)
+    parser.add_argument("--books", type = int, default = 50, help = "size of the contended set of books")
+    parser.add_argument("--seconds", type = float, default = 10.0)
+    parser.add_argument("--seed", type = int, default = 42)
+    args = parser.parse_args()
+
+    result = run(args.workers, args.books, args.seconds, args.seed)
+    print(json.dumps(result, indent = 2))
+    if result["duplicate_open_loans"]:
+        raise SystemExit("A book was lent twice.")
+
+
+if __name__ == "__main__":
+    main()
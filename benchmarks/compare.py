@@ -0,0 +1,69 @@
+"""
+Compares two benchmark result files and flags benchmarks whose median got slower.
+
+    python -m benchmarks.compare baseline.json current.json --threshold 10
+
+Exits with status 1 when any benchmark regressed by more than the threshold, so it can gate CI.
+"""
+import argparse
+import sys
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.harness import read_results
+
+COMPARED_META = ("scale", "seed", "python", "platform", "cpus")
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> Tuple[List[str], bool]:
+    """
+    Builds a report line per benchmark present in both files.
+
+    Args:
+        baseline (Dict[str, Any]): Results of the reference commit.
+        current (Dict[str, Any]): Results of the commit under test.
+        threshold (float): Allowed slowdown of the median, in percent.
+
+    Returns:
+        Tuple[List[str], bool]: The report lines and whether anything regressed.
+    """
+    lines = []
+    for key in COMPARED_META:
+        if baseline["meta"].get(key) != current["meta"].get(key):
+            lines.append(f"warning: {key} differs ({baseline['meta'].get(key)} vs {current['meta'].get(key)})")
+
+    before = {result["name"]: result for result in baseline["results"]}
+    regressed = False
+    for result in current["results"]:
+        reference = before.get(result["name"])
+        if reference is None:
+            lines.append(f"{result['name']:<50} {'':>10} {result['median_ms']:>10.1f} ms  new")
+            continue
+        change = (result["median_ms"] - reference["median_ms"]) / reference["median_ms"] * 100 \
+            if reference["median_ms"] else 0.0
+        verdict = ""
+        if change > threshold:
+            verdict = "REGRESSION"
+            regressed = True
+        elif change < -threshold:
+            verdict = "improved"
+        lines.append(
+            f"{result['name']:<50} {reference['median_ms']:>10.1f} {result['median_ms']:>10.1f} ms "
+            f"{change:+7.1f}%  {verdict}"
+        )
+    return lines, regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type = float, default = 10.0, help = "Allowed slowdown in percent.")
+    args = parser.parse_args()
+
+    lines, regressed = compare(read_results(args.baseline), read_results(args.current), args.threshold)
+    print("\n".join(lines))
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Timing and result-file helpers shared by the benchmark scripts.
+
+A result file is JSON with the environment the run was made in and one entry per benchmark:
+
+    {"meta": {"commit": "...", "scale": "100k", ...},
+     "results": [{"name": "repository.fetchall_books", "median_ms": 812.4, ...}, ...]}
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+
+def measure(
+        name: str,
+        fn: Callable[[], Any],
+        iterations: int = 5,
+        warmup: int = 1,
+        setup: Optional[Callable[[], None]] = None
+) -> Dict[str, Any]:
+    """
+    Times ``fn`` over several iterations after discarding ``warmup`` runs.
+
+    Args:
+        name (str): Benchmark name, e.g. "repository.fetchall_books".
+        fn (Callable): The operation to time.
+        iterations (int): Timed runs.
+        warmup (int): Untimed runs first, so connection setup and plan caching do not skew the result.
+        setup (Optional[Callable]): Untimed preparation before every run.
+
+    Returns:
+        Dict[str, Any]: Summary statistics in milliseconds.
+    """
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        fn()
+
+    samples = []
+    for _ in range(iterations):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(name, samples)
+
+
+def summarize(name: str, samples: List[float]) -> Dict[str, Any]:
+    """
+    Summarises timings taken elsewhere, e.g. in a child process, in the format of ``measure``.
+
+    Args:
+        name (str): Benchmark name.
+        samples (List[float]): Timings in milliseconds.
+
+    Returns:
+        Dict[str, Any]: Summary statistics in milliseconds.
+    """
+    samples = sorted(samples)
+    return {
+        "name": name,
+        "iterations": len(samples),
+        "min_ms": round(samples[0], 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "mean_ms": round(statistics.mean(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+def environment(**extra: Any) -> Dict[str, Any]:
+    """Describes where a run was made, so results are only compared with like."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output = True, text = True, check = True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec = "seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        **extra,
+    }
+
+
+def write_results(path: str, meta: Dict[str, Any], results: List[Dict[str, Any]]) -> None:
+    with open(path, "w", encoding = "utf-8") as stream:
+        json.dump({"meta": meta, "results": results}, stream, indent = 2)
+
+
+def read_results(path: str) -> Dict[str, Any]:
+    with open(path, encoding = "utf-8") as stream:
+        return json.load(stream)
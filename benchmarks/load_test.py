@@ -0,0 +1,116 @@
+"""
+Load test of the HTTP service (service.py): many concurrent clients issuing a mix of reads for a fixed
+time, a share of them conditional, as kiosks polling for changes would.
+
+Every client remembers the ETag of each URL it fetched; with --conditional 0.5 half of its repeated
+requests carry If-None-Match and should come back 304 without touching the data. Start the service
+first, then:
+
+    python -m benchmarks.load_test --url http://127.0.0.1:8080 --clients 64 --seconds 30
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from typing import Any, Dict, List
+
+import aiohttp
+
+# (weight, path) of the request mix
+REQUEST_MIX = (
+    (30, "/books?sort=title&limit=50"),
+    (10, "/books?sort=author&limit=200"),
+    (15, "/books/search?q=the&limit=20"),
+    (10, "/members/search?q=an&limit=20"),
+    (10, "/loans/overdue"),
+    (10, "/reports/most-borrowed?limit=20"),
+    (5, "/reports/active-members?limit=20"),
+    (5, "/analytics/books-per-decade"),
+    (5, "/analytics/loans-per-month?months=24"),
+)
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run(url: str, clients: int, seconds: float, conditional: float, seed: int = 42) -> Dict[str, Any]:
+    paths = [path for _, path in REQUEST_MIX]
+    weights = [weight for weight, _ in REQUEST_MIX]
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    errors = 0
+    deadline = time.monotonic() + seconds
+
+    async def client(session: aiohttp.ClientSession, index: int) -> None:
+        nonlocal errors
+        rng = random.Random(seed + index)
+        etags: Dict[str, str] = {}
+        while time.monotonic() < deadline:
+            path = rng.choices(paths, weights)[0]
+            headers = {}
+            if path in etags and rng.random() < conditional:
+                headers["If-None-Match"] = etags[path]
+            started = time.perf_counter()
+            try:
+                async with session.get(url + path, headers = headers) as response:
+                    await response.read()
+                    status = response.status
+                    if "ETag" in response.headers:
+                        etags[path] = response.headers["ETag"]
+            except aiohttp.ClientError:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    connector = aiohttp.TCPConnector(limit = clients)
+    started = time.perf_counter()
+    async with aiohttp.ClientSession(connector = connector) as session:
+        await asyncio.gather(*(client(session, i) for i in range(clients)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "clients": clients,
+        "seconds": round(elapsed, 3),
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "not_modified_ratio": round(statuses.get(304, 0) / len(latencies), 3) if latencies else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+            "p50": round(percentile(latencies, 0.50), 2),
+            "p95": round(percentile(latencies, 0.95), 2),
+            "p99": round(percentile(latencies, 0.99), 2),
+            "max": round(max(latencies, default = 0.0), 2),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default = "http://127.0.0.1:8080")
+    parser.add_argument("--clients", type = int, default = 64)
+    parser.add_argument("--seconds", type = float, default = 30.0)
+    parser.add_argument("--conditional", type = float, default = 0.5, help = "share of repeated requests sent with If-None-Match")
+    parser.add_argument("--seed", type = int, default = 42)
+    parser.add_argument("--output", help = "also write the result to this JSON file")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.url.rstrip("/"), args.clients, args.seconds, args.conditional, args.seed))
+    print(json.dumps(result, indent = 2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent = 2)
+    if result["errors"] or any(int(status) >= 500 for status in result["statuses"]):
+        raise SystemExit("The service failed some requests.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Seeds the database with a reproducible data set of a given scale for benchmarking.
+
+The data comes from ``datagen`` with the volumes of a library of that many books. The same scale
+and seed always produce the same rows, so runs on different commits measure the same data.
+
+    python -m benchmarks.seed --scale 100k --seed 42
+"""
+import argparse
+import json
+from dataclasses import asdict
+from datetime import date
+from typing import Optional
+
+import datagen
+from database import Database
+
+# books per scale; the other tables are sized relative to the book count
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+
+def seed_database(db: Database, books: int, seed: int = 42, today: Optional[date] = None) -> datagen.Volumes:
+    """Replaces the contents of every table with a generated library of ``books`` titles."""
+    return datagen.generate(db, datagen.Volumes.for_books(books), seed, today)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices = SCALES, default = "10k")
+    parser.add_argument("--seed", type = int, default = 42)
+    args = parser.parse_args()
+
+    db = Database()
+    db.connect()
+    print(json.dumps(asdict(seed_database(db, SCALES[args.scale], args.seed))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Measures how long the desktop client takes to start, in fresh processes so nothing is cached:
+
+- startup.import       importing app.py and what it imports at module level
+- startup.first_paint  until the first paint of the main window
+- startup.first_data   until the first rows in the books table
+
+All three are counted from just before ``import app``; interpreter startup is not included.
+
+Each iteration launches a child process with the offscreen Qt platform, so no display is needed. The
+result file has the format of benchmarks.suite and can be compared across releases the same way:
+
+    python -m benchmarks.startup --iterations 10 --output startup.json
+    python -m benchmarks.compare startup-baseline.json startup.json
+
+--top-imports lists the slowest modules imported at startup, from ``python -X importtime``.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from benchmarks.harness import environment, summarize, write_results
+
+MARKS = ("import", "first_paint", "first_data")
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def probe(timeout: float) -> None:
+    """Starts the client in this process and prints its startup marks as JSON, in milliseconds."""
+    started = time.perf_counter()
+    marks: Dict[str, float] = {}
+
+    def mark(name: str) -> None:
+        if name not in marks:
+            marks[name] = round((time.perf_counter() - started) * 1000, 3)
+
+    import app
+    mark("import")
+
+    from PyQt5.QtCore import QEvent, QObject, QTimer
+
+    qt_app = app.create_application(sys.argv[:1])
+    app.Database.load_configuration()
+    window = app.MainWindow()
+
+    class PaintWatcher(QObject):
+        def eventFilter(self, watched, event) -> bool:
+            if event.type() == QEvent.Paint:
+                mark("first_paint")
+            return False
+
+    def on_first_rows(*_) -> None:
+        mark("first_data")
+        qt_app.quit()
+
+    watcher = PaintWatcher()
+    window.installEventFilter(watcher)
+    window.book_tab.loaded.connect(lambda tab: tab.books_model.rowsInserted.connect(on_first_rows))
+    QTimer.singleShot(int(timeout * 1000), qt_app.quit)
+
+    window.show()
+    qt_app.exec_()
+    print(json.dumps(marks))
+
+
+def run_child(timeout: float, import_time: bool = False) -> Tuple[Dict[str, float], str]:
+    """Runs one probe in a fresh interpreter and returns its marks and its stderr."""
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    command = [sys.executable] + (["-X", "importtime"] if import_time else []) + \
+        ["-m", "benchmarks.startup", "--probe", "--timeout", str(timeout)]
+    completed = subprocess.run(command, capture_output = True, text = True, env = env, timeout = timeout + 30)
+    if completed.returncode != 0:
+        raise RuntimeError(f"The client failed to start:\n{completed.stderr[-2000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1]), completed.stderr
+
+
+def slowest_imports(stderr: str, count: int) -> List[Tuple[str, float]]:
+    """Top-level modules by cumulative import time in milliseconds, from ``-X importtime`` output."""
+    modules = []
+    for line in stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        # only the outermost imports; nested ones are included in their cumulative time
+        if match and not match.group(3):
+            modules.append((match.group(4), int(match.group(2)) / 1000))
+    return sorted(modules, key = lambda module: module[1], reverse = True)[:count]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type = int, default = 5)
+    parser.add_argument("--warmup", type = int, default = 1, help = "untimed launches first, to warm the OS file cache")
+    parser.add_argument("--timeout", type = float, default = 60.0, help = "seconds to wait for the first data")
+    parser.add_argument("--top-imports", type = int, default = 0, metavar = "N")
+    parser.add_argument("--output", help = "write the results to this JSON file")
+    parser.add_argument("--probe", action = "store_true", help = argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        probe(args.timeout)
+        return
+
+    for _ in range(args.warmup):
+        run_child(args.timeout)
+    samples: Dict[str, List[float]] = {name: [] for name in MARKS}
+    for _ in range(args.iterations):
+        marks, _ = run_child(args.timeout)
+        for name, value in marks.items():
+            samples[name].append(value)
+
+    results = []
+    for name in MARKS:
+        if len(samples[name]) < args.iterations:
+            print(f"warning: startup.{name} was reached in {len(samples[name])} of {args.iterations} launches")
+        if samples[name]:
+            results.append(summarize(f"startup.{name}", samples[name]))
+    for result in results:
+        print(f"{result['name']:<25} median {result['median_ms']:>9.1f} ms   p95 {result['p95_ms']:>9.1f} ms")
+
+    if args.top_imports:
+        _, stderr = run_child(args.timeout, import_time = True)
+        print("\nslowest imports:")
+        for module, milliseconds in slowest_imports(stderr, args.top_imports):
+            print(f"  {module:<40} {milliseconds:>9.1f} ms")
+
+    if args.output:
+        write_results(args.output, environment(iterations = args.iterations), results)
+
+
+if __name__ == "__main__":
+    main()
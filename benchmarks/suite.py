@@ -0,0 +1,163 @@
+"""
+Measures the hot paths of the application against a seeded database and writes the timings as JSON.
+
+Repository reads bypass the reference cache, so every iteration reaches PostgreSQL. The view
+benchmarks render the book and query tables under the offscreen Qt platform, so no display is needed.
+
+    python -m benchmarks.seed --scale 100k
+    python -m benchmarks.suite --scale 100k --output results/100k.json
+    python -m benchmarks.compare baseline.json results/100k.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import asdict
+from datetime import date
+from typing import Any, Callable, Dict, List
+
+from analytics import Analytics
+from benchmarks.harness import environment, measure, write_results
+from benchmarks.seed import SCALES, seed_database
+from cache import ReferenceCache
+from datagen import Volumes
+from model import Book
+from reporting import CirculationReports
+from repository import Repository
+
+# books written and deleted again by the bulk write benchmark
+BULK_SIZE = 1000
+
+# longest time a view benchmark waits for its rows before giving up
+VIEW_TIMEOUT_SECONDS = 60
+
+
+def repository_benchmarks(repository: Repository, iterations: int) -> List[Dict[str, Any]]:
+    book = repository.db.fetch_results("SELECT title FROM book ORDER BY book_id LIMIT 1;")
+    author = repository.db.fetch_results("SELECT author FROM book ORDER BY book_id LIMIT 1;")
+
+    cases: Dict[str, Callable[[], Any]] = {
+        "repository.fetchall_books": repository.fetchall_books,
+        "repository.fetch_books_page": lambda: repository.fetch_books_page(None, repository.page_size, "title"),
+        "repository.get_books_by_author_name": lambda: repository.get_books_by_author_name(author[0][0]),
+        "repository.search_books": lambda: repository.search_books("shadows"),
+        "repository.get_publishers": repository.get_publishers,
+        "repository.get_all_members": repository.get_all_members,
+        "repository.get_all_members_by_book": lambda: repository.get_all_members_by_book(book[0][0]),
+        "repository.get_members_with_loans": repository.get_members_with_loans,
+        "repository.get_overdue_loans": repository.get_overdue_loans,
+    }
+    reports = CirculationReports(repository.db)
+    analytics = Analytics(repository.db)
+    cases.update({
+        "reporting.most_borrowed_books": reports.most_borrowed_books,
+        "reporting.active_members": reports.active_members,
+        "reporting.daily_circulation": reports.daily_circulation,
+        "reporting.overdue_by_publisher": reports.overdue_by_publisher,
+        "analytics.books_per_decade": analytics.books_per_decade,
+        "analytics.loans_per_month": lambda: analytics.loans_per_month(date(2000, 1, 1)),
+        "analytics.loan_durations": analytics.loan_durations,
+    })
+    results = [
+        measure(name, fn, iterations = iterations, setup = repository.page_cache.clear)
+        for name, fn in cases.items()
+    ]
+    results.append(bulk_write_benchmark(repository, iterations))
+    return results
+
+
+def bulk_write_benchmark(repository: Repository, iterations: int) -> Dict[str, Any]:
+    """Adds BULK_SIZE books in one statement and deletes them again, leaving the data set as seeded."""
+    publisher_id = repository.get_publishers()[0].id
+    books = [
+        Book(None, f"Benchmark title {i}", "Benchmark author", publisher_id, None, 2024) for i in range(BULK_SIZE)
+    ]
+
+    def write() -> None:
+        stored = repository.add_books(books)
+        repository.delete_books([book.id for book in stored])
+
+    return measure(f"repository.add_and_delete_{BULK_SIZE}_books", write, iterations = iterations)
+
+
+def wait_for(app, condition: Callable[[], bool]) -> None:
+    deadline = time.monotonic() + VIEW_TIMEOUT_SECONDS
+    while not condition():
+        if time.monotonic() > deadline:
+            raise RuntimeError("Timed out waiting for the view to load.")
+        app.processEvents()
+        time.sleep(0.001)
+
+
+def view_benchmarks(repository: Repository, iterations: int) -> List[Dict[str, Any]]:
+    # set before Qt is imported; the views read LIVE_UPDATES when their controllers are created
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    os.environ["LIVE_UPDATES"] = "0"
+
+    from PyQt5.QtWidgets import QApplication
+
+    from view.book_view import BookTab
+    from view.query_view import QueryTab, member_result, MEMBER_RESULT_HEADERS
+
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    book_tab = BookTab()
+    book_tab.resize(1200, 800)
+    book_tab.show()
+
+    def refresh_books() -> None:
+        book_tab.refresh_book_table()
+        wait_for(app, lambda: book_tab.books_model.rowCount() > 0 and not book_tab.runner.is_busy())
+        book_tab.books_table.grab()
+
+    query_tab = QueryTab()
+    query_tab.resize(1200, 800)
+    query_tab.show()
+    members = repository.get_all_members()
+
+    def populate_members() -> None:
+        query_tab.populate_table(members, MEMBER_RESULT_HEADERS, member_result)
+        app.processEvents()
+        query_tab.result_table.grab()
+
+    results = [
+        measure(
+            "view.BookTab.refresh_book_table", refresh_books, iterations = iterations,
+            setup = book_tab.controller.repository.page_cache.clear
+        ),
+        measure(f"view.QueryTab.populate_table_{len(members)}_members", populate_members, iterations = iterations),
+    ]
+    book_tab.close()
+    query_tab.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices = SCALES, default = "10k")
+    parser.add_argument("--seed", type = int, default = 42)
+    parser.add_argument("--reseed", action = "store_true", help = "Reload the data set before measuring.")
+    parser.add_argument("--iterations", type = int, default = 5)
+    parser.add_argument("--skip-views", action = "store_true", help = "Do not measure the Qt views.")
+    parser.add_argument("--output", help = "Write the results to this JSON file instead of stdout.")
+    args = parser.parse_args()
+
+    # every read goes to the database: a cache with no TTLs never stores anything
+    repository = Repository(cache = ReferenceCache(ttls = {}))
+    if args.reseed:
+        seed_database(repository.db, SCALES[args.scale], args.seed)
+
+    results = repository_benchmarks(repository, args.iterations)
+    if not args.skip_views:
+        results.extend(view_benchmarks(repository, args.iterations))
+
+    meta = environment(scale = args.scale, seed = args.seed, sizes = asdict(Volumes.for_books(SCALES[args.scale])))
+    if args.output:
+        write_results(args.output, meta, results)
+    else:
+        print(json.dumps({"meta": meta, "results": results}, indent = 2))
+
+
+if __name__ == "__main__":
+    main()
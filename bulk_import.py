@@ -0,0 +1,289 @@
+"""
+Bulk import of books from CSV or JSON-lines files.
+
+Rows are validated against ``model.Book`` in batches and loaded with ``COPY FROM STDIN`` (or
+``execute_values`` as a fallback) inside a single transaction, so an import either lands completely
+or not at all. Invalid rows are skipped and reported with their line number.
+
+Usage:
+
+    python bulk_import.py books.csv --batch-size 10000 --errors rejected.csv
+    python bulk_import.py books.jsonl --method values
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, IO, Iterator, List, Optional, Set, Tuple
+
+from psycopg2.extras import execute_values
+
+from database import Database
+from model import Book
+from utils import logger
+
+BOOK_IMPORT_COLUMNS = ("title", "author", "publisher_id", "isbn", "year_published")
+COPY_BOOKS = f"COPY book ({', '.join(BOOK_IMPORT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+INSERT_BOOKS = f"INSERT INTO book ({', '.join(BOOK_IMPORT_COLUMNS)}) VALUES %s"
+
+# column widths from sql/tables.sql
+MAX_LENGTHS = {"title": 255, "author": 255, "isbn": 20}
+
+
+@dataclass
+class RowError:
+    line: int
+    reason: str
+    record: Dict[str, Any]
+
+
+@dataclass
+class ImportReport:
+    rows_read: int = 0
+    rows_imported: int = 0
+    seconds: float = 0.0
+    errors: List[RowError] = field(default_factory = list)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_imported / self.seconds if self.seconds else 0.0
+
+
+def read_records(stream: IO[str], fmt: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Lazily reads ``(line number, record)`` pairs from a CSV file with a header row or a JSON-lines file.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+    elif fmt == "jsonl":
+        for line_number, line in enumerate(stream, start = 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, {"__error__": f"Invalid JSON: {e}", "__raw__": line.rstrip("\n")}
+                continue
+            yield line_number, record if isinstance(record, dict) else {"__error__": "Not a JSON object"}
+    else:
+        raise ValueError(f"Unsupported import format '{fmt}'.")
+
+
+def _optional_int(record: Dict[str, Any], key: str) -> Optional[int]:
+    value = record.get(key)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be an integer, got {value!r}")
+
+
+def _text(record: Dict[str, Any], key: str, required: bool) -> Optional[str]:
+    value = record.get(key)
+    value = str(value).strip() if value is not None else ""
+    if not value:
+        if required:
+            raise ValueError(f"{key} is required")
+        return None
+    if len(value) > MAX_LENGTHS[key]:
+        raise ValueError(f"{key} is longer than {MAX_LENGTHS[key]} characters")
+    return value
+
+
+def validate_record(record: Dict[str, Any], publisher_ids: Set[int]) -> Book:
+    """
+    Converts a raw record into a Book, raising ValueError if it cannot be stored.
+
+    Args:
+        record (Dict[str, Any]): Column name to raw value.
+        publisher_ids (Set[int]): Existing publisher IDs, checked here so one bad foreign key cannot
+            abort the whole COPY.
+    """
+    if "__error__" in record:
+        raise ValueError(record["__error__"])
+
+    publisher_id = _optional_int(record, "publisher_id")
+    if publisher_id is not None and publisher_id not in publisher_ids:
+        raise ValueError(f"publisher_id {publisher_id} does not exist")
+
+    return Book(
+        id = 0,  # Placeholder for auto-generated ID
+        title = _text(record, "title", required = True),
+        author = _text(record, "author", required = True),
+        publisher_id = publisher_id,
+        isbn = _text(record, "isbn", required = False),
+        year_published = _optional_int(record, "year_published")
+    )
+
+
+class BookImporter:
+    """
+    Streams book records into the ``book`` table in one transaction.
+    """
+
+    def __init__(self, db: Database, batch_size: int = 5000, method: str = "copy", strict: bool = False) -> None:
+        """
+        Args:
+            db (Database): A connected database.
+            batch_size (int): Number of validated rows sent to the server per COPY/INSERT.
+            method (str): "copy" for COPY FROM STDIN, "values" for multi-row INSERT via execute_values.
+            strict (bool): Roll back the whole import if any row is invalid.
+        """
+        if method not in ("copy", "values"):
+            raise ValueError(f"Unknown import method '{method}'.")
+        self.db = db
+        self.batch_size = batch_size
+        self.method = method
+        self.strict = strict
+
+    def import_stream(self, stream: IO[str], fmt: str) -> ImportReport:
+        """
+        Imports every valid record of ``stream``.
+
+        Args:
+            stream (IO[str]): The input text stream.
+            fmt (str): "csv" or "jsonl".
+
+        Returns:
+            ImportReport: Counts, timing and the rejected rows.
+        """
+        report = ImportReport()
+        started = time.perf_counter()
+
+        def work(cursor) -> None:
+            cursor.execute("SELECT publisher_id FROM publisher;")
+            publisher_ids = {row[0] for row in cursor.fetchall()}
+
+            seen_isbns: Set[str] = set()
+            batch: List[Tuple[int, Dict[str, Any], Book]] = []
+
+            def reject(line: int, reason: str, record: Dict[str, Any]) -> None:
+                report.errors.append(RowError(line, reason, record))
+                if self.strict:
+                    raise RuntimeError(f"Invalid row at line {line}: {reason}")
+
+            def flush() -> None:
+                # isbn is unique, so a clash with a stored book would abort the whole COPY
+                isbns = [book.isbn for _, _, book in batch if book.isbn is not None]
+                cursor.execute("SELECT isbn FROM book WHERE isbn = ANY(%s);", (isbns,))
+                existing = {row[0] for row in cursor.fetchall()}
+                books = []
+                for line, record, book in batch:
+                    if book.isbn in existing:
+                        reject(line, f"isbn {book.isbn} already exists", record)
+                    else:
+                        books.append(book)
+                if books:
+                    self._write_batch(cursor, books)
+                    report.rows_imported += len(books)
+
+            for line, record in read_records(stream, fmt):
+                report.rows_read += 1
+                try:
+                    book = validate_record(record, publisher_ids)
+                except ValueError as e:
+                    reject(line, str(e), record)
+                    continue
+                if book.isbn is not None:
+                    if book.isbn in seen_isbns:
+                        reject(line, f"isbn {book.isbn} appears more than once", record)
+                        continue
+                    seen_isbns.add(book.isbn)
+                batch.append((line, record, book))
+                if len(batch) >= self.batch_size:
+                    flush()
+                    batch = []
+            if batch:
+                flush()
+
+        try:
+            self.db.run_in_transaction(work)
+        except Exception:
+            report.rows_imported = 0
+            raise
+        finally:
+            report.seconds = time.perf_counter() - started
+
+        logger.info(
+            f"Imported {report.rows_imported} of {report.rows_read} books in {report.seconds:.2f}s "
+            f"({report.rows_per_second:.0f} rows/s, {len(report.errors)} rejected)."
+        )
+        return report
+
+    def import_file(self, path: str, fmt: Optional[str] = None) -> ImportReport:
+        """Imports a CSV or JSON-lines file; the format defaults to the file extension."""
+        fmt = fmt or detect_format(path)
+        with open(path, newline = "", encoding = "utf-8") as stream:
+            return self.import_stream(stream, fmt)
+
+    def _write_batch(self, cursor, batch: List[Book]) -> None:
+        rows = [(book.title, book.author, book.publisher_id, book.isbn, book.year_published) for book in batch]
+        if self.method == "values":
+            execute_values(cursor, INSERT_BOOKS, rows, page_size = len(rows))
+            return
+
+        # in CSV COPY an unquoted empty field is NULL, which is how csv.writer renders None
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        cursor.copy_expert(COPY_BOOKS, buffer)
+
+
+def detect_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    return "csv"
+
+
+def write_error_report(path: str, errors: List[RowError]) -> None:
+    """Writes the rejected rows as CSV: line, reason, original record as JSON."""
+    with open(path, "w", newline = "", encoding = "utf-8") as stream:
+        writer = csv.writer(stream)
+        writer.writerow(["line", "reason", "record"])
+        for error in errors:
+            writer.writerow([error.line, error.reason, json.dumps(error.record, default = str)])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = "Bulk import books from CSV or JSON-lines.")
+    parser.add_argument("path", help = "input file; '-' reads standard input")
+    parser.add_argument("--format", choices = ("csv", "jsonl"), help = "defaults to the file extension")
+    parser.add_argument("--batch-size", type = int, default = 5000)
+    parser.add_argument("--method", choices = ("copy", "values"), default = "copy")
+    parser.add_argument("--strict", action = "store_true", help = "abort the import on the first invalid row")
+    parser.add_argument("--errors", help = "write rejected rows to this CSV file")
+    args = parser.parse_args()
+
+    db = Database()
+    db.connect()
+    importer = BookImporter(db, batch_size = args.batch_size, method = args.method, strict = args.strict)
+
+    if args.path == "-":
+        report = importer.import_stream(sys.stdin, args.format or "csv")
+    else:
+        report = importer.import_file(args.path, args.format)
+
+    if args.errors and report.errors:
+        write_error_report(args.errors, report.errors)
+    for error in report.errors[:20]:
+        print(f"line {error.line}: {error.reason}", file = sys.stderr)
+
+    print(json.dumps({
+        "rows_read": report.rows_read,
+        "rows_imported": report.rows_imported,
+        "rows_rejected": len(report.errors),
+        "seconds": round(report.seconds, 3),
+        "rows_per_second": round(report.rows_per_second),
+    }))
+
+
+if __name__ == "__main__":
+    main()
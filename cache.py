@@ -0,0 +1,242 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from model import Book, BookPage
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded mapping that evicts the least recently used entry when full.
+    """
+
+    def __init__(self, max_size: int = 128) -> None:
+        if max_size < 1:
+            raise ValueError(f"Invalid cache size: {max_size}.")
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: Hashable, value: Any) -> List[Hashable]:
+        """Stores ``value`` and returns the keys evicted to make room."""
+        evicted = []
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                evicted.append(self._entries.popitem(last = False)[0])
+        return evicted
+
+    def discard_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Removes every entry for which ``predicate(key, value)`` is true and returns how many."""
+        with self._lock:
+            stale = [key for key, value in self._entries.items() if predicate(key, value)]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def keys(self) -> List[Hashable]:
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def book_sort_value(book: Book, sort_key: str) -> Any:
+    """Returns the value the book listing is ordered by, matching the SQL sort expressions."""
+    if sort_key == "year_published":
+        return book.year_published or 0
+    return getattr(book, "id" if sort_key == "book_id" else sort_key)
+
+
+def book_keyset(book: Book, sort_key: str) -> Tuple:
+    """Returns the keyset cursor of a book: the sort value followed by the id as a tie-breaker."""
+    if sort_key == "book_id":
+        return (book.id,)
+    return book_sort_value(book, sort_key), book.id
+
+
+class BookPageCache:
+    """
+    LRU cache of keyset pages of the book listing.
+
+    Each page covers the half-open key range ``(after, last key]`` (or ``(after, +inf)`` for the last
+    page). Because keyset pages do not shift when rows are added or removed elsewhere, a write only
+    invalidates the pages that contain the written book or whose range its new key falls into.
+
+    Like ReferenceCache, every invalidation bumps a generation, and a page read before it is not stored
+    afterwards, since it may predate the write that caused the invalidation.
+    """
+
+    def __init__(self, max_size: int = 64) -> None:
+        self._pages = LRUCache(max_size)
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    @staticmethod
+    def key(sort_key: str, after: Optional[Tuple], page_size: int) -> Tuple:
+        return sort_key, after, page_size
+
+    def get(self, sort_key: str, after: Optional[Tuple], page_size: int) -> Optional[BookPage]:
+        return self._pages.get(self.key(sort_key, after, page_size))
+
+    @property
+    def generation(self) -> int:
+        """Read before querying a page and passed to ``put``."""
+        with self._lock:
+            return self._generation
+
+    def put(self, sort_key: str, after: Optional[Tuple], page_size: int, page: BookPage, generation: int) -> bool:
+        """Stores ``page`` unless the cache was invalidated since ``generation``, and returns whether it did."""
+        with self._lock:
+            if generation != self._generation:
+                return False
+            self._pages.put(self.key(sort_key, after, page_size), page)
+            return True
+
+    def invalidate_book(self, book_id: int, book: Optional[Book] = None) -> int:
+        """
+        Drops the pages affected by a write to ``book_id``.
+
+        Args:
+            book_id (int): ID of the inserted, updated or deleted book.
+            book (Optional[Book]): The book as stored after the write, or None for a delete.
+
+        Returns:
+            int: The number of pages dropped.
+        """
+        def affected(key: Tuple, page: BookPage) -> bool:
+            sort_key, after, _ = key
+            if any(cached.id == book_id for cached in page.books):
+                return True
+            if book is None:
+                return False
+            position = book_keyset(book, sort_key)
+            above_lower = after is None or position > after
+            below_upper = page.next_after is None or position <= page.next_after
+            return above_lower and below_upper
+
+        with self._lock:
+            self._generation += 1
+            return self._pages.discard_where(affected)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._pages.clear()
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+
+# seconds a cached read of each entity stays valid; 0 disables caching of that entity
+DEFAULT_TTLS = {"publisher": 300.0, "member": 60.0, "book": 30.0}
+
+
+class ReferenceCache:
+    """
+    Read-through cache for reference data such as publishers, members and book lookups.
+
+    Entries expire after a per-entity TTL and the whole cache is bounded by LRU eviction. Writes
+    invalidate a whole entity, and a read that started before the invalidation never stores its
+    (possibly stale) result afterwards. Hits, misses, evictions and expirations are counted per entity.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, max_size: int = 1024) -> None:
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self._entries = LRUCache(max_size)
+        self._lock = threading.Lock()
+        self._generations: Dict[str, int] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def get_or_load(self, entity: str, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Returns the cached value of ``key`` or calls ``loader`` and caches its result.
+
+        Args:
+            entity (str): The table the value is read from, which selects the TTL.
+            key (Hashable): Identifies the read within the entity, e.g. the query arguments.
+            loader (Callable): Reads the value from the database on a miss.
+        """
+        ttl = self.ttls.get(entity, 0)
+        if ttl <= 0:
+            return loader()
+
+        entry = self._entries.get((entity, key))
+        now = time.monotonic()
+        with self._lock:
+            if entry is not None and entry[0] > now:
+                self._count(entity, "hits")
+                return entry[1]
+            self._count(entity, "expirations" if entry is not None else "misses")
+            generation = self._generations.get(entity, 0)
+
+        value = loader()
+        with self._lock:
+            if self._generations.get(entity, 0) == generation:
+                for evicted_entity, _ in self._entries.put((entity, key), (time.monotonic() + ttl, value)):
+                    self._count(evicted_entity, "evictions")
+        return value
+
+    def invalidate(self, entity: str) -> int:
+        """Drops every cached read of ``entity`` and returns how many there were."""
+        with self._lock:
+            self._generations[entity] = self._generations.get(entity, 0) + 1
+            self._count(entity, "invalidations")
+        return self._entries.discard_where(lambda key, _: key[0] == entity)
+
+    def clear(self) -> None:
+        with self._lock:
+            for entity in set(self._generations) | set(self.ttls):
+                self._generations[entity] = self._generations.get(entity, 0) + 1
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Returns a copy of the counters of every entity, with the current number of entries."""
+        with self._lock:
+            stats = {entity: dict(counters) for entity, counters in self._stats.items()}
+        entries = self._entries.keys()
+        for entity in stats:
+            stats[entity]["entries"] = sum(1 for key in entries if key[0] == entity)
+        return stats
+
+    def _count(self, entity: str, counter: str, amount: int = 1) -> None:
+        counters = self._stats.setdefault(
+            entity, {"hits": 0, "misses": 0, "expirations": 0, "evictions": 0, "invalidations": 0}
+        )
+        counters[counter] += amount
+
+
+_reference_cache: Optional[ReferenceCache] = None
+_reference_cache_lock = threading.Lock()
+
+
+def get_reference_cache() -> ReferenceCache:
+    """
+    Returns the process-wide reference cache, so a write through one repository invalidates the reads
+    cached by every other. TTLs come from CACHE_TTL_<ENTITY> and the size from CACHE_MAX_ENTRIES.
+    """
+    global _reference_cache
+    with _reference_cache_lock:
+        if _reference_cache is None:
+            ttls = {
+                entity: float(os.getenv(f"CACHE_TTL_{entity.upper()}", str(ttl)))
+                for entity, ttl in DEFAULT_TTLS.items()
+            }
+            _reference_cache = ReferenceCache(ttls, int(os.getenv("CACHE_MAX_ENTRIES", "1024")))
+        return _reference_cache
@@ -1,9 +1,60 @@
-from typing import List
+import os
+from datetime import date
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 
-from model import Book
+from bulk_import import ImportReport
+from cache import get_reference_cache
+from database import pool_stats, statements
+from instrumentation import query_stats
+from events import ChangeEvent, ChangeKind, ChangeNotifier, TableChange
+from model import (
+    Book, BookBorrower, BookCirculation, BookPage, DailyCirculation, DecadeCount, DurationBucket, Loan, Member,
+    MemberActivity, MonthlyLoans, OverdueLoan, Publisher, PublisherOverdue, Staff
+)
+from reporting import CirculationReports, get_report_refresher
 from repository import Repository
 from utils import logger
 
+if TYPE_CHECKING:
+    from analytics import Analytics
+
+
+def to_optional_int(value) -> Optional[int]:
+    """Converts a form value to int, treating blank input as missing. Raises ValueError otherwise."""
+    if value is None or value == "":
+        return None
+    return int(value)
+
+
+def to_id(value, name: str) -> int:
+    """Converts a typed ID to int. Raises ValueError naming the field if it is not a whole number."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a whole number, not {value!r}.")
+
+
+def iter_id_pages(fetch_page: Callable[[int, int], Sequence[Any]], page_size: int) -> Iterator[List[Any]]:
+    """
+    Walks a listing ordered by ID one keyset page at a time. Each page is a separate query, so a
+    reader that stops scrolling holds no connection or snapshot.
+
+    Args:
+        fetch_page (Callable): Returns the rows after an ID, at most ``page_size`` of them.
+        page_size (int): Rows per page.
+
+    Yields:
+        List: Consecutive pages of rows, each row having an ``id``.
+    """
+    after_id = 0
+    while True:
+        page = list(fetch_page(after_id, page_size))
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        after_id = page[-1].id
+
 
 class BookController:
     """
@@ -13,6 +64,45 @@ class BookController:
     def __init__(self) -> None:
         """Initializes the BookController with a repository instance."""
         self.repository = Repository()
+        # listeners receive one ChangeEvent per book written through this controller or, with live
+        # updates on, committed by any other client
+        self.changes = ChangeNotifier()
+        if os.getenv("LIVE_UPDATES", "1") == "1":
+            self.repository.listen(self.on_remote_change)
+
+    def on_remote_change(self, change: TableChange) -> None:
+        """
+        Republishes a committed book change as ChangeEvents carrying the rows as now stored. Called on
+        the listener thread, for this client's own writes as well, so listeners must be idempotent.
+
+        Args:
+            change (TableChange): The change notified by the database.
+        """
+        if change.table != "book":
+            return
+        if change.kind is ChangeKind.RELOAD:
+            self.changes.publish(ChangeEvent("book", ChangeKind.RELOAD, None))
+            return
+        if not self.changes.has_listeners:
+            # nobody needs the rows, so spare the listener thread the query; without the new rows
+            # the affected pages cannot be told apart, so every cached page goes
+            self.repository.page_cache.clear()
+            return
+
+        try:
+            books = self.repository.refresh_books(change.row_ids)
+        except Exception as e:
+            logger.error(f"Failed to apply remote change to books {list(change.row_ids)}: {e}")
+            # the affected pages are unknown without the new rows, so none of them can be trusted
+            self.repository.page_cache.clear()
+            self.changes.publish(ChangeEvent("book", ChangeKind.RELOAD, None))
+            return
+
+        stored_by_id = {book.id: book for book in books}
+        for book_id in change.row_ids:
+            book = stored_by_id.get(book_id)
+            # a book missing by now was deleted after the change was sent
+            self.changes.publish(ChangeEvent("book", change.kind if book else ChangeKind.DELETE, book_id, book))
 
     def getall(self) -> List[Book]:
         """
@@ -27,7 +117,59 @@ class BookController:
             logger.error(f"Failed to fetch all books: {e}")
             return []
 
-    def add_book(self, title: str, author: str, publisher: int, isbn: str, year_published: int) -> None:
+    def get_books_page(
+            self,
+            after: Optional[Tuple] = None,
+            page_size: Optional[int] = None,
+            sort_key: str = "book_id"
+    ) -> BookPage:
+        """
+        Fetches one page of books ordered by the given sort key.
+
+        Args:
+            after (Optional[Tuple]): Cursor returned with the previous page, None for the first page.
+            page_size (Optional[int]): Maximum number of books in the page.
+            sort_key (str): Column to order by: book_id, title, author or year_published.
+
+        Returns:
+            BookPage: The books of the page and the cursor of the next one.
+        """
+        try:
+            return self.repository.fetch_books_page(after, page_size, sort_key)
+        except Exception as e:
+            logger.error(f"Failed to fetch books page after {after}: {e}")
+            raise RuntimeError("Failed to fetch books.")
+
+    def iter_book_pages(self, page_size: Optional[int] = None, sort_key: str = "book_id") -> "BookPageIterator":
+        """
+        Lazily walks the book listing page by page.
+
+        Args:
+            page_size (Optional[int]): Maximum number of books per page.
+            sort_key (str): Column to order by.
+
+        Returns:
+            BookPageIterator: An iterator over the books of each consecutive page.
+        """
+        return BookPageIterator(self, page_size, sort_key)
+
+    def stream_books(self, itersize: Optional[int] = None) -> Iterator[List[Book]]:
+        """
+        Streams all books from the repository in batches.
+
+        Args:
+            itersize (Optional[int]): Number of books per batch.
+
+        Yields:
+            List[Book]: Consecutive batches of Book objects.
+        """
+        try:
+            yield from self.repository.stream_books(itersize)
+        except Exception as e:
+            logger.error(f"Failed to stream books: {e}")
+            raise RuntimeError("Failed to stream books.")
+
+    def add_book(self, title: str, author: str, publisher: int, isbn: str, year_published: int) -> Book:
         """
         Adds a new book to the repository.
 
@@ -37,22 +179,112 @@ class BookController:
             publisher (int): The publisher ID.
             isbn (str): The ISBN of the book.
             year_published (int): The publication year of the book.
+
+        Returns:
+            Book: The stored book, including its generated ID.
         """
         book = Book(
             id = 0,  # Placeholder for auto-generated ID
             title = title,
             author = author,
-            publisher_id = publisher,
-            isbn = isbn,
-            year_published = year_published
+            publisher_id = to_optional_int(publisher),
+            isbn = isbn or None,
+            year_published = to_optional_int(year_published)
         )
         try:
-            self.repository.add_book(book = book)
+            stored = self.repository.add_book(book = book)
             logger.info(f"Book '{title}' added successfully.")
         except Exception as e:
             logger.error(f"Failed to add book '{title}': {e}")
             raise RuntimeError("Failed to add book.")
 
+        self.changes.publish(ChangeEvent("book", ChangeKind.INSERT, stored.id, stored))
+        return stored
+
+    def add_books(self, books: Sequence[Book]) -> List[Book]:
+        """
+        Adds several books in one transaction.
+
+        Args:
+            books (Sequence[Book]): The books to add.
+
+        Returns:
+            List[Book]: The stored books, including their generated IDs.
+        """
+        try:
+            stored = self.repository.add_books(books)
+        except Exception as e:
+            logger.error(f"Failed to add {len(books)} books: {e}")
+            raise RuntimeError("Failed to add books.")
+
+        for book in stored:
+            self.changes.publish(ChangeEvent("book", ChangeKind.INSERT, book.id, book))
+        return stored
+
+    def update_books(self, books: Sequence[Book]) -> List[Book]:
+        """
+        Updates several books in one transaction.
+
+        Args:
+            books (Sequence[Book]): The books with updated information.
+
+        Returns:
+            List[Book]: The stored books; books deleted in the meantime are missing.
+        """
+        try:
+            stored = self.repository.update_books(books)
+        except Exception as e:
+            logger.error(f"Failed to update {len(books)} books: {e}")
+            raise RuntimeError("Failed to update books.")
+
+        stored_by_id = {book.id: book for book in stored}
+        for book in books:
+            if book.id in stored_by_id:
+                self.changes.publish(ChangeEvent("book", ChangeKind.UPDATE, book.id, stored_by_id[book.id]))
+            else:
+                self.changes.publish(ChangeEvent("book", ChangeKind.DELETE, book.id))
+        return stored
+
+    def delete_by_ids(self, book_ids: Sequence[int]) -> List[int]:
+        """
+        Deletes several books in one transaction.
+
+        Args:
+            book_ids (Sequence[int]): The IDs of the books to delete.
+
+        Returns:
+            List[int]: The IDs that were deleted.
+        """
+        try:
+            deleted = self.repository.delete_books(book_ids)
+        except Exception as e:
+            logger.error(f"Failed to delete books {list(book_ids)}: {e}")
+            raise RuntimeError("Failed to delete books.")
+
+        for book_id in deleted:
+            self.changes.publish(ChangeEvent("book", ChangeKind.DELETE, book_id))
+        return deleted
+
+    def import_books(self, path: str, fmt: Optional[str] = None, batch_size: int = 5000) -> ImportReport:
+        """
+        Bulk-imports books from a CSV or JSON-lines file.
+
+        Args:
+            path (str): The input file.
+            fmt (Optional[str]): "csv" or "jsonl"; defaults to the file extension.
+            batch_size (int): Rows sent to the server per batch.
+
+        Returns:
+            ImportReport: Counts, timing and the rejected rows.
+        """
+        try:
+            report = self.repository.import_books(path, fmt, batch_size)
+        except Exception as e:
+            logger.error(f"Failed to import books from '{path}': {e}")
+            raise RuntimeError("Failed to import books.")
+        logger.info(f"Imported {report.rows_imported} books from '{path}'.")
+        return report
+
     def delete_by_id(self, book_id: int) -> None:
         """
         Deletes a book by its ID.
@@ -61,13 +293,16 @@ class BookController:
             book_id (int): The ID of the book to be deleted.
         """
         try:
-            self.repository.delete_book_by_id(book_id)
+            deleted = self.repository.delete_book_by_id(book_id)
             logger.info(f"Book with ID {book_id} deleted successfully.")
         except Exception as e:
             logger.error(f"Failed to delete book with ID {book_id}: {e}")
             raise RuntimeError("Failed to delete book.")
 
-    def update_book(self, bid: int, title: str, author: str, publisher_id: int, isbn: str, year: int) -> None:
+        if deleted:
+            self.changes.publish(ChangeEvent("book", ChangeKind.DELETE, book_id))
+
+    def update_book(self, bid: int, title: str, author: str, publisher_id: int, isbn: str, year: int) -> Optional[Book]:
         """
         Updates the details of a book in the repository.
 
@@ -78,22 +313,57 @@ class BookController:
             publisher_id (int): The updated publisher ID.
             isbn (str): The updated ISBN.
             year (int): The updated publication year.
+
+        Returns:
+            Optional[Book]: The stored book, or None if it no longer exists.
         """
         book = Book(
             id = bid,
             title = title,
             author = author,
-            publisher_id = publisher_id,
-            isbn = isbn,
-            year_published = year
+            publisher_id = to_optional_int(publisher_id),
+            isbn = isbn or None,
+            year_published = to_optional_int(year)
         )
         try:
-            self.repository.update_book(book)
+            stored = self.repository.update_book(book)
             logger.info(f"Book with ID {bid} updated successfully.")
         except Exception as e:
             logger.error(f"Failed to update book with ID {bid}: {e}")
             raise RuntimeError("Failed to update book.")
 
+        if stored is None:
+            # the book was deleted in the meantime
+            self.changes.publish(ChangeEvent("book", ChangeKind.DELETE, bid))
+        else:
+            self.changes.publish(ChangeEvent("book", ChangeKind.UPDATE, bid, stored))
+        return stored
+
+
+class BookPageIterator:
+    """
+    Iterator over consecutive keyset pages of books. Unlike a plain generator it knows, as soon as
+    the last page has been returned, that nothing is left to fetch.
+    """
+
+    def __init__(self, controller: BookController, page_size: Optional[int], sort_key: str) -> None:
+        self.controller = controller
+        self.page_size = page_size
+        self.sort_key = sort_key
+        self.after: Optional[Tuple] = None
+        self.has_more = True
+
+    def __iter__(self) -> "BookPageIterator":
+        return self
+
+    def __next__(self) -> List[Book]:
+        if not self.has_more:
+            raise StopIteration
+        page = self.controller.get_books_page(self.after, self.page_size, self.sort_key)
+        self.after = page.next_after
+        self.has_more = page.next_after is not None
+        return page.books
+
 
 class QueryController:
     """
@@ -103,6 +373,20 @@ class QueryController:
     def __init__(self) -> None:
         """Initializes the QueryController with a repository instance."""
         self.repository = Repository()
+        if os.getenv("LIVE_UPDATES", "1") == "1":
+            # keeps the cached reference data in step with edits made on other desks
+            self.repository.listen()
+        self.reports = CirculationReports(self.repository.db)
+        get_report_refresher(self.reports)
+        self._analytics: Optional["Analytics"] = None
+
+    @property
+    def analytics(self) -> "Analytics":
+        """The columnar analytics, created on first use: importing NumPy would add to every startup."""
+        if self._analytics is None:
+            from analytics import Analytics
+            self._analytics = Analytics(self.repository.db)
+        return self._analytics
 
     def get_book_by_author(self, author_name: str) -> List[Book]:
         """
@@ -120,6 +404,32 @@ class QueryController:
             logger.error(f"Failed to fetch books by author '{author_name}': {e}")
             return []
 
+    def search_books(self, query: str, limit: int = 50) -> List[Book]:
+        """
+        Searches books by title and author. Errors propagate so a search box can report them.
+
+        Args:
+            query (str): The text typed by the user.
+            limit (int): Maximum number of books returned.
+
+        Returns:
+            List[Book]: The matching books, best match first.
+        """
+        return self.repository.search_books(query, limit)
+
+    def search_members(self, query: str, limit: int = 50) -> List[Member]:
+        """
+        Searches members by name and email. Errors propagate so a search box can report them.
+
+        Args:
+            query (str): The text typed by the user.
+            limit (int): Maximum number of members returned.
+
+        Returns:
+            List[Member]: The matching members, best match first.
+        """
+        return self.repository.search_members(query, limit)
+
     def get_all_publishers(self) -> List:
         """
         Fetches all publishers from the repository.
@@ -146,7 +456,71 @@ class QueryController:
             logger.error(f"Failed to fetch members: {e}")
             return []
 
-    def get_all_member_by_book(self, book_name: str) -> List[tuple]:
+    def iter_publisher_pages(self, page_size: Optional[int] = None) -> Iterator[List[Publisher]]:
+        """
+        Lists all publishers page by page, for views that load more rows as the user scrolls.
+
+        Args:
+            page_size (Optional[int]): Publishers per page. Defaults to BOOK_PAGE_SIZE.
+
+        Yields:
+            List[Publisher]: Consecutive pages of publishers.
+        """
+        try:
+            yield from iter_id_pages(self.repository.get_publishers_page, page_size or self.repository.page_size)
+        except Exception as e:
+            logger.error(f"Failed to list publishers: {e}")
+            raise RuntimeError("Failed to list publishers.")
+
+    def iter_member_pages(self, page_size: Optional[int] = None) -> Iterator[List[Member]]:
+        """
+        Lists all members page by page, for views that load more rows as the user scrolls.
+
+        Args:
+            page_size (Optional[int]): Members per page. Defaults to BOOK_PAGE_SIZE.
+
+        Yields:
+            List[Member]: Consecutive pages of members.
+        """
+        try:
+            yield from iter_id_pages(self.repository.get_members_page, page_size or self.repository.page_size)
+        except Exception as e:
+            logger.error(f"Failed to list members: {e}")
+            raise RuntimeError("Failed to list members.")
+
+    def stream_publishers(self, itersize: Optional[int] = None) -> Iterator[List[Publisher]]:
+        """
+        Streams all publishers from the repository in batches.
+
+        Args:
+            itersize (Optional[int]): Number of publishers per batch.
+
+        Yields:
+            List[Publisher]: Consecutive batches of Publisher objects.
+        """
+        try:
+            yield from self.repository.stream_publishers(itersize)
+        except Exception as e:
+            logger.error(f"Failed to stream publishers: {e}")
+            raise RuntimeError("Failed to stream publishers.")
+
+    def stream_members(self, itersize: Optional[int] = None) -> Iterator[List[Member]]:
+        """
+        Streams all members from the repository in batches.
+
+        Args:
+            itersize (Optional[int]): Number of members per batch.
+
+        Yields:
+            List[Member]: Consecutive batches of Member objects.
+        """
+        try:
+            yield from self.repository.stream_members(itersize)
+        except Exception as e:
+            logger.error(f"Failed to stream members: {e}")
+            raise RuntimeError("Failed to stream members.")
+
+    def get_all_member_by_book(self, book_name: str) -> List[BookBorrower]:
         """
         Fetches all members who have borrowed the specified book.
 
@@ -154,23 +528,309 @@ class QueryController:
             book_name (str): The title of the book.
 
         Returns:
-            List[tuple]: A list of tuples containing member and loan information.
+            List[BookBorrower]: One entry per loan of the book, most recent first.
         """
-        try:
-            return self.repository.get_all_members_by_book(book_name)
-        except Exception as e:
-            logger.error(f"Failed to fetch members by book '{book_name}': {e}")
-            return []
+        return self.repository.get_all_members_by_book(book_name)
+
+    def get_members_with_loans(self) -> List[Member]:
+        """
+        Fetches the members who have borrowed at least one book.
+
+        Returns:
+            List[Member]: The members with at least one loan.
+        """
+        return self.repository.get_members_with_loans()
+
+    def get_overdue_loans(self, as_of: Optional[date] = None) -> List[OverdueLoan]:
+        """
+        Fetches the loans that are not returned and past their due date.
+
+        Args:
+            as_of (Optional[date]): The day to measure against. Defaults to today.
+
+        Returns:
+            List[OverdueLoan]: The overdue loans, longest overdue first.
+        """
+        return self.repository.get_overdue_loans(as_of)
+
+    def get_most_borrowed_books(self, limit: int = 50) -> List[BookCirculation]:
+        """
+        Fetches the books borrowed most often, from the circulation summaries.
+
+        Args:
+            limit (int): Maximum number of books returned.
+
+        Returns:
+            List[BookCirculation]: The books with their borrow counts, most borrowed first.
+        """
+        return self.reports.most_borrowed_books(limit)
+
+    def get_active_members(self, limit: int = 50) -> List[MemberActivity]:
+        """
+        Fetches the members with the most books out, from the circulation summaries.
+
+        Args:
+            limit (int): Maximum number of members returned.
+
+        Returns:
+            List[MemberActivity]: Members with open loans, most open loans first.
+        """
+        return self.reports.active_members(limit)
+
+    def get_daily_circulation(self, days: int = 30) -> List[DailyCirculation]:
+        """
+        Fetches the checkouts and returns of each recent day.
+
+        Args:
+            days (int): Number of days back from today.
+
+        Returns:
+            List[DailyCirculation]: One entry per day, most recent first.
+        """
+        return self.reports.daily_circulation(days)
+
+    def get_overdue_by_publisher(self) -> List[PublisherOverdue]:
+        """
+        Fetches the number of overdue loans per publisher as of the last scheduled refresh.
+
+        Returns:
+            List[PublisherOverdue]: Publishers with overdue loans, most first.
+        """
+        return self.reports.overdue_by_publisher()
 
-    def get_all_loans(self) -> List[tuple]:
+    def get_books_per_decade(self) -> List[DecadeCount]:
+        """
+        Counts the books by the decade they were published in.
+
+        Returns:
+            List[DecadeCount]: One entry per decade, oldest first.
+        """
+        return self.analytics.books_per_decade()
+
+    def get_loans_per_month(self, months: int = 24) -> List[MonthlyLoans]:
+        """
+        Counts the loans started in each recent month and how many came back late.
+
+        Args:
+            months (int): Number of months back from the current one.
+
+        Returns:
+            List[MonthlyLoans]: One entry per month, oldest first.
+        """
+        today = date.today()
+        first_month = today.year * 12 + today.month - 1 - months
+        return self.analytics.loans_per_month(date(first_month // 12, first_month % 12 + 1, 1))
+
+    def get_loan_durations(self) -> List[DurationBucket]:
+        """
+        Histogram of how long returned loans were kept.
+
+        Returns:
+            List[DurationBucket]: One entry per duration bucket, shortest first.
+        """
+        return self.analytics.loan_durations()
+
+    def get_all_loans(self) -> List[Loan]:
         """
         Fetches all loan records from the repository.
 
         Returns:
-            List[tuple]: A list of tuples containing loan information.
+            List[Loan]: A list of Loan objects.
         """
         try:
             return self.repository.get_all_loans()
         except Exception as e:
             logger.error(f"Failed to fetch loan records: {e}")
             return []
+
+    def get_all_staff(self) -> List[Staff]:
+        """
+        Fetches all staff members from the repository.
+
+        Returns:
+            List[Staff]: A list of Staff objects.
+        """
+        try:
+            return self.repository.get_all_staff()
+        except Exception as e:
+            logger.error(f"Failed to fetch staff: {e}")
+            return []
+
+
+class LoanController:
+    """
+    Controller for circulation: lending, returning and renewing books at the desk.
+    """
+
+    def __init__(self) -> None:
+        """Initializes the LoanController with a repository instance and the lending policy."""
+        self.repository = Repository()
+        self.loan_days = int(os.getenv("LOAN_DAYS", "21"))
+        self.max_renewals = int(os.getenv("MAX_RENEWALS", "2"))
+        # listeners receive a ChangeEvent per loan written through this controller or, with live
+        # updates on, a RELOAD whenever another client commits loan changes
+        self.changes = ChangeNotifier()
+        if os.getenv("LIVE_UPDATES", "1") == "1":
+            self.repository.listen(self.on_remote_change)
+
+    def on_remote_change(self, change: TableChange) -> None:
+        """Republishes committed loan changes; the open loans are few enough to simply reload."""
+        if change.table == "loan":
+            self.changes.publish(ChangeEvent("loan", ChangeKind.RELOAD, None))
+
+    def borrow(self, book_id, member_id, staff_id) -> Optional[Loan]:
+        """
+        Lends a book to a member for LOAN_DAYS days.
+
+        Args:
+            book_id: The ID of the book, as typed.
+            member_id: The ID of the member, as typed.
+            staff_id: The ID of the staff member at the desk.
+
+        Returns:
+            Optional[Loan]: The new loan, or None if the book is already on loan.
+        """
+        book_id = to_id(book_id, "Book ID")
+        member_id = to_id(member_id, "Member ID")
+        staff_id = to_id(staff_id, "Staff ID")
+        try:
+            loan = self.repository.borrow_book(book_id, member_id, staff_id, self.loan_days)
+        except Exception as e:
+            logger.error(f"Failed to lend book {book_id} to member {member_id}: {e}")
+            raise RuntimeError("Failed to borrow book.")
+        if loan is not None:
+            self.changes.publish(ChangeEvent("loan", ChangeKind.INSERT, loan.id, loan))
+        return loan
+
+    def return_book(self, book_id) -> Optional[Loan]:
+        """
+        Takes a book back.
+
+        Args:
+            book_id: The ID of the book, as typed.
+
+        Returns:
+            Optional[Loan]: The closed loan, or None if the book was not on loan.
+        """
+        book_id = to_id(book_id, "Book ID")
+        try:
+            loan = self.repository.return_book(book_id)
+        except Exception as e:
+            logger.error(f"Failed to return book {book_id}: {e}")
+            raise RuntimeError("Failed to return book.")
+        if loan is not None:
+            self.changes.publish(ChangeEvent("loan", ChangeKind.UPDATE, loan.id, loan))
+        return loan
+
+    def renew(self, book_id) -> Optional[Loan]:
+        """
+        Extends a loan by LOAN_DAYS days, at most MAX_RENEWALS times and only before it is overdue.
+
+        Args:
+            book_id: The ID of the book, as typed.
+
+        Returns:
+            Optional[Loan]: The renewed loan, or None if the loan cannot be renewed.
+        """
+        book_id = to_id(book_id, "Book ID")
+        try:
+            loan = self.repository.renew_loan(book_id, self.loan_days, self.max_renewals)
+        except Exception as e:
+            logger.error(f"Failed to renew the loan of book {book_id}: {e}")
+            raise RuntimeError("Failed to renew loan.")
+        if loan is not None:
+            self.changes.publish(ChangeEvent("loan", ChangeKind.UPDATE, loan.id, loan))
+        return loan
+
+    def get_open_loan(self, book_id) -> Optional[Loan]:
+        """
+        Fetches the open loan of a book.
+
+        Args:
+            book_id: The ID of the book, as typed.
+
+        Returns:
+            Optional[Loan]: The open loan, or None if the book is available.
+        """
+        book_id = to_id(book_id, "Book ID")
+        try:
+            return self.repository.get_open_loan(book_id)
+        except Exception as e:
+            logger.error(f"Failed to fetch the open loan of book {book_id}: {e}")
+            raise RuntimeError("Failed to fetch loan.")
+
+    def get_open_loans(self, member_id = None) -> List[Loan]:
+        """
+        Fetches the books currently on loan, soonest due first.
+
+        Args:
+            member_id: Only the loans of this member; blank lists every member's.
+
+        Returns:
+            List[Loan]: The open loans.
+        """
+        member_id = None if member_id is None or member_id == "" else to_id(member_id, "Member ID")
+        try:
+            return self.repository.get_open_loans(member_id)
+        except Exception as e:
+            logger.error(f"Failed to fetch open loans of member {member_id}: {e}")
+            raise RuntimeError("Failed to fetch open loans.")
+
+    def get_all_staff(self) -> List[Staff]:
+        """
+        Fetches the staff who can lend books.
+
+        Returns:
+            List[Staff]: A list of Staff objects.
+        """
+        try:
+            return self.repository.get_all_staff()
+        except Exception as e:
+            logger.error(f"Failed to fetch staff: {e}")
+            return []
+
+
+class DiagnosticsController:
+    """
+    Controller exposing the application's runtime statistics. Everything it reads is kept in memory
+    by this process, so it never touches the database.
+    """
+
+    def query_stats(self) -> List[Dict[str, Any]]:
+        """
+        Returns the latency percentiles, call and row counts of every statement call site.
+
+        Returns:
+            List[Dict[str, Any]]: One entry per repository method and query, slowest total first.
+        """
+        return query_stats.snapshot()
+
+    def statement_stats(self) -> List[Dict[str, Any]]:
+        """
+        Returns the execution counts and timings of the prepared repository statements.
+
+        Returns:
+            List[Dict[str, Any]]: One entry per statement, busiest first.
+        """
+        return statements.stats()
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Returns the hit, miss, eviction, expiration and invalidation counters of the reference cache.
+
+        Returns:
+            Dict[str, Dict[str, int]]: The counters of each cached entity.
+        """
+        return get_reference_cache().stats()
+
+    def pool_stats(self) -> Dict[str, int]:
+        """
+        Returns the occupancy of the connection pool.
+
+        Returns:
+            Dict[str, int]: Open, idle and in-use connections, empty before the pool is opened.
+        """
+        return pool_stats()
+
+    def reset_query_stats(self) -> None:
+        query_stats.reset()
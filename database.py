@@ -1,9 +1,509 @@
+import atexit
+import hashlib
+import json
 import os
-from typing import Any, List, Tuple, Optional
+import re
+import select
+import threading
+import time
+import uuid
+import weakref
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple, Optional, TypeVar, Union
 
 import psycopg2 as pg
+import psycopg2.errors
 from dotenv import load_dotenv
 from psycopg2 import OperationalError, Error
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INERROR, TRANSACTION_STATUS_UNKNOWN
+
+from events import ChangeKind, ChangeNotifier, TableChange
+from instrumentation import calling_method, get_slow_query_log, query_stats
+from utils import logger
+
+T = TypeVar("T")
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of PostgreSQL connections shared by every Database instance in the process.
+
+    Connections are opened lazily up to ``max_size``, health-checked when they are checked out and
+    replaced transparently when the server has dropped them.
+    """
+
+    def __init__(
+            self,
+            connect_kwargs: Dict[str, Any],
+            min_size: int = 1,
+            max_size: int = 10,
+            timeout: float = 5.0,
+            health_check_interval: float = 30.0
+    ) -> None:
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Invalid pool size: min={min_size}, max={max_size}.")
+
+        self.connect_kwargs = connect_kwargs
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+
+        # idle connections together with the monotonic time they were returned to the pool
+        self._idle: List[Tuple[pg.extensions.connection, float]] = []
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+        for _ in range(min_size):
+            self._idle.append((self._open(), time.monotonic()))
+            self._size += 1
+
+    def _open(self) -> pg.extensions.connection:
+        try:
+            return pg.connect(**self.connect_kwargs)
+        except OperationalError as e:
+            raise RuntimeError(f"Error connecting to the database: {e}")
+
+    def _is_healthy(self, connection: pg.extensions.connection, last_used: float) -> bool:
+        if connection.closed or connection.get_transaction_status() == TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1;")
+            connection.rollback()
+            return True
+        except Error:
+            return False
+
+    def getconn(self) -> pg.extensions.connection:
+        """
+        Checks a connection out of the pool, waiting up to ``timeout`` seconds for one to be returned
+        when all ``max_size`` connections are in use.
+        """
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed.")
+                if self._idle:
+                    connection, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    connection, last_used = None, 0.0
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RuntimeError(
+                        f"Timed out after {self.timeout}s waiting for a database connection "
+                        f"({self.max_size} in use)."
+                    )
+                self._condition.wait(remaining)
+
+        if connection is not None and self._is_healthy(connection, last_used):
+            return connection
+
+        # the slot is already counted in self._size, so a broken connection is replaced in place
+        if connection is not None:
+            logger.warning("Discarding broken database connection and reconnecting.")
+            self._close_quietly(connection)
+        try:
+            return self._open()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+    def putconn(self, connection: pg.extensions.connection, discard: bool = False) -> None:
+        """Returns a connection to the pool, rolling back any open transaction first."""
+        if not discard and not connection.closed and connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except Error:
+                discard = True
+
+        with self._condition:
+            if discard or connection.closed or self._closed:
+                self._size -= 1
+                self._close_quietly(connection)
+            else:
+                self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[pg.extensions.connection]:
+        """Borrows a connection for the duration of the ``with`` block."""
+        connection = self.getconn()
+        try:
+            yield connection
+        finally:
+            self.putconn(connection)
+
+    def closeall(self) -> None:
+        """Closes every idle connection; checked-out connections are closed as they are returned."""
+        with self._condition:
+            self._closed = True
+            for connection, _ in self._idle:
+                self._close_quietly(connection)
+            self._size -= len(self._idle)
+            self._idle.clear()
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the current pool occupancy."""
+        with self._condition:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "max_size": self.max_size,
+            }
+
+    @staticmethod
+    def _close_quietly(connection: pg.extensions.connection) -> None:
+        try:
+            connection.close()
+        except Error:
+            pass
+
+
+class CancelToken:
+    """
+    Cancels the statement a worker thread is running on behalf of a superseded request.
+
+    While a token is active on a thread (see ``cancel_scope``), every connection that thread uses is
+    attached to it, so ``cancel`` can interrupt the running statement from any other thread.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._connection: Optional[pg.extensions.connection] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def cancel(self) -> None:
+        # the lock is held across the cancel, so the worker cannot detach and hand the connection to
+        # another thread whose statement would be cancelled instead
+        with self._lock:
+            self._cancelled = True
+            connection = self._connection
+            if connection is not None and not connection.closed:
+                try:
+                    connection.cancel()
+                except Error:
+                    pass
+
+    def attach(self, connection: Optional[pg.extensions.connection]) -> None:
+        with self._lock:
+            if connection is not None and self._cancelled:
+                raise RuntimeError("Query cancelled.")
+            self._connection = connection
+
+
+_local = threading.local()
+
+
+@contextmanager
+def cancel_scope(token: CancelToken) -> Iterator[CancelToken]:
+    """Makes ``token`` able to cancel the statements run by the current thread inside the block."""
+    previous = getattr(_local, "cancel_token", None)
+    _local.cancel_token = token
+    try:
+        yield token
+    finally:
+        _local.cancel_token = previous
+
+
+@contextmanager
+def _cancellable(connection: pg.extensions.connection) -> Iterator[None]:
+    token: Optional[CancelToken] = getattr(_local, "cancel_token", None)
+    if token is None:
+        yield
+        return
+    token.attach(connection)
+    try:
+        yield
+    finally:
+        token.attach(None)
+
+
+ISOLATION_LEVELS = ("READ COMMITTED", "REPEATABLE READ", "SERIALIZABLE")
+
+
+class _TransactionState:
+    """The connection a thread has pinned for an open ``Database.transaction`` block."""
+
+    def __init__(self, connection: pg.extensions.connection) -> None:
+        self.connection = connection
+        self.savepoints = 0
+
+
+def _current_transaction() -> Optional[_TransactionState]:
+    return getattr(_local, "transaction", None)
+
+
+# %s, %(name)s and the escaped %% of a psycopg2 query
+_PLACEHOLDER = re.compile(r"%\((\w+)\)s|%s|%%")
+
+
+class PreparedStatement:
+    """A registered query, rewritten with $n placeholders, together with its execution statistics."""
+
+    def __init__(self, name: str, query: str) -> None:
+        self.name = name
+        self.query = query
+        # the psycopg2 parameter (position or name) bound to each $n
+        self.keys: List[Union[int, str]] = []
+        self.sql = _PLACEHOLDER.sub(self._placeholder, query).rstrip().rstrip(";")
+        self.executions = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def _placeholder(self, match: "re.Match") -> str:
+        if match.group(0) == "%%":
+            return "%"
+        key = match.group(1) if match.group(1) is not None else len(self.keys)
+        if key not in self.keys:
+            self.keys.append(key)
+        return f"${self.keys.index(key) + 1}"
+
+    def arguments(self, params: Any) -> List[Any]:
+        return [params[key] for key in self.keys] if self.keys else []
+
+
+class StatementRegistry:
+    """
+    Repository queries that are executed as server-side prepared statements.
+
+    A registered query is PREPAREd the first time it runs on a pooled connection and is executed by
+    name from then on, so PostgreSQL parses and plans it once per connection instead of once per call.
+    Which statements each connection has prepared is tracked per connection object, so a connection
+    the pool replaces after a disconnect re-prepares them transparently.
+    """
+
+    def __init__(self) -> None:
+        self._statements: Dict[str, PreparedStatement] = {}
+        self._prepared: "weakref.WeakKeyDictionary[pg.extensions.connection, set]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def register(self, *queries: str) -> None:
+        with self._lock:
+            for query in queries:
+                if query not in self._statements:
+                    name = f"lms_{hashlib.md5(query.encode('utf-8')).hexdigest()[:16]}"
+                    self._statements[query] = PreparedStatement(name, query)
+
+    def get(self, query: str) -> Optional[PreparedStatement]:
+        return self._statements.get(query)
+
+    def execute(self, cursor: pg.extensions.cursor, statement: PreparedStatement, params: Any) -> None:
+        connection = cursor.connection
+        with self._lock:
+            prepared = self._prepared.setdefault(connection, set())
+        if statement.name not in prepared:
+            cursor.execute(f"PREPARE {statement.name} AS {statement.sql};")
+            prepared.add(statement.name)
+
+        sql, arguments = self.execute_statement(statement, params)
+        started = time.perf_counter()
+        try:
+            cursor.execute(sql, arguments)
+        except pg.errors.InvalidSqlStatementName:
+            # the session lost its prepared statements (e.g. DISCARD ALL); prepare again next time
+            prepared.clear()
+            raise
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            statement.executions += 1
+            statement.total_seconds += elapsed
+            statement.max_seconds = max(statement.max_seconds, elapsed)
+
+    @staticmethod
+    def execute_statement(statement: PreparedStatement, params: Any) -> Tuple[str, List[Any]]:
+        """The EXECUTE command running ``statement`` with ``params``, and its arguments."""
+        arguments = statement.arguments(params)
+        placeholders = f" ({', '.join(['%s'] * len(arguments))})" if arguments else ""
+        return f"EXECUTE {statement.name}{placeholders};", arguments
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Returns the execution count and timings of every registered statement, busiest first."""
+        with self._lock:
+            stats = [
+                {
+                    "name": statement.name,
+                    "query": statement.query,
+                    "executions": statement.executions,
+                    "total_ms": statement.total_seconds * 1000,
+                    "mean_ms": statement.total_seconds * 1000 / statement.executions if statement.executions else 0.0,
+                    "max_ms": statement.max_seconds * 1000,
+                }
+                for statement in self._statements.values()
+            ]
+        return sorted(stats, key = lambda entry: entry["executions"], reverse = True)
+
+
+# process-wide, like the pool whose connections hold the prepared statements
+statements = StatementRegistry()
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(connect_kwargs: Dict[str, Any]) -> ConnectionPool:
+    """Returns the process-wide connection pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(
+                connect_kwargs,
+                min_size = int(os.getenv("POOL_MIN_SIZE", "1")),
+                max_size = int(os.getenv("POOL_MAX_SIZE", "10")),
+                timeout = float(os.getenv("POOL_TIMEOUT", "5")),
+                health_check_interval = float(os.getenv("POOL_HEALTH_CHECK_INTERVAL", "30"))
+            )
+            atexit.register(close_pool)
+        return _pool
+
+
+def pool_stats() -> Dict[str, int]:
+    """Returns the occupancy of the process-wide pool, or an empty dict if it is not open."""
+    with _pool_lock:
+        pool = _pool
+    return pool.stats() if pool is not None else {}
+
+
+def close_pool() -> None:
+    """Closes the process-wide connection pool, if it was ever opened."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+
+CHANGES_CHANNEL = "lms_changes"
+# tables whose triggers notify CHANGES_CHANNEL
+TRACKED_TABLES = ("book", "member", "loan", "publisher")
+
+
+class ChangeListener:
+    """
+    Receives the change notifications sent by the triggers of migration 0007 and publishes them as
+    ``events.TableChange`` to its subscribers.
+
+    It runs on a daemon thread with its own autocommit connection outside the pool, since a LISTEN
+    only lasts as long as the session. Subscribers are called on that thread. If the connection drops,
+    it reconnects with exponential backoff and publishes a RELOAD for every table, because
+    notifications sent while it was away are lost.
+    """
+
+    def __init__(
+            self,
+            connect_kwargs: Dict[str, Any],
+            channel: str = CHANGES_CHANNEL,
+            reconnect_delay: float = 1.0,
+            max_reconnect_delay: float = 30.0
+    ) -> None:
+        self.connect_kwargs = connect_kwargs
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.changes = ChangeNotifier()
+        self._stopping = threading.Event()
+        self._connected = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def connected(self) -> bool:
+        """Whether notifications are being received; while False, changes may go unnoticed."""
+        return self._connected.is_set()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target = self._run, name = "lms-change-listener", daemon = True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        delay = self.reconnect_delay
+        reconnecting = False
+        while not self._stopping.is_set():
+            try:
+                connection = pg.connect(**self.connect_kwargs)
+            except OperationalError as e:
+                logger.warning(f"Change listener cannot connect, retrying in {delay:.0f}s: {e}")
+                self._stopping.wait(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+
+            try:
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.channel};")
+                delay = self.reconnect_delay
+                if reconnecting:
+                    for table in TRACKED_TABLES:
+                        self.changes.publish(TableChange(table, ChangeKind.RELOAD))
+                logger.info(f"Listening for changes on '{self.channel}'.")
+                self._connected.set()
+                self._listen(connection)
+            except Error as e:
+                logger.warning(f"Change listener lost its connection: {e}")
+            finally:
+                self._connected.clear()
+                connection.close()
+            reconnecting = True
+
+    def _listen(self, connection: pg.extensions.connection) -> None:
+        while not self._stopping.is_set():
+            # wake up regularly to notice stop()
+            if select.select([connection], [], [], 1.0) == ([], [], []):
+                continue
+            connection.poll()
+            while connection.notifies:
+                self._dispatch(connection.notifies.pop(0).payload)
+
+    def _dispatch(self, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+            change = TableChange(message["table"], ChangeKind(message["op"]), tuple(message.get("ids") or ()))
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring malformed change notification {payload!r}: {e}")
+            return
+        self.changes.publish(change)
+
+
+_listener: Optional[ChangeListener] = None
+
+
+def get_change_listener(connect_kwargs: Dict[str, Any]) -> ChangeListener:
+    """Returns the process-wide change listener, started on first use."""
+    global _listener
+    with _pool_lock:
+        if _listener is None:
+            _listener = ChangeListener(connect_kwargs)
+            _listener.start()
+            atexit.register(_listener.stop)
+        return _listener
 
 
 class Database:
@@ -17,53 +517,247 @@ class Database:
         self.host = os.getenv("HOST")
         self.port = os.getenv("PORT")
 
-        self.connection: Optional[pg.extensions.connection] = None
+        self.pool: Optional[ConnectionPool] = None
 
     @staticmethod
     def load_configuration():
         load_dotenv("config.env")
 
+    def connection_kwargs(self) -> Dict[str, Any]:
+        return {
+            "dbname": self.dbname,
+            "user": self.user,
+            "password": self.password,
+            "host": self.host,
+            "port": self.port,
+        }
+
     def connect(self) -> None:
-        try:
-            self.connection = pg.connect(
-                dbname = self.dbname,
-                user = self.user,
-                password = self.password,
-                host = self.host,
-                port = self.port
-            )
-        except OperationalError as e:
-            raise RuntimeError(f"Error connecting to the database: {e}")
+        self.pool = get_pool(self.connection_kwargs())
 
     def close(self) -> None:
-        if self.connection:
+        # the pool is shared by every repository, so this only drops our reference to it
+        self.pool = None
+
+    def in_transaction(self) -> bool:
+        """True while the calling thread is inside a ``transaction`` block."""
+        return _current_transaction() is not None
+
+    @contextmanager
+    def transaction(self, isolation_level: Optional[str] = None, readonly: bool = False) -> Iterator[pg.extensions.connection]:
+        """
+        Groups every statement run by this thread inside the block into one unit of work with a
+        single commit. Any exception rolls the work back and the connection goes back to the pool
+        in a usable state.
+
+        Nested blocks become savepoints: an exception inside one rolls back only that block's
+        statements before propagating.
+
+        Args:
+            isolation_level (Optional[str]): READ COMMITTED, REPEATABLE READ or SERIALIZABLE.
+                Only valid on the outermost block.
+            readonly (bool): Start the outermost transaction as READ ONLY.
+        """
+        if isolation_level is not None and isolation_level.upper() not in ISOLATION_LEVELS:
+            raise ValueError(f"Unknown isolation level '{isolation_level}'.")
+
+        state = _current_transaction()
+        if state is not None:
+            if isolation_level is not None or readonly:
+                raise ValueError("Isolation level can only be set on the outermost transaction.")
+            with self._savepoint(state):
+                yield state.connection
+            return
+
+        if not self.pool:
+            raise RuntimeError("Connection is not established.")
+
+        with self.pool.connection() as connection, _cancellable(connection):
+            _local.transaction = _TransactionState(connection)
+            try:
+                if isolation_level is not None or readonly:
+                    characteristics = [f"ISOLATION LEVEL {(isolation_level or 'READ COMMITTED').upper()}"]
+                    if readonly:
+                        characteristics.append("READ ONLY")
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"SET TRANSACTION {', '.join(characteristics)};")
+                yield connection
+                if connection.get_transaction_status() == TRANSACTION_STATUS_INERROR:
+                    # a statement failed and its error was swallowed inside the block; commit() would
+                    # silently roll back every earlier write as well
+                    connection.rollback()
+                    raise RuntimeError("Transaction aborted by a failed statement; nothing was committed.")
+                connection.commit()
+            except Error as e:
+                raise RuntimeError(f"Error running transaction: {e}")
+            finally:
+                # the pool rolls back whatever was not committed when the connection is returned
+                _local.transaction = None
+
+    @contextmanager
+    def _savepoint(self, state: _TransactionState) -> Iterator[None]:
+        state.savepoints += 1
+        name = f"lms_savepoint_{state.savepoints}"
+        try:
+            with state.connection.cursor() as cursor:
+                cursor.execute(f"SAVEPOINT {name};")
+            yield
+        except BaseException:
+            if not state.connection.closed:
+                with state.connection.cursor() as cursor:
+                    cursor.execute(f"ROLLBACK TO SAVEPOINT {name};")
+            raise
+        else:
+            with state.connection.cursor() as cursor:
+                if state.connection.get_transaction_status() == TRANSACTION_STATUS_INERROR:
+                    cursor.execute(f"ROLLBACK TO SAVEPOINT {name};")
+                    raise RuntimeError("Savepoint aborted by a failed statement; its work was rolled back.")
+                cursor.execute(f"RELEASE SAVEPOINT {name};")
+
+    def _run(self, work: Callable[[pg.extensions.cursor], T], error_message: str, retry: bool = True) -> T:
+        """
+        Runs ``work`` on a pooled connection and commits. Unless ``retry`` is off, a connection the
+        server dropped before the statement could run is replaced and the statement retried once.
+
+        Inside a ``transaction`` block ``work`` runs on the pinned connection and is committed with
+        the rest of the block instead.
+        """
+        state = _current_transaction()
+        if state is not None:
             try:
-                self.connection.close()
+                with state.connection.cursor() as cursor:
+                    return work(cursor)
             except Error as e:
-                raise RuntimeError(f"Error closing the connection: {e}")
+                raise RuntimeError(f"{error_message}: {e}")
 
-    # commiting something iguess
-    def execute_query(self, query: str, params: Optional[Tuple[Any, ...]] = None) -> None:
-        if not self.connection:
+        if not self.pool:
             raise RuntimeError("Connection is not established.")
+
+        for attempt in (1, 2):
+            with self.pool.connection() as connection, _cancellable(connection):
+                committing = False
+                try:
+                    with connection.cursor() as cursor:
+                        result = work(cursor)
+                    committing = True
+                    connection.commit()
+                    return result
+                except Error as e:
+                    if retry and connection.closed and not committing and attempt == 1:
+                        logger.warning(f"Database connection lost, retrying on a new connection: {e}")
+                        continue
+                    raise RuntimeError(f"{error_message}: {e}")
+
+    @staticmethod
+    def _execute(cursor: pg.extensions.cursor, query: str, params: Optional[Any]) -> None:
+        statement = statements.get(query)
+        if statement is not None:
+            statements.execute(cursor, statement, params)
+        else:
+            cursor.execute(query, params)
+
+    def _timed(
+            self,
+            cursor: pg.extensions.cursor,
+            query: str,
+            params: Optional[Any],
+            fetch: bool
+    ) -> Optional[List[Tuple[Any, ...]]]:
+        """Runs ``query`` and records its duration and row count against the calling method."""
+        caller = calling_method()
+        started = time.perf_counter()
         try:
-            with self.connection.cursor() as cursor:
-                cursor.execute(query, params)
-                self.connection.commit()
-        except Error as e:
-            self.close()
-            raise RuntimeError(f"Error executing query: {e}")
+            self._execute(cursor, query, params)
+            rows = cursor.fetchall() if fetch else None
+        except Exception:
+            query_stats.record(caller, query, time.perf_counter() - started, 0, failed = True)
+            raise
+        elapsed = time.perf_counter() - started
+        query_stats.record(caller, query, elapsed, len(rows) if rows is not None else cursor.rowcount)
+
+        slow_queries = get_slow_query_log()
+        if slow_queries.is_slow(elapsed):
+            plan = self._explain(cursor, query, params) if slow_queries.should_explain(caller, query) else ""
+            logger.warning(f"Slow query in {caller} took {elapsed * 1000:.0f} ms: {query}{plan}")
+        return rows
+
+    @staticmethod
+    def _explain(cursor: pg.extensions.cursor, query: str, params: Optional[Any]) -> str:
+        # under a savepoint, so a failing EXPLAIN cannot abort the caller's transaction
+        with cursor.connection.cursor() as explain_cursor:
+            explain_cursor.execute("SAVEPOINT lms_explain;")
+            try:
+                statement = statements.get(query)
+                if statement is not None:
+                    sql, arguments = statements.execute_statement(statement, params)
+                    explain_cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {sql}", arguments)
+                else:
+                    explain_cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {query}", params)
+                plan = "\n".join(row[0] for row in explain_cursor.fetchall())
+                explain_cursor.execute("RELEASE SAVEPOINT lms_explain;")
+                return f"\n{plan}"
+            except Error as e:
+                explain_cursor.execute("ROLLBACK TO SAVEPOINT lms_explain;")
+                return f"\n(EXPLAIN ANALYZE failed: {e})"
+
+    def execute_query(self, query: str, params: Optional[Any] = None) -> None:
+        self._run(lambda cursor: self._timed(cursor, query, params, fetch = False), "Error executing query")
+
+    def fetch_results(self, query: str, params: Optional[Any] = None) -> List[Tuple[Any, ...]]:
+        return self._run(lambda cursor: self._timed(cursor, query, params, fetch = True), "Error fetching results")
 
-    # actualy query or scan????
-    def fetch_results(self, query: str, params: Optional[Tuple[Any, ...]] = None) -> List[Tuple[Any, ...]]:
-        if not self.connection:
+    def run_in_transaction(self, work: Callable[[pg.extensions.cursor], T]) -> T:
+        """
+        Runs ``work`` with a cursor inside ``transaction``, so everything it does is committed once at
+        the end or not at all. ``work`` is never retried, so it may consume its input.
+        """
+        with self.transaction():
+            return self._run(work, "Error running transaction", retry = False)
+
+    def stream_results(
+            self,
+            query: str,
+            params: Optional[Tuple[Any, ...]] = None,
+            itersize: Optional[int] = None
+    ) -> Iterator[List[Tuple[Any, ...]]]:
+        """
+        Runs ``query`` on a server-side cursor and yields the rows in batches of ``itersize``, so only
+        one batch is held in memory at a time. The connection stays checked out until the generator
+        is exhausted or closed.
+        """
+        itersize = itersize or int(os.getenv("STREAM_ITERSIZE", "2000"))
+
+        state = _current_transaction()
+        if state is not None:
+            yield from self._stream(state.connection, query, params, itersize)
+            return
+
+        if not self.pool:
             raise RuntimeError("Connection is not established.")
+        # the stream borrows its own connection rather than pinning a transaction to this thread, since
+        # the generator stays suspended between batches while the thread runs other statements
+        with self.pool.connection() as connection, _cancellable(connection):
+            yield from self._stream(connection, query, params, itersize)
+            try:
+                connection.commit()
+            except Error as e:
+                raise RuntimeError(f"Error streaming results: {e}")
+
+    @staticmethod
+    def _stream(
+            connection: pg.extensions.connection,
+            query: str,
+            params: Optional[Tuple[Any, ...]],
+            itersize: int
+    ) -> Iterator[List[Tuple[Any, ...]]]:
         try:
-            with self.connection.cursor() as cursor:
+            with connection.cursor(name = f"lms_stream_{uuid.uuid4().hex}") as cursor:
+                cursor.itersize = itersize
                 cursor.execute(query, params)
-                results = cursor.fetchall()
-                return results
+                while True:
+                    rows = cursor.fetchmany(itersize)
+                    if not rows:
+                        break
+                    yield rows
         except Error as e:
-            self.close()
-            raise RuntimeError(f"Error fetching results: {e}")
-
+            raise RuntimeError(f"Error streaming results: {e}")
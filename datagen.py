@@ -0,0 +1,326 @@
+"""
+Synthetic library data at realistic scale, for load testing and benchmarks.
+
+The generated data follows the skew of a real library rather than uniform noise:
+
+- a few authors and publishers account for most of the catalogue (Zipf);
+- a few titles account for most of the loans (Zipf over a shuffled popularity rank);
+- a few members borrow most books and many hardly any (Pareto);
+- most loans come back before their due date, some come back late and a small share are never
+  returned, which makes up the overdue tail.
+
+Every table is emptied and loaded with ``COPY FROM STDIN`` in one transaction. The same volumes and
+seed always produce the same rows, relative to the ``today`` they were generated for.
+
+Usage:
+
+    python datagen.py --books 100000 --seed 42
+    python datagen.py --books 1000000 --members 250000 --loans 3000000
+"""
+import argparse
+import bisect
+import csv
+import io
+import itertools
+import json
+import random
+import time
+from dataclasses import asdict, dataclass, replace
+from datetime import date, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from database import Database
+from utils import logger
+
+TRUNCATE_ALL = "TRUNCATE loan, book, member, staff, publisher RESTART IDENTITY CASCADE;"
+
+# rows buffered in memory per COPY call
+COPY_BATCH_SIZE = 50_000
+
+# lending policy and how readers actually behave
+LOAN_DAYS = 21
+HISTORY_DAYS = 730
+ON_TIME_SHARE = 0.85
+NEVER_RETURNED_SHARE = 0.01
+MEAN_DAYS_LATE = 7.0
+# tries to place a loan on a free copy before giving up on it
+MAX_LOAN_ATTEMPTS = 20
+
+# skew of the distributions; higher means more concentrated
+TITLE_POPULARITY_EXPONENT = 0.8
+AUTHOR_EXPONENT = 0.9
+PUBLISHER_EXPONENT = 1.2
+BORROWER_PARETO_ALPHA = 1.6
+# the busiest reader borrows this many times as often as a light one
+MAX_BORROWER_ACTIVITY = 40.0
+
+FIRST_NAMES = (
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+    "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen",
+    "Amir", "Sofia", "Mateo", "Aisha", "Wei", "Yuki", "Olga", "Kwame", "Priya", "Lars",
+)
+LAST_NAMES = (
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+    "Hernandez", "Lopez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin", "Lee",
+    "Nguyen", "Kim", "Patel", "Chen", "Novak", "Okafor", "Ivanova", "Schmidt", "Rossi", "Tanaka",
+)
+TITLE_ADJECTIVES = (
+    "Silent", "Forgotten", "Crimson", "Hidden", "Last", "Broken", "Golden", "Distant", "Endless", "Secret",
+    "Little", "Burning", "Winter", "Lost", "Wild", "Quiet", "Shattered", "Northern", "Bright", "Midnight",
+)
+TITLE_NOUNS = (
+    "Garden", "River", "Kingdom", "Letters", "Voyage", "Shadows", "House", "Empire", "Promise", "Storm",
+    "Island", "Orchard", "Mirror", "Harbor", "Road", "Symphony", "Forest", "Machine", "Daughter", "Sky",
+)
+PUBLISHER_WORDS = (
+    "Harbor", "Lantern", "Meridian", "Oak", "Quill", "Beacon", "Summit", "Willow", "Atlas", "Heron",
+)
+STAFF_ROLES = ("Librarian",) * 6 + ("Assistant",) * 3 + ("Manager",)
+
+
+@dataclass
+class Volumes:
+    """Number of rows generated per table."""
+    publishers: int
+    books: int
+    members: int
+    staff: int
+    loans: int
+
+    @classmethod
+    def for_books(cls, books: int) -> "Volumes":
+        """Volumes of a library holding ``books`` titles: one member per five books, ten loans per member."""
+        return cls(
+            publishers = max(10, books // 1000),
+            books = books,
+            members = max(10, books // 5),
+            staff = max(5, books // 5000),
+            loans = books * 2,
+        )
+
+
+def zipf_weights(count: int, exponent: float) -> List[float]:
+    """Cumulative weights of ranks 1..count under a Zipf distribution, for ``random.choices``."""
+    return list(itertools.accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+def isbn13(sequence: int) -> str:
+    """A valid ISBN-13 in the 978 prefix, unique per ``sequence``."""
+    digits = f"978{sequence:09d}"
+    total = sum(int(digit) * (1 if position % 2 == 0 else 3) for position, digit in enumerate(digits))
+    return digits + str((10 - total % 10) % 10)
+
+
+def copy_rows(cursor, table: str, columns: Sequence[str], rows: Iterable[Sequence]) -> int:
+    """
+    Streams rows into ``table`` with COPY, COPY_BATCH_SIZE rows at a time.
+
+    Returns:
+        int: The number of rows copied.
+    """
+    statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    pending = copied = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending == COPY_BATCH_SIZE:
+            buffer.seek(0)
+            cursor.copy_expert(statement, buffer)
+            buffer.seek(0)
+            buffer.truncate()
+            copied += pending
+            pending = 0
+    if pending:
+        buffer.seek(0)
+        cursor.copy_expert(statement, buffer)
+        copied += pending
+    return copied
+
+
+class LibraryGenerator:
+    """
+    Generates the rows of every table. Rows are produced lazily, but the tables must be generated in
+    order (publishers, books, members, staff, loans) so that a seed always gives the same data.
+    """
+
+    def __init__(self, volumes: Volumes, seed: int = 42, today: Optional[date] = None) -> None:
+        self.volumes = volumes
+        self.rng = random.Random(seed)
+        self.today = today or date.today()
+        self.membership_dates: List[date] = []
+        # loans dropped because every attempt collided with another loan of the copy
+        self.skipped_loans = 0
+
+    def publishers(self) -> Iterator[Sequence]:
+        rng = self.rng
+        for i in range(1, self.volumes.publishers + 1):
+            name = f"{rng.choice(PUBLISHER_WORDS)} {rng.choice(('Press', 'Books', 'House', 'Publishing'))} {i}"
+            yield name, f"{rng.randint(1, 999)} {rng.choice(LAST_NAMES)} Street", f"555-{i:07d}", \
+                f"contact{i}@publisher.example"
+
+    def books(self) -> Iterator[Sequence]:
+        rng, volumes = self.rng, self.volumes
+        authors = [
+            f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(max(1, volumes.books // 8))
+        ]
+        author_picks = rng.choices(authors, cum_weights = zipf_weights(len(authors), AUTHOR_EXPONENT), k = volumes.books)
+        publisher_picks = rng.choices(
+            range(1, volumes.publishers + 1),
+            cum_weights = zipf_weights(volumes.publishers, PUBLISHER_EXPONENT),
+            k = volumes.books
+        )
+        for i in range(volumes.books):
+            title = f"The {rng.choice(TITLE_ADJECTIVES)} {rng.choice(TITLE_NOUNS)}"
+            if rng.random() < 0.3:
+                title += f" of {rng.choice(TITLE_NOUNS)}"
+            # most of the collection is recent, with a long tail of classics
+            year = max(1800, self.today.year - int(rng.expovariate(1 / 15)))
+            yield title, author_picks[i], publisher_picks[i], isbn13(i + 1), year
+
+    def members(self) -> Iterator[Sequence]:
+        rng = self.rng
+        for i in range(1, self.volumes.members + 1):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            joined = self.today - timedelta(days = rng.randrange(3650))
+            self.membership_dates.append(joined)
+            yield first, last, f"{first}.{last}{i}@example.com".lower(), f"555-{i:07d}", \
+                f"{rng.randint(1, 9999)} {rng.choice(TITLE_NOUNS)} Road", joined
+
+    def staff(self) -> Iterator[Sequence]:
+        rng = self.rng
+        for i in range(1, self.volumes.staff + 1):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            yield first, last, f"{first}.{last}{i}@library.example".lower(), None, rng.choice(STAFF_ROLES)
+
+    def loans(self) -> Iterator[Sequence]:
+        """Loans over the last HISTORY_DAYS; requires members() to have been generated first."""
+        rng, volumes, today = self.rng, self.volumes, self.today
+
+        # popularity ranks are shuffled so the bestsellers are spread over the catalogue
+        ranked_books = list(range(1, volumes.books + 1))
+        rng.shuffle(ranked_books)
+        popularity = zipf_weights(volumes.books, TITLE_POPULARITY_EXPONENT)
+        book_picks = rng.choices(ranked_books, cum_weights = popularity, k = volumes.loans)
+        activity = list(itertools.accumulate(
+            min(rng.paretovariate(BORROWER_PARETO_ALPHA), MAX_BORROWER_ACTIVITY) for _ in range(volumes.members)
+        ))
+        member_picks = rng.choices(range(1, volumes.members + 1), cum_weights = activity, k = volumes.loans)
+
+        # the loans of each copy so far, as (borrowed, returned) with date.max while still out
+        loan_periods: Dict[int, List[Tuple[date, date]]] = {}
+
+        def is_free(book_id: int, start: date, end: date) -> bool:
+            # a copy returned in the morning can go out again the same day
+            return all(end <= other_start or start >= other_end for other_start, other_end in loan_periods.get(book_id, ()))
+
+        for i in range(volumes.loans):
+            book_id, member_id = book_picks[i], member_picks[i]
+            joined = self.membership_dates[member_id - 1]
+            earliest = max(joined, today - timedelta(days = HISTORY_DAYS))
+
+            # a copy can only be out on one loan at a time: while the pick is out on those dates, pick
+            # another title by popularity, then any title, as a borrower finding the bestseller gone
+            # would; the dates stay as drawn so loan durations are not biased towards short ones
+            borrowed, due, returned = self._loan_dates(earliest)
+            for attempt in range(MAX_LOAN_ATTEMPTS):
+                if is_free(book_id, borrowed, returned or date.max):
+                    break
+                if attempt < MAX_LOAN_ATTEMPTS // 2:
+                    book_id = ranked_books[bisect.bisect(popularity, rng.random() * popularity[-1])]
+                else:
+                    book_id = rng.randint(1, volumes.books)
+            else:
+                self.skipped_loans += 1
+                continue
+
+            loan_periods.setdefault(book_id, []).append((borrowed, returned or date.max))
+            yield book_id, member_id, rng.randint(1, volumes.staff), borrowed, due, returned
+
+        if self.skipped_loans:
+            logger.warning(f"Skipped {self.skipped_loans} loans that found no free copy.")
+
+    def _loan_dates(self, earliest: date) -> Tuple[date, date, Optional[date]]:
+        """Borrow, due and return dates of a loan starting on or after ``earliest``; None if still out."""
+        rng, today = self.rng, self.today
+        borrowed = earliest + timedelta(days = rng.randrange((today - earliest).days + 1))
+        due = borrowed + timedelta(days = LOAN_DAYS)
+
+        draw = rng.random()
+        if draw < NEVER_RETURNED_SHARE:
+            returned = None
+        elif draw < NEVER_RETURNED_SHARE + ON_TIME_SHARE:
+            returned = borrowed + timedelta(days = rng.randint(1, LOAN_DAYS))
+        else:
+            returned = due + timedelta(days = 1 + int(rng.expovariate(1 / MEAN_DAYS_LATE)))
+        if returned is not None and returned > today:
+            returned = None
+        return borrowed, due, returned
+
+
+def generate(db: Database, volumes: Volumes, seed: int = 42, today: Optional[date] = None) -> Volumes:
+    """
+    Replaces the contents of every table with generated rows in one transaction, then analyzes them.
+
+    Args:
+        db (Database): A connected database.
+        volumes (Volumes): Rows to generate per table.
+        seed (int): Random seed; the same seed and volumes give the same data.
+        today (Optional[date]): Date the loan history ends on. Defaults to the current date, so
+            open loans are overdue by the same amounts whenever the data is generated.
+
+    Returns:
+        Volumes: The volumes loaded.
+    """
+    generator = LibraryGenerator(volumes, seed, today)
+
+    def work(cursor) -> None:
+        cursor.execute(TRUNCATE_ALL)
+        copy_rows(cursor, "publisher", ("name", "address", "phone", "email"), generator.publishers())
+        copy_rows(cursor, "book", ("title", "author", "publisher_id", "isbn", "year_published"), generator.books())
+        copy_rows(
+            cursor, "member", ("first_name", "last_name", "email", "phone", "address", "date_of_membership"),
+            generator.members()
+        )
+        copy_rows(cursor, "staff", ("first_name", "last_name", "email", "phone", "role"), generator.staff())
+        copy_rows(
+            cursor, "loan", ("book_id", "member_id", "staff_id", "date_borrowed", "due_date", "date_returned"),
+            generator.loans()
+        )
+        cursor.execute("ANALYZE publisher, book, member, staff, loan;")
+
+    started = time.perf_counter()
+    try:
+        db.run_in_transaction(work)
+    except Exception as e:
+        logger.error(f"Failed to generate library data: {e}")
+        raise RuntimeError("Failed to generate library data.")
+    loaded = replace(volumes, loans = volumes.loans - generator.skipped_loans)
+    logger.info(f"Generated {asdict(loaded)} in {time.perf_counter() - started:.1f}s.")
+    return loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type = int, default = 10_000)
+    parser.add_argument("--publishers", type = int, help = "defaults to one per 1000 books")
+    parser.add_argument("--members", type = int, help = "defaults to one per five books")
+    parser.add_argument("--staff", type = int, help = "defaults to one per 5000 books")
+    parser.add_argument("--loans", type = int, help = "defaults to two per book")
+    parser.add_argument("--seed", type = int, default = 42)
+    parser.add_argument("--today", type = date.fromisoformat, help = "last day of the loan history, YYYY-MM-DD")
+    args = parser.parse_args()
+
+    volumes = Volumes.for_books(args.books)
+    for table in ("publishers", "members", "staff", "loans"):
+        if getattr(args, table) is not None:
+            setattr(volumes, table, getattr(args, table))
+
+    db = Database()
+    db.connect()
+    print(json.dumps(asdict(generate(db, volumes, args.seed, args.today))))
+
+
+if __name__ == "__main__":
+    main()
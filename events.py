@@ -0,0 +1,70 @@
+import threading
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, List, Optional, Tuple
+
+from utils import logger
+
+
+class ChangeKind(Enum):
+    INSERT = "INSERT"
+    UPDATE = "UPDATE"
+    DELETE = "DELETE"
+    # the table changed in too many places to list, e.g. after a bulk import: reload it
+    RELOAD = "RELOAD"
+
+
+@dataclass
+class ChangeEvent:
+    table: str
+    kind: ChangeKind
+    # None for RELOAD
+    row_id: Optional[int]
+    # the row as stored after the change, None for deletes
+    row: Optional[Any] = None
+
+
+@dataclass
+class TableChange:
+    """A committed change received from the database: one statement's worth of changed rows."""
+    table: str
+    kind: ChangeKind
+    # empty for RELOAD
+    row_ids: Tuple[int, ...] = ()
+
+
+Listener = Callable[[Any], None]
+
+
+class ChangeNotifier:
+    """
+    Minimal publish/subscribe hub for row-level change events (ChangeEvent or TableChange).
+    """
+
+    def __init__(self) -> None:
+        self._listeners: List[Listener] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, listener: Listener) -> None:
+        with self._lock:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Listener) -> None:
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    @property
+    def has_listeners(self) -> bool:
+        with self._lock:
+            return bool(self._listeners)
+
+    def publish(self, event: ChangeEvent) -> None:
+        """Delivers the event to every listener; a failing listener does not stop the others."""
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logger.error(f"Change listener failed on {event}: {e}")
@@ -0,0 +1,148 @@
+"""
+Timing of every statement sent through ``Database.execute_query`` and ``fetch_results``.
+
+Each call is attributed to the repository method that issued it and aggregated into a latency
+histogram, so p50/p95/p99 are available at any time without keeping every sample. Calls slower than
+SLOW_QUERY_MS are logged together with their ``EXPLAIN ANALYZE`` plan.
+"""
+import bisect
+import math
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# bucket upper bounds in seconds: 50 microseconds to about 80 seconds, 25% apart
+BUCKET_BOUNDS = tuple(0.00005 * 1.25 ** i for i in range(65))
+
+# modules that only relay a call; the caller is the first public function outside them
+_RELAY_MODULES = {__name__, "database", "cache", "contextlib", "threading"}
+
+
+class LatencyHistogram:
+    """Counts of call durations in exponentially growing buckets."""
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.calls = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.calls += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of calls; accurate to within 25%."""
+        if not self.calls:
+            return 0.0
+        rank = max(1, math.ceil(fraction * self.calls))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                bound = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.max_seconds
+                return min(bound, self.max_seconds)
+        return self.max_seconds
+
+
+class QueryStats:
+    """
+    Thread-safe per-call-site statistics: calls, rows, errors and a latency histogram for every
+    ``(caller, query)`` pair.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, caller: str, query: str, seconds: float, rows: int, failed: bool = False) -> None:
+        with self._lock:
+            entry = self._entries.get((caller, query))
+            if entry is None:
+                entry = self._entries[(caller, query)] = {"histogram": LatencyHistogram(), "rows": 0, "errors": 0}
+            entry["histogram"].record(seconds)
+            entry["rows"] += max(rows, 0)
+            entry["errors"] += failed
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Returns one summary per call site, slowest total time first. Times are in milliseconds."""
+        with self._lock:
+            summaries = []
+            for (caller, query), entry in self._entries.items():
+                histogram: LatencyHistogram = entry["histogram"]
+                summaries.append({
+                    "caller": caller,
+                    "query": query,
+                    "calls": histogram.calls,
+                    "rows": entry["rows"],
+                    "errors": entry["errors"],
+                    "total_ms": histogram.total_seconds * 1000,
+                    "p50_ms": histogram.percentile(0.50) * 1000,
+                    "p95_ms": histogram.percentile(0.95) * 1000,
+                    "p99_ms": histogram.percentile(0.99) * 1000,
+                    "max_ms": histogram.max_seconds * 1000,
+                })
+        return sorted(summaries, key = lambda summary: summary["total_ms"], reverse = True)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+query_stats = QueryStats()
+
+
+def calling_method() -> str:
+    """Names the function that issued the current statement, e.g. ``repository.get_publishers``."""
+    frame = sys._getframe(1)
+    # lambdas and private helpers such as Repository._read_through stand in for their caller
+    while frame is not None and (
+            frame.f_globals.get("__name__") in _RELAY_MODULES or frame.f_code.co_name.startswith(("<", "_"))
+    ):
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+    return f"{frame.f_globals.get('__name__')}.{frame.f_code.co_name}"
+
+
+class SlowQueryLog:
+    """
+    Decides which slow statements get an EXPLAIN ANALYZE. Only SELECTs are explained, because
+    ANALYZE runs the statement again, and each call site at most once per ``interval`` seconds.
+    """
+
+    def __init__(self, threshold_ms: Optional[float] = None, interval: float = 60.0) -> None:
+        if threshold_ms is None:
+            threshold_ms = float(os.getenv("SLOW_QUERY_MS", "500"))
+        self.threshold = threshold_ms / 1000
+        self.interval = interval
+        self._last_explained: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def is_slow(self, seconds: float) -> bool:
+        return 0 < self.threshold <= seconds
+
+    def should_explain(self, caller: str, query: str) -> bool:
+        if query.lstrip().split(None, 1)[0].upper() not in ("SELECT", "WITH"):
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_explained.get((caller, query), -self.interval) < self.interval:
+                return False
+            self._last_explained[(caller, query)] = now
+        return True
+
+
+_slow_query_log: Optional[SlowQueryLog] = None
+
+
+def get_slow_query_log() -> SlowQueryLog:
+    """Returns the process-wide slow query log, reading SLOW_QUERY_MS on first use."""
+    global _slow_query_log
+    if _slow_query_log is None:
+        _slow_query_log = SlowQueryLog()
+    return _slow_query_log
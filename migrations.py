@@ -0,0 +1,215 @@
+"""
+Versioned schema migrations.
+
+Migrations are the numbered ``sql/migrations/NNNN_description.sql`` files, applied in order on top
+of ``sql/tables.sql``. Each one runs in its own transaction and is recorded in ``schema_migrations``,
+so running the migrator again only applies what is new.
+
+Usage:
+
+    python migrations.py migrate     # apply pending migrations
+    python migrations.py status      # list applied and pending migrations
+    python migrations.py check       # EXPLAIN the repository queries and report index use
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import queries
+import reporting
+from database import Database
+from utils import logger
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sql", "migrations")
+MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+# arbitrary key for pg_advisory_xact_lock, so two processes starting at once cannot apply a migration twice
+MIGRATION_LOCK_KEY = 4_201_170
+
+CREATE_SCHEMA_MIGRATIONS = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    checksum CHAR(32) NOT NULL,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+"""
+SELECT_APPLIED = "SELECT version, checksum FROM schema_migrations ORDER BY version;"
+INSERT_APPLIED = "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s);"
+
+INDEX_NODE_TYPES = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+
+@dataclass
+class Migration:
+    version: int
+    name: str
+    sql: str
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.md5(self.sql.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class IndexCheck:
+    name: str
+    uses_index: bool
+    indexes: List[str]
+    plan: Dict[str, Any]
+
+
+def load_migrations(directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    """Reads the migration files of ``directory``, ordered by version."""
+    migrations = []
+    for filename in os.listdir(directory):
+        match = MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(directory, filename), encoding = "utf-8") as stream:
+            migrations.append(Migration(int(match.group(1)), match.group(2), stream.read()))
+
+    migrations.sort(key = lambda migration: migration.version)
+    versions = [migration.version for migration in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions in {directory}.")
+    return migrations
+
+
+def applied_versions(db: Database) -> Dict[int, str]:
+    """Maps every applied migration version to the checksum it was applied with."""
+    db.execute_query(CREATE_SCHEMA_MIGRATIONS)
+    return dict(db.fetch_results(SELECT_APPLIED))
+
+
+def pending_migrations(db: Database, migrations: Optional[List[Migration]] = None) -> List[Migration]:
+    migrations = load_migrations() if migrations is None else migrations
+    applied = applied_versions(db)
+    for migration in migrations:
+        if migration.version in applied and applied[migration.version] != migration.checksum:
+            logger.warning(f"Migration {migration.version} ({migration.name}) was edited after it was applied.")
+    return [migration for migration in migrations if migration.version not in applied]
+
+
+def migrate(db: Database, target: Optional[int] = None) -> List[Migration]:
+    """
+    Applies every pending migration up to ``target``, each in its own transaction.
+
+    Args:
+        db (Database): A connected database.
+        target (Optional[int]): Highest version to apply. Defaults to the latest.
+
+    Returns:
+        List[Migration]: The migrations applied by this call.
+    """
+    applied = []
+    for migration in pending_migrations(db):
+        if target is not None and migration.version > target:
+            break
+        try:
+            with db.transaction():
+                db.execute_query("SELECT pg_advisory_xact_lock(%s);", (MIGRATION_LOCK_KEY,))
+                # another process may have applied it while we waited for the lock
+                if db.fetch_results("SELECT 1 FROM schema_migrations WHERE version = %s;", (migration.version,)):
+                    continue
+                db.execute_query(migration.sql)
+                db.execute_query(INSERT_APPLIED, (migration.version, migration.name, migration.checksum))
+        except Exception as e:
+            logger.error(f"Failed to apply migration {migration.version} ({migration.name}): {e}")
+            raise RuntimeError(f"Failed to apply migration {migration.version}.")
+        logger.info(f"Applied migration {migration.version} ({migration.name}).")
+        applied.append(migration)
+    return applied
+
+
+def indexed_queries() -> Iterator[Tuple[str, str, Any]]:
+    """The repository queries expected to use an index, with representative parameters."""
+    yield "books by author", queries.SELECT_BOOKS_BY_AUTHOR, ("Jane Austen",)
+    yield "book by title", queries.SELECT_BOOK_BY_TITLE, ("Emma",)
+    yield "loans by book", "SELECT loan_id FROM loan WHERE book_id = %s;", (1,)
+    yield "loans by member", "SELECT loan_id FROM loan WHERE member_id = %s;", (1,)
+    yield "open loans by book", "SELECT loan_id FROM loan WHERE book_id = %s AND date_returned IS NULL;", (1,)
+    yield "open loans by member", "SELECT loan_id FROM loan WHERE member_id = %s AND date_returned IS NULL;", (1,)
+    yield "open loan of book", queries.SELECT_OPEN_LOAN, (1,)
+    yield "open loans of member", queries.SELECT_MEMBER_OPEN_LOANS, (1,)
+    yield "book availability", queries.SELECT_AVAILABILITY, ([1, 2, 3],)
+
+    yield "publishers page", queries.SELECT_PUBLISHERS_PAGE, (100, 200)
+    yield "members page", queries.SELECT_MEMBERS_PAGE, (100, 200)
+
+    yield "members with loans", queries.SELECT_MEMBERS_WITH_LOANS, None
+    yield "borrowers by book", queries.SELECT_BORROWERS_BY_BOOK, ("Emma",)
+    yield "overdue loans", queries.SELECT_OVERDUE_LOANS, {"as_of": "2024-01-01"}
+
+    yield "most borrowed books", reporting.SELECT_MOST_BORROWED_BOOKS, (50,)
+    yield "active members", reporting.SELECT_ACTIVE_MEMBERS, (50,)
+    yield "daily circulation", reporting.SELECT_DAILY_CIRCULATION, ("2024-01-01",)
+
+    search = queries.search_params("austen emma", 50)
+    yield "search books", queries.SEARCH_BOOKS, search
+    yield "search members", queries.SEARCH_MEMBERS, search
+
+    sample_keysets = {"book_id": (1,), "title": ("M", 1), "author": ("M", 1), "year_published": (1950, 1)}
+    for sort_key, after in sample_keysets.items():
+        for label, cursor in (("first", None), ("next", after)):
+            query, params = queries.books_page_query(cursor, 200, sort_key)
+            yield f"books page by {sort_key} ({label})", query, params
+
+
+def _plan_nodes(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def check_indexes(db: Database) -> List[IndexCheck]:
+    """
+    EXPLAINs every query of ``indexed_queries`` and reports whether its plan uses an index.
+
+    Sequential scans are disabled for the check, because on the small tables of a development
+    database the planner rightly prefers them; a plan that still scans sequentially has no usable index.
+    """
+    results = []
+    with db.transaction(readonly = True):
+        db.execute_query("SET LOCAL enable_seqscan = off;")
+        for name, query, params in indexed_queries():
+            plan = db.fetch_results(f"EXPLAIN (FORMAT JSON) {query}", params)[0][0][0]["Plan"]
+            nodes = list(_plan_nodes(plan))
+            indexes = [node["Index Name"] for node in nodes if node["Node Type"] in INDEX_NODE_TYPES]
+            sequential = any(node["Node Type"] == "Seq Scan" for node in nodes)
+            results.append(IndexCheck(name, bool(indexes) and not sequential, indexes, plan))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = "Apply and inspect schema migrations.")
+    parser.add_argument("command", choices = ("migrate", "status", "check"))
+    parser.add_argument("--target", type = int, help = "highest migration version to apply")
+    args = parser.parse_args()
+
+    db = Database()
+    db.connect()
+
+    if args.command == "migrate":
+        applied = migrate(db, args.target)
+        print(f"Applied {len(applied)} migration(s).")
+    elif args.command == "status":
+        applied = applied_versions(db)
+        for migration in load_migrations():
+            state = "applied" if migration.version in applied else "pending"
+            print(f"{migration.version:04d} {migration.name:<40} {state}")
+    else:
+        results = check_indexes(db)
+        for result in results:
+            print(json.dumps({"query": result.name, "uses_index": result.uses_index, "indexes": result.indexes}))
+        if not all(result.uses_index for result in results):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
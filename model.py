@@ -1,32 +1,130 @@
 from dataclasses import dataclass
+from datetime import date
+from typing import List, NamedTuple, Optional, Tuple
 
+# Rows read from the database are immutable named tuples: they carry no per-instance __dict__, so a
+# million of them take a fraction of the memory of regular classes, and a fetched row becomes a model
+# object with a single ``_make`` call. Their fields are in the order of the column lists in queries.py.
 
-@dataclass
-class Book:
+
+class Book(NamedTuple):
     id: int
     title: str
     author: str
-    publisher_id: int
-    isbn: str
-    year_published: int
+    publisher_id: Optional[int]
+    isbn: Optional[str]
+    year_published: Optional[int]
 
 
-@dataclass
-class Publisher:
+class Publisher(NamedTuple):
     id: int
     name: str
-    address: str
-    phone: str
+    address: Optional[str]
+    phone: Optional[str]
+    email: Optional[str]
+
+
+class Member(NamedTuple):
+    id: int
+    first_name: str
+    last_name: str
     email: str
+    phone: Optional[str]
+    address: Optional[str]
+    date_of_membership: date
 
 
-@dataclass
-class Member:
+class Staff(NamedTuple):
     id: int
     first_name: str
     last_name: str
     email: str
-    phone: str
-    address: str
-    date_of_membership: str
+    phone: Optional[str]
+    role: str
+
+
+class Loan(NamedTuple):
+    id: int
+    book_id: int
+    member_id: int
+    staff_id: Optional[int]
+    date_borrowed: date
+    due_date: date
+    date_returned: Optional[date]
+    renewals: int
+
+
+class BookBorrower(NamedTuple):
+    """A member who borrowed a particular book, with the dates of that loan."""
+    member_id: int
+    first_name: str
+    last_name: str
+    title: str
+    date_borrowed: date
+    due_date: date
+    date_returned: Optional[date]
+
+
+class OverdueLoan(NamedTuple):
+    loan_id: int
+    member_id: int
+    first_name: str
+    last_name: str
+    book_id: int
+    title: str
+    due_date: date
+    days_overdue: int
 
+
+class BookCirculation(NamedTuple):
+    book_id: int
+    title: str
+    author: str
+    borrow_count: int
+
+
+class MemberActivity(NamedTuple):
+    member_id: int
+    first_name: str
+    last_name: str
+    open_loans: int
+    total_loans: int
+
+
+class DailyCirculation(NamedTuple):
+    day: date
+    checkouts: int
+    returns: int
+
+
+class PublisherOverdue(NamedTuple):
+    publisher_id: int
+    name: str
+    overdue_loans: int
+    max_days_overdue: int
+    # the day the figures were computed on
+    as_of: date
+
+
+class DecadeCount(NamedTuple):
+    decade: int
+    books: int
+
+
+class MonthlyLoans(NamedTuple):
+    # first day of the month
+    month: date
+    loans: int
+    late_returns: int
+
+
+class DurationBucket(NamedTuple):
+    label: str
+    loans: int
+
+
+@dataclass
+class BookPage:
+    books: List[Book]
+    # keyset cursor to pass as ``after`` for the next page, None on the last page
+    next_after: Optional[Tuple]
@@ -0,0 +1,226 @@
+"""
+SQL text and row mapping shared by the blocking Repository and the asyncio AsyncRepository, so both
+send identical statements and build identical model objects.
+"""
+import re
+from typing import Any, List, Optional, Sequence, Tuple
+
+from model import Book, BookBorrower, Loan, Member, OverdueLoan, Publisher, Staff
+
+BOOK_COLUMNS = "book_id, title, author, publisher_id, isbn, year_published"
+PUBLISHER_COLUMNS = "publisher_id, name, address, phone, email"
+MEMBER_COLUMNS = "member_id, first_name, last_name, email, phone, address, date_of_membership"
+STAFF_COLUMNS = "staff_id, first_name, last_name, email, phone, role"
+LOAN_COLUMNS = "loan_id, book_id, member_id, staff_id, date_borrowed, due_date, date_returned, renewals"
+
+# ORDER BY expressions for the keyset-paginated book listing. Text keys use the "C" collation so the
+# database orders them exactly like Python compares str, which the page cache relies on.
+BOOK_SORT_EXPRESSIONS = {
+    "book_id": "book_id",
+    "title": 'title COLLATE "C"',
+    "author": 'author COLLATE "C"',
+    "year_published": "COALESCE(year_published, 0)",
+}
+
+SELECT_ALL_BOOKS = f"SELECT {BOOK_COLUMNS} FROM book ORDER BY book_id;"
+SELECT_BOOKS_BY_AUTHOR = f"SELECT {BOOK_COLUMNS} FROM book WHERE author = %s;"
+SELECT_BOOK_BY_TITLE = f"SELECT {BOOK_COLUMNS} FROM book WHERE title = %s;"
+SELECT_BOOKS_BY_IDS = f"SELECT {BOOK_COLUMNS} FROM book WHERE book_id = ANY(%s) ORDER BY book_id;"
+INSERT_BOOK = (
+    "INSERT INTO book (title, author, publisher_id, isbn, year_published) VALUES (%s, %s, %s, %s, %s) "
+    f"RETURNING {BOOK_COLUMNS};"
+)
+UPDATE_BOOK = (
+    "UPDATE book SET title = %s, author = %s, publisher_id = %s, isbn = %s, year_published = %s "
+    f"WHERE book_id = %s RETURNING {BOOK_COLUMNS};"
+)
+DELETE_BOOK = "DELETE FROM book WHERE book_id = %s RETURNING book_id;"
+
+# batch variants, expanded by psycopg2.extras.execute_values; the casts type NULLs in the VALUES list
+INSERT_BOOKS = (
+    "INSERT INTO book (title, author, publisher_id, isbn, year_published) VALUES %s "
+    f"RETURNING {BOOK_COLUMNS};"
+)
+INSERT_BOOKS_TEMPLATE = "(%s, %s, %s::integer, %s, %s::integer)"
+UPDATE_BOOKS = (
+    "UPDATE book SET title = v.title, author = v.author, publisher_id = v.publisher_id, "
+    "isbn = v.isbn, year_published = v.year_published "
+    "FROM (VALUES %s) AS v (book_id, title, author, publisher_id, isbn, year_published) "
+    "WHERE book.book_id = v.book_id "
+    "RETURNING book.book_id, book.title, book.author, book.publisher_id, book.isbn, book.year_published;"
+)
+UPDATE_BOOKS_TEMPLATE = "(%s::integer, %s, %s, %s::integer, %s, %s::integer)"
+DELETE_BOOKS = "DELETE FROM book WHERE book_id = ANY(%s) RETURNING book_id;"
+
+SELECT_ALL_PUBLISHERS = f"SELECT {PUBLISHER_COLUMNS} FROM publisher ORDER BY publisher_id;"
+SELECT_ALL_MEMBERS = f"SELECT {MEMBER_COLUMNS} FROM member ORDER BY member_id;"
+# keyset pages of the listings, after the last ID of the previous page; 0 starts from the beginning
+SELECT_PUBLISHERS_PAGE = f"SELECT {PUBLISHER_COLUMNS} FROM publisher WHERE publisher_id > %s ORDER BY publisher_id LIMIT %s;"
+SELECT_MEMBERS_PAGE = f"SELECT {MEMBER_COLUMNS} FROM member WHERE member_id > %s ORDER BY member_id LIMIT %s;"
+
+# Ranked search: a row matches when the typed words prefix-match its search_vector or when the text
+# is trigram-similar to one of its fields, which tolerates typos. '%%' is a literal '%' for the driver.
+SEARCH_BOOKS = (
+    f"SELECT {BOOK_COLUMNS} FROM book "
+    "WHERE search_vector @@ to_tsquery('simple', %(tsquery)s) OR %(text)s <%% title OR %(text)s <%% author "
+    "ORDER BY GREATEST(ts_rank(search_vector, to_tsquery('simple', %(tsquery)s)), "
+    "word_similarity(%(text)s, title), word_similarity(%(text)s, author)) DESC, book_id "
+    "LIMIT %(limit)s;"
+)
+SEARCH_MEMBERS = (
+    f"SELECT {MEMBER_COLUMNS} FROM member "
+    "WHERE search_vector @@ to_tsquery('simple', %(tsquery)s) "
+    "OR %(text)s <%% (first_name || ' ' || last_name) OR %(text)s <%% email "
+    "ORDER BY GREATEST(ts_rank(search_vector, to_tsquery('simple', %(tsquery)s)), "
+    "word_similarity(%(text)s, first_name || ' ' || last_name), word_similarity(%(text)s, email)) DESC, member_id "
+    "LIMIT %(limit)s;"
+)
+
+# Loan analytics, each a single query driven by the loan indexes rather than one query per member.
+SELECT_MEMBERS_WITH_LOANS = (
+    f"SELECT {MEMBER_COLUMNS} FROM member m "
+    "WHERE EXISTS (SELECT 1 FROM loan l WHERE l.member_id = m.member_id) "
+    "ORDER BY member_id;"
+)
+SELECT_BORROWERS_BY_BOOK = (
+    "SELECT m.member_id, m.first_name, m.last_name, b.title, l.date_borrowed, l.due_date, l.date_returned "
+    "FROM book b JOIN loan l ON l.book_id = b.book_id JOIN member m ON m.member_id = l.member_id "
+    "WHERE b.title = %s "
+    "ORDER BY l.date_borrowed DESC, l.loan_id DESC;"
+)
+SELECT_OVERDUE_LOANS = (
+    "SELECT l.loan_id, m.member_id, m.first_name, m.last_name, b.book_id, b.title, l.due_date, "
+    "%(as_of)s::date - l.due_date AS days_overdue "
+    "FROM loan l JOIN member m ON m.member_id = l.member_id JOIN book b ON b.book_id = l.book_id "
+    "WHERE l.date_returned IS NULL AND l.due_date < %(as_of)s::date "
+    "ORDER BY l.due_date, l.loan_id;"
+)
+SELECT_ALL_LOANS = f"SELECT {LOAN_COLUMNS} FROM loan ORDER BY loan_id;"
+
+# Circulation. Each write is a single statement on the open loan of a book, which the unique partial
+# index loan_open_book_id_key finds with one probe. Checkout relies on that index to refuse a second
+# open loan; return and renewal lock the open loan row, so of two desks acting on the same copy at
+# once the second sees the first's result and matches nothing.
+BORROW_BOOK = (
+    "INSERT INTO loan (book_id, member_id, staff_id, date_borrowed, due_date) "
+    "VALUES (%(book_id)s, %(member_id)s, %(staff_id)s, CURRENT_DATE, CURRENT_DATE + %(loan_days)s::int) "
+    "ON CONFLICT (book_id) WHERE date_returned IS NULL DO NOTHING "
+    f"RETURNING {LOAN_COLUMNS};"
+)
+RETURN_BOOK = (
+    "UPDATE loan SET date_returned = CURRENT_DATE "
+    "WHERE book_id = %s AND date_returned IS NULL "
+    f"RETURNING {LOAN_COLUMNS};"
+)
+RENEW_LOAN = (
+    "UPDATE loan SET due_date = due_date + %(loan_days)s::int, renewals = renewals + 1 "
+    "WHERE book_id = %(book_id)s AND date_returned IS NULL "
+    "AND due_date >= CURRENT_DATE AND renewals < %(max_renewals)s "
+    f"RETURNING {LOAN_COLUMNS};"
+)
+SELECT_OPEN_LOAN = f"SELECT {LOAN_COLUMNS} FROM loan WHERE book_id = %s AND date_returned IS NULL;"
+SELECT_OPEN_LOANS = f"SELECT {LOAN_COLUMNS} FROM loan WHERE date_returned IS NULL ORDER BY due_date, loan_id LIMIT %s;"
+SELECT_MEMBER_OPEN_LOANS = (
+    f"SELECT {LOAN_COLUMNS} FROM loan WHERE member_id = %s AND date_returned IS NULL ORDER BY due_date, loan_id;"
+)
+SELECT_AVAILABILITY = (
+    "SELECT b.book_id, l.loan_id IS NULL FROM unnest(%s::int[]) AS b(book_id) "
+    "LEFT JOIN loan l ON l.book_id = b.book_id AND l.date_returned IS NULL;"
+)
+SELECT_ALL_STAFF = f"SELECT {STAFF_COLUMNS} FROM staff ORDER BY staff_id;"
+
+
+def books_page_query(after: Optional[Tuple], page_size: int, sort_key: str) -> Tuple[str, Tuple[Any, ...]]:
+    """
+    Builds the keyset query for one page of the book listing.
+
+    One row more than ``page_size`` is requested so the caller can tell whether another page follows
+    without a second round-trip.
+
+    Returns:
+        Tuple[str, Tuple]: The query and its parameters.
+    """
+    if sort_key not in BOOK_SORT_EXPRESSIONS:
+        raise ValueError(f"Cannot sort books by '{sort_key}'.")
+
+    expression = BOOK_SORT_EXPRESSIONS[sort_key]
+    order_by = "book_id" if sort_key == "book_id" else f"{expression}, book_id"
+    if after is None:
+        where, params = "", ()
+    elif sort_key == "book_id":
+        where, params = "WHERE book_id > %s", tuple(after)
+    else:
+        where, params = f"WHERE ({expression}, book_id) > (%s, %s)", tuple(after)
+
+    query = f"SELECT {BOOK_COLUMNS} FROM book {where} ORDER BY {order_by} LIMIT %s;"
+    return query, params + (page_size + 1,)
+
+
+def search_params(text: str, limit: int) -> Optional[dict]:
+    """
+    Parameters of SEARCH_BOOKS and SEARCH_MEMBERS for the typed ``text``, or None when it contains
+    no searchable words. Every word becomes a prefix term, so results appear while the last word is
+    still being typed; punctuation never reaches to_tsquery, which would reject it.
+    """
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return None
+    return {"tsquery": " & ".join(f"{word}:*" for word in words), "text": " ".join(words), "limit": limit}
+
+
+def prepared_queries() -> List[str]:
+    """The fixed-shape queries the blocking Repository runs as prepared statements."""
+    page_queries = [
+        books_page_query(after, 1, sort_key)[0]
+        for sort_key in BOOK_SORT_EXPRESSIONS
+        for after in (None, (0,) if sort_key == "book_id" else ("", 0))
+    ]
+    return [
+        SELECT_ALL_BOOKS, SELECT_BOOKS_BY_AUTHOR, SELECT_BOOK_BY_TITLE, SELECT_BOOKS_BY_IDS,
+        INSERT_BOOK, UPDATE_BOOK, DELETE_BOOK, DELETE_BOOKS,
+        SEARCH_BOOKS, SEARCH_MEMBERS, SELECT_ALL_PUBLISHERS, SELECT_ALL_MEMBERS, SELECT_PUBLISHERS_PAGE, SELECT_MEMBERS_PAGE,
+        SELECT_MEMBERS_WITH_LOANS, SELECT_BORROWERS_BY_BOOK, SELECT_OVERDUE_LOANS, SELECT_ALL_LOANS, SELECT_ALL_STAFF,
+        BORROW_BOOK, RETURN_BOOK, RENEW_LOAN, SELECT_OPEN_LOAN, SELECT_OPEN_LOANS, SELECT_MEMBER_OPEN_LOANS,
+        SELECT_AVAILABILITY,
+    ] + page_queries
+
+
+def expand_values(query: str, template: str, count: int) -> str:
+    """
+    Expands the ``VALUES %s`` placeholder of INSERT_BOOKS or UPDATE_BOOKS into ``count`` rows of
+    ``template``, for drivers without psycopg2's ``execute_values``.
+    """
+    return query.replace("%s", ", ".join([template] * count), 1)
+
+
+def book_params(book: Book) -> Tuple[Any, ...]:
+    """Parameters of INSERT_BOOK for the given book."""
+    return book.title, book.author, book.publisher_id, book.isbn, book.year_published
+
+
+def to_books(rows: Sequence[Sequence[Any]]) -> List[Book]:
+    return list(map(Book._make, rows))
+
+
+def to_publishers(rows: Sequence[Sequence[Any]]) -> List[Publisher]:
+    return list(map(Publisher._make, rows))
+
+
+def to_members(rows: Sequence[Sequence[Any]]) -> List[Member]:
+    return list(map(Member._make, rows))
+
+
+def to_staff(rows: Sequence[Sequence[Any]]) -> List[Staff]:
+    return list(map(Staff._make, rows))
+
+
+def to_loans(rows: Sequence[Sequence[Any]]) -> List[Loan]:
+    return list(map(Loan._make, rows))
+
+
+def to_book_borrowers(rows: Sequence[Sequence[Any]]) -> List[BookBorrower]:
+    return list(map(BookBorrower._make, rows))
+
+
+def to_overdue_loans(rows: Sequence[Sequence[Any]]) -> List[OverdueLoan]:
+    return list(map(OverdueLoan._make, rows))
@@ -0,0 +1,241 @@
+"""
+Circulation reports read from the summary tables of migration 0009.
+
+The per-book, per-member and per-day figures are maintained by triggers as loans are written, so
+every report reads a handful of indexed rows however long the loan history is. Overdue loans per
+publisher change with the calendar as well, so that report is a materialized view which
+``ReportRefresher`` refreshes concurrently every REPORT_REFRESH_SECONDS; readers are never blocked.
+
+Usage:
+
+    python reporting.py refresh     # refresh overdue_by_publisher now
+    python reporting.py rebuild     # recompute the summary tables from the loan history
+"""
+import argparse
+import atexit
+import os
+import threading
+from datetime import date, timedelta
+from typing import List, Optional
+
+from database import Database, statements
+from model import BookCirculation, DailyCirculation, MemberActivity, PublisherOverdue
+from utils import logger
+
+SELECT_MOST_BORROWED_BOOKS = (
+    "SELECT c.book_id, b.title, b.author, c.borrow_count "
+    "FROM book_circulation c JOIN book b ON b.book_id = c.book_id "
+    "ORDER BY c.borrow_count DESC, c.book_id LIMIT %s;"
+)
+SELECT_ACTIVE_MEMBERS = (
+    "SELECT c.member_id, m.first_name, m.last_name, c.open_loans, c.total_loans "
+    "FROM member_circulation c JOIN member m ON m.member_id = c.member_id "
+    "WHERE c.open_loans > 0 "
+    "ORDER BY c.open_loans DESC, c.total_loans DESC, c.member_id LIMIT %s;"
+)
+# each day is spread over several slot rows (migration 0012), so concurrent desks do not queue on one
+SELECT_DAILY_CIRCULATION = (
+    "SELECT day, sum(checkouts)::int, sum(returns)::int FROM daily_circulation WHERE day >= %s "
+    "GROUP BY day ORDER BY day DESC;"
+)
+SELECT_OVERDUE_BY_PUBLISHER = (
+    "SELECT publisher_id, name, overdue_loans, max_days_overdue, as_of FROM overdue_by_publisher "
+    "ORDER BY overdue_loans DESC, publisher_id;"
+)
+REFRESH_OVERDUE_BY_PUBLISHER = "REFRESH MATERIALIZED VIEW CONCURRENTLY overdue_by_publisher;"
+REBUILD_SUMMARIES = "SELECT lms_rebuild_circulation();"
+
+# arbitrary key for pg_try_advisory_xact_lock, so only one client refreshes at a time
+REFRESH_LOCK_KEY = 4_201_171
+TRY_REFRESH_LOCK = "SELECT pg_try_advisory_xact_lock(%s);"
+
+
+class CirculationReports:
+    """
+    Reads the circulation summaries and keeps the scheduled ones fresh.
+    """
+
+    def __init__(self, db: Database) -> None:
+        """
+        Args:
+            db (Database): A connected database.
+        """
+        self.db = db
+        if os.getenv("PREPARE_STATEMENTS", "1") == "1":
+            statements.register(
+                SELECT_MOST_BORROWED_BOOKS, SELECT_ACTIVE_MEMBERS, SELECT_DAILY_CIRCULATION, SELECT_OVERDUE_BY_PUBLISHER
+            )
+
+    def most_borrowed_books(self, limit: int = 50) -> List[BookCirculation]:
+        """
+        Fetches the books borrowed most often over the whole loan history.
+
+        Args:
+            limit (int): Maximum number of books returned.
+
+        Returns:
+            List[BookCirculation]: The books with their borrow counts, most borrowed first.
+        """
+        try:
+            rows = self.db.fetch_results(query = SELECT_MOST_BORROWED_BOOKS, params = (limit,))
+            return list(map(BookCirculation._make, rows))
+        except Exception as e:
+            logger.error(f"Failed to fetch the most borrowed books: {e}")
+            raise RuntimeError("Failed to fetch the most borrowed books.")
+
+    def active_members(self, limit: int = 50) -> List[MemberActivity]:
+        """
+        Fetches the members with the most books out.
+
+        Args:
+            limit (int): Maximum number of members returned.
+
+        Returns:
+            List[MemberActivity]: Members with at least one open loan, most open loans first.
+        """
+        try:
+            rows = self.db.fetch_results(query = SELECT_ACTIVE_MEMBERS, params = (limit,))
+            return list(map(MemberActivity._make, rows))
+        except Exception as e:
+            logger.error(f"Failed to fetch the active members: {e}")
+            raise RuntimeError("Failed to fetch the active members.")
+
+    def daily_circulation(self, days: int = 30) -> List[DailyCirculation]:
+        """
+        Fetches the checkouts and returns of each recent day.
+
+        Args:
+            days (int): Number of days back from today.
+
+        Returns:
+            List[DailyCirculation]: One entry per day with any circulation, most recent first.
+        """
+        try:
+            rows = self.db.fetch_results(query = SELECT_DAILY_CIRCULATION, params = (date.today() - timedelta(days = days),))
+            return list(map(DailyCirculation._make, rows))
+        except Exception as e:
+            logger.error(f"Failed to fetch the daily circulation: {e}")
+            raise RuntimeError("Failed to fetch the daily circulation.")
+
+    def overdue_by_publisher(self) -> List[PublisherOverdue]:
+        """
+        Fetches the number of overdue loans per publisher as of the last refresh.
+
+        Returns:
+            List[PublisherOverdue]: Publishers with overdue loans, most overdue loans first.
+        """
+        try:
+            rows = self.db.fetch_results(query = SELECT_OVERDUE_BY_PUBLISHER)
+            return list(map(PublisherOverdue._make, rows))
+        except Exception as e:
+            logger.error(f"Failed to fetch overdue loans by publisher: {e}")
+            raise RuntimeError("Failed to fetch overdue loans by publisher.")
+
+    def refresh(self) -> bool:
+        """
+        Recomputes the scheduled reports without blocking their readers.
+
+        Returns:
+            bool: False if another client was refreshing at the same time, which makes this one redundant.
+        """
+        def work(cursor) -> bool:
+            cursor.execute(TRY_REFRESH_LOCK, (REFRESH_LOCK_KEY,))
+            if not cursor.fetchone()[0]:
+                return False
+            cursor.execute(REFRESH_OVERDUE_BY_PUBLISHER)
+            return True
+
+        try:
+            refreshed = self.db.run_in_transaction(work)
+        except Exception as e:
+            logger.error(f"Failed to refresh the circulation reports: {e}")
+            raise RuntimeError("Failed to refresh the circulation reports.")
+        if refreshed:
+            logger.info("Circulation reports refreshed.")
+        return refreshed
+
+    def rebuild_summaries(self) -> None:
+        """Recomputes the trigger-maintained summary tables from the loan history."""
+        try:
+            self.db.run_in_transaction(lambda cursor: cursor.execute(REBUILD_SUMMARIES))
+        except Exception as e:
+            logger.error(f"Failed to rebuild the circulation summaries: {e}")
+            raise RuntimeError("Failed to rebuild the circulation summaries.")
+        logger.info("Circulation summaries rebuilt.")
+
+
+class ReportRefresher:
+    """
+    Refreshes the scheduled reports on a daemon thread every ``interval`` seconds. Every running
+    client may have one; an advisory lock makes the refreshes of different clients not overlap.
+    """
+
+    def __init__(self, reports: CirculationReports, interval: float) -> None:
+        self.reports = reports
+        self.interval = interval
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target = self._run, name = "lms-report-refresher", daemon = True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.interval):
+            try:
+                self.reports.refresh()
+            except RuntimeError:
+                # already logged; try again at the next interval
+                pass
+
+
+_refresher: Optional[ReportRefresher] = None
+_refresher_lock = threading.Lock()
+
+
+def get_report_refresher(reports: CirculationReports) -> Optional[ReportRefresher]:
+    """
+    Returns the process-wide refresher, started on first use, or None if REPORT_REFRESH_SECONDS is 0.
+    """
+    global _refresher
+    interval = float(os.getenv("REPORT_REFRESH_SECONDS", "300"))
+    if interval <= 0:
+        return None
+    with _refresher_lock:
+        if _refresher is None:
+            _refresher = ReportRefresher(reports, interval)
+            _refresher.start()
+            atexit.register(_refresher.stop)
+        return _refresher
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices = ("refresh", "rebuild"))
+    args = parser.parse_args()
+
+    db = Database()
+    db.connect()
+    reports = CirculationReports(db)
+    if args.command == "refresh":
+        if not reports.refresh():
+            print("Another client is refreshing the reports.")
+    else:
+        reports.rebuild_summaries()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,34 @@
-from typing import List, Optional
+import os
+from contextlib import contextmanager
+from datetime import date
+from typing import Callable, Dict, Hashable, Iterator, List, Optional, Sequence, Tuple, TypeVar
 
+from psycopg2.extras import execute_values
 
-from database import Database
-from model import Book, Publisher, Member
+import queries
+from bulk_import import BookImporter, ImportReport
+from cache import BookPageCache, ReferenceCache, book_keyset, get_reference_cache
+from database import ChangeListener, Database, get_change_listener, statements
+from events import ChangeKind, TableChange
+from model import Book, BookBorrower, BookPage, Loan, Member, OverdueLoan, Publisher, Staff
 from utils import logger
 
+T = TypeVar("T")
+
 
 class Repository:
     """
     Repository class for handling database operations related to books, publishers, members, and loans.
     """
 
-    def __init__(self) -> None:
-        """Initializes the Repository class and connects to the database."""
+    def __init__(self, cache: Optional[ReferenceCache] = None) -> None:
+        """
+        Initializes the Repository class and connects to the database.
+
+        Args:
+            cache (Optional[ReferenceCache]): Cache for reference data reads. Defaults to the
+                process-wide cache shared by every repository.
+        """
         self.db = Database()
         try:
             self.db.connect()
@@ -20,6 +36,84 @@ class Repository:
             logger.critical(f"Failed to connect to the database: {e}")
             raise RuntimeError("Database connection failed.")
 
+        if os.getenv("PREPARE_STATEMENTS", "1") == "1":
+            statements.register(*queries.prepared_queries())
+
+        self.page_size = int(os.getenv("BOOK_PAGE_SIZE", "200"))
+        self.page_cache = BookPageCache(int(os.getenv("BOOK_PAGE_CACHE_SIZE", "64")))
+        self.cache = cache if cache is not None else get_reference_cache()
+
+    def _read_through(self, entity: str, key: Hashable, load: Callable[[], T]) -> T:
+        # reads inside a transaction may see uncommitted writes, so they bypass the cache
+        if self.db.in_transaction():
+            return load()
+        return self.cache.get_or_load(entity, key, load)
+
+    @contextmanager
+    def transaction(self, isolation_level: Optional[str] = None, readonly: bool = False) -> Iterator["Repository"]:
+        """
+        Runs every repository call made by this thread inside the block as one unit of work, committed
+        once at the end and rolled back on any exception. Blocks nest as savepoints.
+
+        Args:
+            isolation_level (Optional[str]): READ COMMITTED, REPEATABLE READ or SERIALIZABLE.
+            readonly (bool): Start the transaction as READ ONLY.
+        """
+        outermost = not self.db.in_transaction()
+        try:
+            with self.db.transaction(isolation_level = isolation_level, readonly = readonly):
+                yield self
+        finally:
+            # other threads may have cached pages between a write and its commit or rollback
+            if outermost and not readonly:
+                self.page_cache.clear()
+                self.cache.clear()
+
+    def listen(self, callback: Optional[Callable[[TableChange], None]] = None) -> ChangeListener:
+        """
+        Subscribes to the changes committed by every client of the database. The reference cache drops
+        the changed entity before ``callback`` is called on the listener thread.
+
+        Args:
+            callback (Optional[Callable]): Receives every TableChange.
+
+        Returns:
+            ChangeListener: The process-wide listener.
+        """
+        def on_change(change: TableChange) -> None:
+            self.cache.invalidate(change.table)
+            if change.kind is ChangeKind.RELOAD and change.table == "book":
+                self.page_cache.clear()
+            if callback is not None:
+                callback(change)
+
+        listener = get_change_listener(self.db.connection_kwargs())
+        listener.changes.subscribe(on_change)
+        return listener
+
+    def refresh_books(self, book_ids: Sequence[int]) -> List[Book]:
+        """
+        Re-reads books changed by another client and drops the cached pages they affect.
+
+        Args:
+            book_ids (Sequence[int]): The IDs of the changed books.
+
+        Returns:
+            List[Book]: The books that still exist; the others were deleted in the meantime.
+        """
+        query = queries.SELECT_BOOKS_BY_IDS
+        params = (list(book_ids),)
+        try:
+            books = queries.to_books(self.db.fetch_results(query = query, params = params))
+        except Exception as e:
+            logger.error(f"Failed to refresh books {list(book_ids)}: {e}")
+            raise RuntimeError("Failed to refresh books.")
+
+        stored_by_id = {book.id: book for book in books}
+        for book_id in book_ids:
+            self.page_cache.invalidate_book(book_id, stored_by_id.get(book_id))
+        return books
+
     def fetchall_books(self) -> List[Book]:
         """
         Fetches all books from the database.
@@ -27,62 +121,262 @@ class Repository:
         Returns:
             List[Book]: A list of Book objects representing all books in the database.
         """
-        query = "SELECT * FROM book;"
+        query = queries.SELECT_ALL_BOOKS
         try:
             results = self.db.fetch_results(query = query)
-            return [Book(*result) for result in results]
+            return queries.to_books(results)
         except Exception as e:
             logger.error(f"Failed to fetch all books: {e}")
             return []
 
-    def add_book(self, book: Book) -> None:
+    def fetch_books_page(
+            self,
+            after: Optional[Tuple] = None,
+            page_size: Optional[int] = None,
+            sort_key: str = "book_id"
+    ) -> BookPage:
+        """
+        Fetches one page of the book listing using keyset pagination.
+
+        Args:
+            after (Optional[Tuple]): The ``next_after`` cursor of the previous page, None for the first page.
+            page_size (Optional[int]): Maximum number of books in the page. Defaults to BOOK_PAGE_SIZE.
+            sort_key (str): Column to order by: book_id, title, author or year_published.
+
+        Returns:
+            BookPage: The books of the page and the cursor of the next one.
+        """
+        page_size = page_size or self.page_size
+        query, params = queries.books_page_query(after, page_size, sort_key)
+
+        page = self.page_cache.get(sort_key, after, page_size)
+        if page is not None:
+            return page
+
+        generation = self.page_cache.generation
+        try:
+            results = self.db.fetch_results(query = query, params = params)
+        except Exception as e:
+            logger.error(f"Failed to fetch page of books after {after}: {e}")
+            raise RuntimeError("Failed to fetch books.")
+
+        books = queries.to_books(results[:page_size])
+        next_after = book_keyset(books[-1], sort_key) if len(results) > page_size else None
+        page = BookPage(books = books, next_after = next_after)
+        # a page read inside a transaction may include writes that are not committed yet
+        if not self.db.in_transaction():
+            self.page_cache.put(sort_key, after, page_size, page, generation)
+        return page
+
+    def stream_books(self, itersize: Optional[int] = None) -> Iterator[List[Book]]:
+        """
+        Streams all books from the database through a server-side cursor.
+
+        Args:
+            itersize (Optional[int]): Number of books per batch. Defaults to STREAM_ITERSIZE.
+
+        Yields:
+            List[Book]: Consecutive batches of Book objects.
+        """
+        query = queries.SELECT_ALL_BOOKS
+        try:
+            for rows in self.db.stream_results(query = query, itersize = itersize):
+                yield queries.to_books(rows)
+        except Exception as e:
+            logger.error(f"Failed to stream books: {e}")
+            raise RuntimeError("Failed to stream books.")
+
+    def add_book(self, book: Book) -> Book:
         """
         Adds a new book to the database.
 
         Args:
             book (Book): The book object to be added.
+
+        Returns:
+            Book: The book as stored, including its generated ID.
         """
-        query = "INSERT INTO book (title, author, publisher_id) VALUES (%s, %s, %s);"
-        params = (book.title, book.author, book.publisher_id)
+        query = queries.INSERT_BOOK
+        params = queries.book_params(book)
         try:
-            self.db.execute_query(query = query, params = params)
+            stored = queries.to_books(self.db.fetch_results(query = query, params = params))[0]
+            self.page_cache.invalidate_book(stored.id, stored)
+            self.cache.invalidate("book")
             logger.info(f"Book '{book.title}' added successfully.")
+            return stored
         except Exception as e:
             logger.error(f"Failed to add book '{book.title}': {e}")
             raise RuntimeError("Failed to add book.")
 
-    def delete_book_by_id(self, book_id: int) -> None:
+    def add_books(self, books: Sequence[Book]) -> List[Book]:
+        """
+        Adds several books with a single multi-row INSERT and one commit.
+
+        Args:
+            books (Sequence[Book]): The books to add; their IDs are ignored.
+
+        Returns:
+            List[Book]: The books as stored, including their generated IDs.
+        """
+        if not books:
+            return []
+        rows = [queries.book_params(book) for book in books]
+
+        def work(cursor) -> List[Book]:
+            return queries.to_books(execute_values(
+                cursor, queries.INSERT_BOOKS, rows,
+                template = queries.INSERT_BOOKS_TEMPLATE, page_size = len(rows), fetch = True
+            ))
+
+        try:
+            stored = self.db.run_in_transaction(work)
+        except Exception as e:
+            logger.error(f"Failed to add {len(books)} books: {e}")
+            raise RuntimeError("Failed to add books.")
+
+        for book in stored:
+            self.page_cache.invalidate_book(book.id, book)
+        self.cache.invalidate("book")
+        logger.info(f"{len(stored)} books added successfully.")
+        return stored
+
+    def import_books(
+            self,
+            path: str,
+            fmt: Optional[str] = None,
+            batch_size: int = 5000,
+            method: str = "copy",
+            strict: bool = False
+    ) -> ImportReport:
+        """
+        Bulk-loads books from a CSV or JSON-lines file in a single transaction.
+
+        Args:
+            path (str): The input file.
+            fmt (Optional[str]): "csv" or "jsonl"; defaults to the file extension.
+            batch_size (int): Rows sent to the server per COPY/INSERT.
+            method (str): "copy" or "values".
+            strict (bool): Roll back the whole import if any row is invalid.
+
+        Returns:
+            ImportReport: Counts, timing and the rejected rows.
+        """
+        importer = BookImporter(self.db, batch_size = batch_size, method = method, strict = strict)
+        try:
+            report = importer.import_file(path, fmt)
+        except Exception as e:
+            logger.error(f"Failed to import books from '{path}': {e}")
+            raise RuntimeError("Failed to import books.")
+        finally:
+            # a bulk load can touch every page, so cached pages are dropped wholesale
+            self.page_cache.clear()
+            self.cache.invalidate("book")
+        return report
+
+    def delete_book_by_id(self, book_id: int) -> bool:
         """
         Deletes a book by its ID.
 
         Args:
             book_id (int): The ID of the book to delete.
+
+        Returns:
+            bool: True if a book was deleted, False if no book had that ID.
         """
-        query = "DELETE FROM book WHERE id = %s;"
+        query = queries.DELETE_BOOK
         params = (book_id,)
         try:
-            self.db.execute_query(query = query, params = params)
+            deleted = bool(self.db.fetch_results(query = query, params = params))
+            self.page_cache.invalidate_book(book_id)
+            self.cache.invalidate("book")
             logger.info(f"Book with ID {book_id} deleted successfully.")
+            return deleted
         except Exception as e:
             logger.error(f"Failed to delete book with ID {book_id}: {e}")
             raise RuntimeError("Failed to delete book.")
 
-    def update_book(self, book: Book) -> None:
+    def update_book(self, book: Book) -> Optional[Book]:
         """
         Updates the details of a book in the database.
 
         Args:
             book (Book): The book object with updated information.
+
+        Returns:
+            Optional[Book]: The book as stored after the update, or None if no book had that ID.
         """
-        query = "UPDATE book SET title = %s, author = %s, publisher_id = %s WHERE id = %s;"
-        params = (book.title, book.author, book.publisher_id, book.id)
+        query = queries.UPDATE_BOOK
+        params = queries.book_params(book) + (book.id,)
         try:
-            self.db.execute_query(query = query, params = params)
+            results = queries.to_books(self.db.fetch_results(query = query, params = params))
+            stored = results[0] if results else None
+            self.page_cache.invalidate_book(book.id, stored)
+            self.cache.invalidate("book")
             logger.info(f"Book with ID {book.id} updated successfully.")
+            return stored
         except Exception as e:
             logger.error(f"Failed to update book with ID {book.id}: {e}")
             raise RuntimeError("Failed to update book.")
 
+    def update_books(self, books: Sequence[Book]) -> List[Book]:
+        """
+        Updates several books with a single UPDATE ... FROM (VALUES ...) and one commit.
+
+        Args:
+            books (Sequence[Book]): The books with updated information.
+
+        Returns:
+            List[Book]: The books as stored after the update; IDs that no longer exist are missing.
+        """
+        if not books:
+            return []
+        rows = [(book.id,) + queries.book_params(book) for book in books]
+
+        def work(cursor) -> List[Book]:
+            return queries.to_books(execute_values(
+                cursor, queries.UPDATE_BOOKS, rows,
+                template = queries.UPDATE_BOOKS_TEMPLATE, page_size = len(rows), fetch = True
+            ))
+
+        try:
+            stored = self.db.run_in_transaction(work)
+        except Exception as e:
+            logger.error(f"Failed to update {len(books)} books: {e}")
+            raise RuntimeError("Failed to update books.")
+
+        stored_by_id = {book.id: book for book in stored}
+        for book in books:
+            self.page_cache.invalidate_book(book.id, stored_by_id.get(book.id))
+        self.cache.invalidate("book")
+        logger.info(f"{len(stored)} books updated successfully.")
+        return stored
+
+    def delete_books(self, book_ids: Sequence[int]) -> List[int]:
+        """
+        Deletes several books with a single DELETE ... WHERE book_id = ANY(...) and one commit.
+
+        Args:
+            book_ids (Sequence[int]): The IDs of the books to delete.
+
+        Returns:
+            List[int]: The IDs that were actually deleted.
+        """
+        if not book_ids:
+            return []
+        query = queries.DELETE_BOOKS
+        params = (list(book_ids),)
+        try:
+            deleted = [row[0] for row in self.db.fetch_results(query = query, params = params)]
+        except Exception as e:
+            logger.error(f"Failed to delete books {list(book_ids)}: {e}")
+            raise RuntimeError("Failed to delete books.")
+
+        for book_id in deleted:
+            self.page_cache.invalidate_book(book_id)
+        self.cache.invalidate("book")
+        logger.info(f"{len(deleted)} books deleted successfully.")
+        return deleted
+
     def get_books_by_author_name(self, author_name: str) -> List[Book]:
         """
         Fetches books by author name.
@@ -93,15 +387,39 @@ class Repository:
         Returns:
             List[Book]: A list of books by the given author.
         """
-        query = "SELECT * FROM book WHERE author = %s;"
-        params = (author_name)
+        query = queries.SELECT_BOOKS_BY_AUTHOR
+        params = (author_name,)
         try:
-            results = self.db.fetch_results(query = query, params = params)
-            return [Book(*result) for result in results]
+            # copied, so callers cannot modify the cached list
+            return list(self._read_through(
+                "book", ("author", author_name),
+                lambda: queries.to_books(self.db.fetch_results(query = query, params = params))
+            ))
         except Exception as e:
             logger.error(f"Failed to fetch books by author '{author_name}': {e}")
             return []
 
+    def search_books(self, text: str, limit: int = 50) -> List[Book]:
+        """
+        Searches books by title and author, tolerating typos and incomplete words.
+
+        Args:
+            text (str): The text typed by the user.
+            limit (int): Maximum number of books returned.
+
+        Returns:
+            List[Book]: The matching books, best match first.
+        """
+        params = queries.search_params(text, limit)
+        if params is None:
+            return []
+        try:
+            results = self.db.fetch_results(query = queries.SEARCH_BOOKS, params = params)
+            return queries.to_books(results)
+        except Exception as e:
+            logger.error(f"Failed to search books for '{text}': {e}")
+            raise RuntimeError("Failed to search books.")
+
     def get_publishers(self) -> List[Publisher]:
         """
         Fetches all publishers from the database.
@@ -109,14 +427,53 @@ class Repository:
         Returns:
             List[Publisher]: A list of Publisher objects.
         """
-        query = "SELECT * FROM publisher;"
+        query = queries.SELECT_ALL_PUBLISHERS
         try:
-            results = self.db.fetch_results(query = query)
-            return [Publisher(*result) for result in results]
+            return list(self._read_through(
+                "publisher", "all", lambda: queries.to_publishers(self.db.fetch_results(query = query))
+            ))
         except Exception as e:
             logger.error(f"Failed to fetch publishers: {e}")
             return []
 
+    def stream_publishers(self, itersize: Optional[int] = None) -> Iterator[List[Publisher]]:
+        """
+        Streams all publishers from the database through a server-side cursor.
+
+        Args:
+            itersize (Optional[int]): Number of publishers per batch. Defaults to STREAM_ITERSIZE.
+
+        Yields:
+            List[Publisher]: Consecutive batches of Publisher objects.
+        """
+        query = queries.SELECT_ALL_PUBLISHERS
+        try:
+            for rows in self.db.stream_results(query = query, itersize = itersize):
+                yield queries.to_publishers(rows)
+        except Exception as e:
+            logger.error(f"Failed to stream publishers: {e}")
+            raise RuntimeError("Failed to stream publishers.")
+
+    def get_publishers_page(self, after_id: int = 0, limit: Optional[int] = None) -> List[Publisher]:
+        """
+        Fetches one keyset page of publishers in ID order. Unlike ``stream_publishers`` it holds no
+        connection between pages, however long the reader takes to ask for the next one.
+
+        Args:
+            after_id (int): The last ID of the previous page, 0 for the first page.
+            limit (Optional[int]): Maximum number of publishers. Defaults to BOOK_PAGE_SIZE.
+
+        Returns:
+            List[Publisher]: The publishers of the page; fewer than ``limit`` on the last page.
+        """
+        query = queries.SELECT_PUBLISHERS_PAGE
+        params = (after_id, limit or self.page_size)
+        try:
+            return queries.to_publishers(self.db.fetch_results(query = query, params = params))
+        except Exception as e:
+            logger.error(f"Failed to fetch publishers after {after_id}: {e}")
+            raise RuntimeError("Failed to fetch publishers.")
+
     def get_all_members(self) -> List[Member]:
         """
         Fetches all members from the database.
@@ -124,14 +481,73 @@ class Repository:
         Returns:
             List[Member]: A list of Member objects.
         """
-        query = "SELECT * FROM member;"
+        query = queries.SELECT_ALL_MEMBERS
         try:
-            results = self.db.fetch_results(query = query)
-            return [Member(*result) for result in results]
+            return list(self._read_through(
+                "member", "all", lambda: queries.to_members(self.db.fetch_results(query = query))
+            ))
         except Exception as e:
             logger.error(f"Failed to fetch members: {e}")
             return []
 
+    def search_members(self, text: str, limit: int = 50) -> List[Member]:
+        """
+        Searches members by name and email, tolerating typos and incomplete words.
+
+        Args:
+            text (str): The text typed by the user.
+            limit (int): Maximum number of members returned.
+
+        Returns:
+            List[Member]: The matching members, best match first.
+        """
+        params = queries.search_params(text, limit)
+        if params is None:
+            return []
+        try:
+            results = self.db.fetch_results(query = queries.SEARCH_MEMBERS, params = params)
+            return queries.to_members(results)
+        except Exception as e:
+            logger.error(f"Failed to search members for '{text}': {e}")
+            raise RuntimeError("Failed to search members.")
+
+    def stream_members(self, itersize: Optional[int] = None) -> Iterator[List[Member]]:
+        """
+        Streams all members from the database through a server-side cursor.
+
+        Args:
+            itersize (Optional[int]): Number of members per batch. Defaults to STREAM_ITERSIZE.
+
+        Yields:
+            List[Member]: Consecutive batches of Member objects.
+        """
+        query = queries.SELECT_ALL_MEMBERS
+        try:
+            for rows in self.db.stream_results(query = query, itersize = itersize):
+                yield queries.to_members(rows)
+        except Exception as e:
+            logger.error(f"Failed to stream members: {e}")
+            raise RuntimeError("Failed to stream members.")
+
+    def get_members_page(self, after_id: int = 0, limit: Optional[int] = None) -> List[Member]:
+        """
+        Fetches one keyset page of members in ID order, holding no connection between pages.
+
+        Args:
+            after_id (int): The last ID of the previous page, 0 for the first page.
+            limit (Optional[int]): Maximum number of members. Defaults to BOOK_PAGE_SIZE.
+
+        Returns:
+            List[Member]: The members of the page; fewer than ``limit`` on the last page.
+        """
+        query = queries.SELECT_MEMBERS_PAGE
+        params = (after_id, limit or self.page_size)
+        try:
+            return queries.to_members(self.db.fetch_results(query = query, params = params))
+        except Exception as e:
+            logger.error(f"Failed to fetch members after {after_id}: {e}")
+            raise RuntimeError("Failed to fetch members.")
+
     def get_book_by_name(self, book_name: str) -> Optional[Book]:
         """
         Fetches a book by its title.
@@ -142,16 +558,19 @@ class Repository:
         Returns:
             Optional[Book]: The Book object if found, otherwise None.
         """
-        query = "SELECT * FROM book WHERE title = %s;"
-        params = (book_name)
+        query = queries.SELECT_BOOK_BY_TITLE
+        params = (book_name,)
         try:
-            result = self.db.fetch_results(query = query, params = params)
-            return Book(*result[0]) if result else None
+            result = self._read_through(
+                "book", ("title", book_name),
+                lambda: queries.to_books(self.db.fetch_results(query = query, params = params))
+            )
+            return result[0] if result else None
         except Exception as e:
             logger.error(f"Failed to fetch book '{book_name}': {e}")
             return None
 
-    def get_all_members_by_book(self, book_name: str) -> List[tuple]:
+    def get_all_members_by_book(self, book_name: str) -> List[BookBorrower]:
         """
         Fetches all members who borrowed a specific book.
 
@@ -159,32 +578,202 @@ class Repository:
             book_name (str): The title of the book.
 
         Returns:
-            List[tuple]: A list of tuples containing member and loan information.
+            List[BookBorrower]: One entry per loan of the book, most recent first.
         """
-        book = self.get_book_by_name(book_name)
-        if not book:
-            logger.warning(f"No book found with title '{book_name}'.")
-            return []
-
-        # not to sure on this
-        query = ""
-        params = (book_name)
+        query = queries.SELECT_BORROWERS_BY_BOOK
+        params = (book_name,)
         try:
-            return self.db.fetch_results(query = query, params = params)
+            return queries.to_book_borrowers(self.db.fetch_results(query = query, params = params))
         except Exception as e:
             logger.error(f"Failed to fetch members for book '{book_name}': {e}")
-            return []
+            raise RuntimeError("Failed to fetch members by book.")
+
+    def get_members_with_loans(self) -> List[Member]:
+        """
+        Fetches the members who have borrowed at least one book.
+
+        Returns:
+            List[Member]: The members with at least one loan, current or returned.
+        """
+        query = queries.SELECT_MEMBERS_WITH_LOANS
+        try:
+            return queries.to_members(self.db.fetch_results(query = query))
+        except Exception as e:
+            logger.error(f"Failed to fetch members with loans: {e}")
+            raise RuntimeError("Failed to fetch members with loans.")
+
+    def get_overdue_loans(self, as_of: Optional[date] = None) -> List[OverdueLoan]:
+        """
+        Fetches the loans that are not returned and past their due date.
+
+        Args:
+            as_of (Optional[date]): The day to measure against. Defaults to today.
 
-    def get_all_loans(self) -> List[tuple]:
+        Returns:
+            List[OverdueLoan]: The overdue loans, longest overdue first.
+        """
+        query = queries.SELECT_OVERDUE_LOANS
+        params = {"as_of": as_of or date.today()}
+        try:
+            return queries.to_overdue_loans(self.db.fetch_results(query = query, params = params))
+        except Exception as e:
+            logger.error(f"Failed to fetch overdue loans: {e}")
+            raise RuntimeError("Failed to fetch overdue loans.")
+
+    def get_all_loans(self) -> List[Loan]:
         """
         Fetches all loans from the database.
 
         Returns:
-            List[tuple]: A list of tuples containing loan information.
+            List[Loan]: A list of Loan objects.
         """
-        query = "SELECT * FROM loans;"
+        query = queries.SELECT_ALL_LOANS
         try:
-            return self.db.fetch_results(query = query)
+            return queries.to_loans(self.db.fetch_results(query = query))
         except Exception as e:
             logger.error(f"Failed to fetch loans: {e}")
             return []
+
+    def borrow_book(self, book_id: int, member_id: int, staff_id: int, loan_days: int) -> Optional[Loan]:
+        """
+        Lends a book in a single statement. The database refuses a second open loan of the same book,
+        so of several desks lending one copy at the same time exactly one succeeds.
+
+        Args:
+            book_id (int): The book being borrowed.
+            member_id (int): The borrowing member.
+            staff_id (int): The staff member at the desk.
+            loan_days (int): Days until the book is due.
+
+        Returns:
+            Optional[Loan]: The new loan, or None if the book is already on loan.
+        """
+        query = queries.BORROW_BOOK
+        params = {"book_id": book_id, "member_id": member_id, "staff_id": staff_id, "loan_days": loan_days}
+        try:
+            loans = queries.to_loans(self.db.fetch_results(query = query, params = params))
+        except Exception as e:
+            logger.error(f"Failed to lend book {book_id} to member {member_id}: {e}")
+            raise RuntimeError("Failed to borrow book.")
+        if loans:
+            logger.info(f"Book {book_id} lent to member {member_id}, due {loans[0].due_date}.")
+        return loans[0] if loans else None
+
+    def return_book(self, book_id: int) -> Optional[Loan]:
+        """
+        Closes the open loan of a book.
+
+        Args:
+            book_id (int): The book being returned.
+
+        Returns:
+            Optional[Loan]: The closed loan, or None if the book was not on loan.
+        """
+        query = queries.RETURN_BOOK
+        params = (book_id,)
+        try:
+            loans = queries.to_loans(self.db.fetch_results(query = query, params = params))
+        except Exception as e:
+            logger.error(f"Failed to return book {book_id}: {e}")
+            raise RuntimeError("Failed to return book.")
+        if loans:
+            logger.info(f"Book {book_id} returned by member {loans[0].member_id}.")
+        return loans[0] if loans else None
+
+    def renew_loan(self, book_id: int, loan_days: int, max_renewals: int) -> Optional[Loan]:
+        """
+        Extends the open loan of a book that is not overdue and has renewals left.
+
+        Args:
+            book_id (int): The book on loan.
+            loan_days (int): Days added to the due date.
+            max_renewals (int): Renewals allowed per loan.
+
+        Returns:
+            Optional[Loan]: The renewed loan, or None if the book is not on loan, is overdue or has
+            been renewed ``max_renewals`` times.
+        """
+        query = queries.RENEW_LOAN
+        params = {"book_id": book_id, "loan_days": loan_days, "max_renewals": max_renewals}
+        try:
+            loans = queries.to_loans(self.db.fetch_results(query = query, params = params))
+        except Exception as e:
+            logger.error(f"Failed to renew the loan of book {book_id}: {e}")
+            raise RuntimeError("Failed to renew loan.")
+        if loans:
+            logger.info(f"Loan of book {book_id} renewed until {loans[0].due_date}.")
+        return loans[0] if loans else None
+
+    def get_open_loan(self, book_id: int) -> Optional[Loan]:
+        """
+        Fetches the open loan of a book; a book without one is available.
+
+        Args:
+            book_id (int): The book to look up.
+
+        Returns:
+            Optional[Loan]: The open loan, or None if the book is on the shelf.
+        """
+        query = queries.SELECT_OPEN_LOAN
+        params = (book_id,)
+        try:
+            loans = queries.to_loans(self.db.fetch_results(query = query, params = params))
+        except Exception as e:
+            logger.error(f"Failed to fetch the open loan of book {book_id}: {e}")
+            raise RuntimeError("Failed to fetch loan.")
+        return loans[0] if loans else None
+
+    def get_availability(self, book_ids: Sequence[int]) -> Dict[int, bool]:
+        """
+        Tells for several books at once whether they are on the shelf.
+
+        Args:
+            book_ids (Sequence[int]): The books to look up.
+
+        Returns:
+            Dict[int, bool]: True for every book that is not on loan.
+        """
+        if not book_ids:
+            return {}
+        query = queries.SELECT_AVAILABILITY
+        params = (list(book_ids),)
+        try:
+            return dict(self.db.fetch_results(query = query, params = params))
+        except Exception as e:
+            logger.error(f"Failed to fetch the availability of books {list(book_ids)}: {e}")
+            raise RuntimeError("Failed to fetch availability.")
+
+    def get_open_loans(self, member_id: Optional[int] = None, limit: int = 1000) -> List[Loan]:
+        """
+        Fetches the books currently on loan, soonest due first.
+
+        Args:
+            member_id (Optional[int]): Only the loans of this member; all members if None.
+            limit (int): Maximum number of loans when listing every member's.
+
+        Returns:
+            List[Loan]: The open loans.
+        """
+        if member_id is None:
+            query, params = queries.SELECT_OPEN_LOANS, (limit,)
+        else:
+            query, params = queries.SELECT_MEMBER_OPEN_LOANS, (member_id,)
+        try:
+            return queries.to_loans(self.db.fetch_results(query = query, params = params))
+        except Exception as e:
+            logger.error(f"Failed to fetch open loans: {e}")
+            raise RuntimeError("Failed to fetch open loans.")
+
+    def get_all_staff(self) -> List[Staff]:
+        """
+        Fetches all staff members from the database.
+
+        Returns:
+            List[Staff]: A list of Staff objects.
+        """
+        query = queries.SELECT_ALL_STAFF
+        try:
+            return queries.to_staff(self.db.fetch_results(query = query))
+        except Exception as e:
+            logger.error(f"Failed to fetch staff: {e}")
+            return []
@@ -0,0 +1,442 @@
+"""
+Headless HTTP/JSON service over BookController, QueryController and LoanController, for kiosks and
+scripts that run without a desktop session.
+
+The server is asyncio-based (aiohttp). The controllers block, so every call runs on a bounded worker
+pool of SERVICE_WORKERS threads, which should not exceed POOL_MAX_SIZE. Full listings are streamed as
+JSON lines, one object per line, read a keyset page at a time so that a slow reader holds no
+connection between pages. Every GET carries an ETag derived from per-table change counters that this
+process keeps from the change notifications of migration 0007, so a client repeating a request with
+If-None-Match gets 304 Not Modified without a database round trip, and writers take no extra lock to
+keep the counters.
+
+Usage:
+
+    python service.py --host 0.0.0.0 --port 8080 --workers 8
+
+    curl localhost:8080/books?sort=title&limit=50
+    curl localhost:8080/books/stream
+    curl -X POST localhost:8080/loans -d '{"book_id": 1, "member_id": 2, "staff_id": 1}'
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, Optional, Sequence
+
+import psycopg2.errors
+from aiohttp import web
+
+import queries
+from controller import BookController, BookPageIterator, LoanController, QueryController
+from database import ChangeListener, Database, get_change_listener
+from events import ChangeKind, TableChange
+from utils import logger
+
+Handler = Callable[[web.Request], Awaitable[web.StreamResponse]]
+
+# results of a request larger than this are capped
+MAX_LIMIT = 1000
+
+
+def to_json(value: Any) -> Any:
+    """JSON encoding of model objects: named tuples become objects, dates ISO strings."""
+    if hasattr(value, "_asdict"):
+        return {key: to_json(item) for key, item in value._asdict().items()}
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return [to_json(item) for item in value]
+    return value
+
+
+def dumps(value: Any) -> str:
+    return json.dumps(to_json(value), separators = (",", ":"))
+
+
+def json_response(value: Any, status: int = 200, etag: Optional[str] = None) -> web.Response:
+    response = web.Response(text = dumps(value), status = status, content_type = "application/json")
+    if etag is not None:
+        response.headers["ETag"] = etag
+    return response
+
+
+def int_param(request: web.Request, name: str, default: int, maximum: int = MAX_LIMIT) -> int:
+    try:
+        value = int(request.query.get(name, default))
+    except ValueError:
+        raise web.HTTPBadRequest(text = dumps({"error": f"'{name}' must be an integer."}), content_type = "application/json")
+    return max(1, min(value, maximum))
+
+
+def required_param(request: web.Request, name: str) -> str:
+    value = request.query.get(name, "").strip()
+    if not value:
+        raise web.HTTPBadRequest(text = dumps({"error": f"'{name}' is required."}), content_type = "application/json")
+    return value
+
+
+async def json_body(request: web.Request, *required: str) -> Dict[str, Any]:
+    """Reads a JSON object from the request body and checks that the ``required`` fields are given."""
+    try:
+        body = await request.json()
+    except ValueError:
+        raise web.HTTPBadRequest(text = dumps({"error": "The body must be JSON."}), content_type = "application/json")
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(text = dumps({"error": "The body must be a JSON object."}), content_type = "application/json")
+    for name in required:
+        value = body.get(name)
+        if value is None or (isinstance(value, str) and not value.strip()):
+            raise web.HTTPBadRequest(text = dumps({"error": f"'{name}' is required."}), content_type = "application/json")
+    return body
+
+
+def integrity_error(error: BaseException) -> Optional[psycopg2.IntegrityError]:
+    """Returns the constraint violation a controller error was raised from, if any."""
+    while error is not None:
+        if isinstance(error, psycopg2.IntegrityError):
+            return error
+        error = error.__cause__ or error.__context__
+    return None
+
+
+class TableVersions:
+    """
+    Counts the committed changes of every table, as notified to this process. The versions are read
+    before the data they validate, so a notification that arrives while a response is being built
+    costs a client one refetch. Writes made through this service are counted as soon as they commit.
+    A write committed by another process is only counted when its notification arrives, so between
+    its commit and that moment a client revalidating with the old ETag still gets a 304.
+    """
+
+    def __init__(self, listener: ChangeListener) -> None:
+        self.listener = listener
+        # part of every ETag, so tags issued by an earlier run of the service never match
+        self.epoch = uuid.uuid4().hex
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        listener.changes.subscribe(self.on_change)
+
+    def on_change(self, change: TableChange) -> None:
+        with self._lock:
+            self._versions[change.table] = self._versions.get(change.table, 0) + 1
+
+    def snapshot(self, tables: Sequence[str]) -> Optional[Dict[str, int]]:
+        """
+        Returns the current version of each table, or None while the listener is disconnected, since
+        changes committed meanwhile are not counted until it reconnects and reloads every table.
+        """
+        if not self.listener.connected:
+            return None
+        with self._lock:
+            return {table: self._versions.get(table, 0) for table in tables}
+
+
+class LibraryService:
+    """
+    The routes of the service. Controllers are created once and shared by all worker threads; their
+    repositories draw connections from the process-wide pool.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self.executor = ThreadPoolExecutor(max_workers = workers, thread_name_prefix = "lms-service")
+        self.books = BookController()
+        self.queries = QueryController()
+        self.loans = LoanController()
+        self.versions = TableVersions(get_change_listener(self.queries.repository.db.connection_kwargs()))
+
+    async def call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Runs a blocking controller call on the worker pool."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, partial(fn, *args))
+
+    def etag(self, request: web.Request, tables: Sequence[str], daily: bool = False) -> Optional[str]:
+        """
+        Builds the ETag of a response that depends on ``tables`` and the query string. With ``daily``
+        the date is part of it too, for results such as overdue loans that change at midnight.
+        Returns None while the versions cannot be trusted.
+        """
+        versions = self.versions.snapshot(tables)
+        if versions is None:
+            return None
+        key = [self.versions.epoch, request.path_qs] + [f"{table}:{versions[table]}" for table in sorted(tables)]
+        if daily:
+            key.append(date.today().isoformat())
+        return f'W/"{hashlib.sha1("|".join(key).encode()).hexdigest()[:20]}"'
+
+    def cached(self, tables: Sequence[str], daily: bool = False) -> Callable[[Handler], Handler]:
+        """
+        Decorates a GET handler with conditional GET: answers 304 when If-None-Match still matches,
+        otherwise runs the handler and attaches the ETag. The versions are read before the data, so a
+        concurrent write can only make the ETag older than the data, never newer. See TableVersions
+        for the window in which a write of another process is not yet counted.
+        """
+        def decorate(handler: Handler) -> Handler:
+            async def wrapper(request: web.Request) -> web.StreamResponse:
+                etag = self.etag(request, tables, daily)
+                if etag is not None and etag in (tag.strip() for tag in request.headers.get("If-None-Match", "").split(",")):
+                    return web.Response(status = 304, headers = {"ETag": etag})
+                request["etag"] = etag
+                return await handler(request)
+            return wrapper
+        return decorate
+
+    def written(self, table: str, kind: ChangeKind, *row_ids: int) -> None:
+        """
+        Counts a committed write of this service at once, so a client revalidating right after its
+        own write never gets the listing from before it. The notification counts it again later.
+        """
+        self.versions.on_change(TableChange(table, kind, row_ids))
+
+    async def stream_lines(self, request: web.Request, batches: Iterator[Iterable[Any]]) -> web.StreamResponse:
+        """
+        Streams ``batches`` as JSON lines. Each batch is read on the worker pool, so the event loop keeps
+        serving other requests while the database is read. The batches should come from a keyset pager
+        rather than a server-side cursor, which would keep a pooled connection for as long as the client
+        takes to read. The status is sent before the first batch, so a failure midway is reported as a
+        last line holding an ``error`` object.
+        """
+        response = web.StreamResponse(headers = {"Content-Type": "application/x-ndjson"})
+        if request.get("etag") is not None:
+            response.headers["ETag"] = request["etag"]
+        await response.prepare(request)
+
+        done = object()
+        try:
+            while True:
+                batch = await self.call(next, batches, done)
+                if batch is done:
+                    break
+                await response.write("".join(dumps(item) + "\n" for item in batch).encode())
+        except RuntimeError as e:
+            await response.write((dumps({"error": str(e)}) + "\n").encode())
+        finally:
+            close = getattr(batches, "close", None)
+            if close is not None:
+                await self.call(close)
+        await response.write_eof()
+        return response
+
+    def routes(self) -> Sequence[web.RouteDef]:
+        cached = self.cached
+
+        @cached(("book",))
+        async def books_page(request: web.Request) -> web.Response:
+            sort_key = request.query.get("sort", "book_id")
+            if sort_key not in queries.BOOK_SORT_EXPRESSIONS:
+                raise web.HTTPBadRequest(text = dumps({"error": f"Cannot sort by '{sort_key}'."}), content_type = "application/json")
+            after = json.loads(request.query["after"]) if "after" in request.query else None
+            page = await self.call(
+                self.books.get_books_page, tuple(after) if after is not None else None,
+                int_param(request, "limit", 200), sort_key
+            )
+            return json_response({"books": page.books, "next_after": page.next_after}, etag = request["etag"])
+
+        @cached(("book",))
+        async def books_stream(request: web.Request) -> web.StreamResponse:
+            return await self.stream_lines(request, BookPageIterator(self.books, None, "book_id"))
+
+        @cached(("book",))
+        async def books_by_author(request: web.Request) -> web.Response:
+            books = await self.call(self.queries.get_book_by_author, required_param(request, "name"))
+            return json_response(books, etag = request["etag"])
+
+        @cached(("book",))
+        async def search_books(request: web.Request) -> web.Response:
+            books = await self.call(self.queries.search_books, required_param(request, "q"), int_param(request, "limit", 50))
+            return json_response(books, etag = request["etag"])
+
+        @cached(("member",))
+        async def search_members(request: web.Request) -> web.Response:
+            members = await self.call(self.queries.search_members, required_param(request, "q"), int_param(request, "limit", 50))
+            return json_response(members, etag = request["etag"])
+
+        @cached(("publisher",))
+        async def publishers(request: web.Request) -> web.StreamResponse:
+            return await self.stream_lines(request, self.queries.iter_publisher_pages())
+
+        @cached(("member",))
+        async def members(request: web.Request) -> web.StreamResponse:
+            return await self.stream_lines(request, self.queries.iter_member_pages())
+
+        @cached(("member", "loan"))
+        async def members_with_loans(request: web.Request) -> web.Response:
+            return json_response(await self.call(self.queries.get_members_with_loans), etag = request["etag"])
+
+        @cached(("book", "member", "loan"))
+        async def borrowers(request: web.Request) -> web.Response:
+            borrowers = await self.call(self.queries.get_all_member_by_book, required_param(request, "title"))
+            return json_response(borrowers, etag = request["etag"])
+
+        @cached(("book", "member", "loan"), daily = True)
+        async def overdue_loans(request: web.Request) -> web.Response:
+            return json_response(await self.call(self.queries.get_overdue_loans), etag = request["etag"])
+
+        @cached(("loan",))
+        async def open_loans(request: web.Request) -> web.Response:
+            loans = await self.call(self.loans.get_open_loans, request.query.get("member_id"))
+            return json_response(loans, etag = request["etag"])
+
+        @cached(("book", "loan"))
+        async def most_borrowed(request: web.Request) -> web.Response:
+            books = await self.call(self.queries.get_most_borrowed_books, int_param(request, "limit", 50))
+            return json_response(books, etag = request["etag"])
+
+        @cached(("member", "loan"))
+        async def active_members(request: web.Request) -> web.Response:
+            members = await self.call(self.queries.get_active_members, int_param(request, "limit", 50))
+            return json_response(members, etag = request["etag"])
+
+        @cached(("loan",), daily = True)
+        async def daily_circulation(request: web.Request) -> web.Response:
+            days = await self.call(self.queries.get_daily_circulation, int_param(request, "days", 30, 3650))
+            return json_response(days, etag = request["etag"])
+
+        @cached(("book",))
+        async def books_per_decade(request: web.Request) -> web.Response:
+            return json_response(await self.call(self.queries.get_books_per_decade), etag = request["etag"])
+
+        @cached(("loan",), daily = True)
+        async def loans_per_month(request: web.Request) -> web.Response:
+            months = await self.call(self.queries.get_loans_per_month, int_param(request, "months", 24, 600))
+            return json_response(months, etag = request["etag"])
+
+        async def add_book(request: web.Request) -> web.Response:
+            body = await json_body(request, "title")
+            book = await self.call(
+                self.books.add_book, body.get("title"), body.get("author"), body.get("publisher_id"),
+                body.get("isbn"), body.get("year_published")
+            )
+            self.written("book", ChangeKind.INSERT, book.id)
+            return json_response(book, status = 201)
+
+        async def update_book(request: web.Request) -> web.Response:
+            body = await json_body(request, "title")
+            book = await self.call(
+                self.books.update_book, int(request.match_info["book_id"]), body.get("title"), body.get("author"),
+                body.get("publisher_id"), body.get("isbn"), body.get("year_published")
+            )
+            if book is None:
+                raise web.HTTPNotFound(text = dumps({"error": "No such book."}), content_type = "application/json")
+            self.written("book", ChangeKind.UPDATE, book.id)
+            return json_response(book)
+
+        async def delete_book(request: web.Request) -> web.Response:
+            deleted = await self.call(self.books.delete_by_ids, [int(request.match_info["book_id"])])
+            if not deleted:
+                raise web.HTTPNotFound(text = dumps({"error": "No such book."}), content_type = "application/json")
+            self.written("book", ChangeKind.DELETE, *deleted)
+            return web.Response(status = 204)
+
+        async def borrow(request: web.Request) -> web.Response:
+            body = await json_body(request, "book_id", "member_id", "staff_id")
+            loan = await self.call(self.loans.borrow, body.get("book_id"), body.get("member_id"), body.get("staff_id"))
+            if loan is None:
+                raise web.HTTPConflict(text = dumps({"error": "The book is already on loan."}), content_type = "application/json")
+            self.written("loan", ChangeKind.INSERT, loan.id)
+            return json_response(loan, status = 201)
+
+        async def return_book(request: web.Request) -> web.Response:
+            loan = await self.call(self.loans.return_book, request.match_info["book_id"])
+            if loan is None:
+                raise web.HTTPConflict(text = dumps({"error": "The book is not on loan."}), content_type = "application/json")
+            self.written("loan", ChangeKind.UPDATE, loan.id)
+            return json_response(loan)
+
+        async def renew(request: web.Request) -> web.Response:
+            loan = await self.call(self.loans.renew, request.match_info["book_id"])
+            if loan is None:
+                raise web.HTTPConflict(text = dumps({"error": "The loan cannot be renewed."}), content_type = "application/json")
+            self.written("loan", ChangeKind.UPDATE, loan.id)
+            return json_response(loan)
+
+        return [
+            web.get("/books", books_page),
+            web.get("/books/stream", books_stream),
+            web.get("/books/by-author", books_by_author),
+            web.get("/books/search", search_books),
+            web.post("/books", add_book),
+            web.put("/books/{book_id:\\d+}", update_book),
+            web.delete("/books/{book_id:\\d+}", delete_book),
+            web.get("/members/stream", members),
+            web.get("/members/search", search_members),
+            web.get("/members/with-loans", members_with_loans),
+            web.get("/publishers/stream", publishers),
+            web.get("/loans", open_loans),
+            web.get("/loans/overdue", overdue_loans),
+            web.get("/loans/borrowers", borrowers),
+            web.post("/loans", borrow),
+            web.post("/loans/{book_id:\\d+}/return", return_book),
+            web.post("/loans/{book_id:\\d+}/renew", renew),
+            web.get("/reports/most-borrowed", most_borrowed),
+            web.get("/reports/active-members", active_members),
+            web.get("/reports/daily-circulation", daily_circulation),
+            web.get("/analytics/books-per-decade", books_per_decade),
+            web.get("/analytics/loans-per-month", loans_per_month),
+        ]
+
+
+@web.middleware
+async def error_middleware(request: web.Request, handler: Handler) -> web.StreamResponse:
+    """
+    Maps controller errors onto status codes: bad input is 400, a write conflicting with a unique
+    constraint 409, any other constraint violation (unknown reference, missing value) 400, anything
+    else 500.
+    """
+    try:
+        return await handler(request)
+    except web.HTTPException:
+        raise
+    except (ValueError, TypeError) as e:
+        return json_response({"error": f"Invalid request: {e}"}, status = 400)
+    except RuntimeError as e:
+        violation = integrity_error(e)
+        if violation is not None:
+            detail = violation.diag.message_detail or violation.diag.message_primary
+            status = 409 if isinstance(violation, psycopg2.errors.UniqueViolation) else 400
+            return json_response({"error": f"{e} {detail}"}, status = status)
+        logger.error(f"{request.method} {request.path_qs} failed: {e}")
+        return json_response({"error": str(e)}, status = 500)
+
+
+def create_app(workers: Optional[int] = None) -> web.Application:
+    """
+    Builds the application. Reads config.env first, since the controllers read their settings from it.
+
+    Args:
+        workers (Optional[int]): Worker threads for controller calls. Defaults to SERVICE_WORKERS.
+    """
+    Database.load_configuration()
+    service = LibraryService(workers or int(os.getenv("SERVICE_WORKERS", "8")))
+    app = web.Application(middlewares = [error_middleware])
+    app.add_routes(service.routes())
+
+    async def shutdown(_: web.Application) -> None:
+        service.executor.shutdown(wait = False)
+
+    app.on_cleanup.append(shutdown)
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default = None, help = "defaults to SERVICE_HOST")
+    parser.add_argument("--port", type = int, default = None, help = "defaults to SERVICE_PORT")
+    parser.add_argument("--workers", type = int, default = None, help = "defaults to SERVICE_WORKERS")
+    args = parser.parse_args()
+
+    app = create_app(args.workers)
+    web.run_app(
+        app,
+        host = args.host or os.getenv("SERVICE_HOST", "127.0.0.1"),
+        port = args.port or int(os.getenv("SERVICE_PORT", "8080")),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+-- Indexes for the lookups the repository runs: books by author and title, loans by book and member.
+CREATE INDEX IF NOT EXISTS book_author_idx ON book (author);
+CREATE INDEX IF NOT EXISTS book_title_idx ON book (title);
+CREATE INDEX IF NOT EXISTS book_publisher_id_idx ON book (publisher_id);
+
+CREATE INDEX IF NOT EXISTS loan_book_id_idx ON loan (book_id);
+CREATE INDEX IF NOT EXISTS loan_member_id_idx ON loan (member_id);
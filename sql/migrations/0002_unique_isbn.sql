@@ -0,0 +1,2 @@
+-- ISBNs identify an edition, so no two books may share one; books without an ISBN are unaffected.
+CREATE UNIQUE INDEX IF NOT EXISTS book_isbn_key ON book (isbn);
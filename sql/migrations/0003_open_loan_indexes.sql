@@ -0,0 +1,3 @@
+-- Books currently on loan and a member's open loans only ever touch rows that are not returned yet.
+CREATE INDEX IF NOT EXISTS loan_open_book_id_idx ON loan (book_id) WHERE date_returned IS NULL;
+CREATE INDEX IF NOT EXISTS loan_open_member_id_idx ON loan (member_id) WHERE date_returned IS NULL;
@@ -0,0 +1,5 @@
+-- Keyset pagination of the book listing orders by (sort expression, book_id); these match
+-- queries.BOOK_SORT_EXPRESSIONS exactly so each page is a short index range scan.
+CREATE INDEX IF NOT EXISTS book_title_keyset_idx ON book ((title COLLATE "C"), book_id);
+CREATE INDEX IF NOT EXISTS book_author_keyset_idx ON book ((author COLLATE "C"), book_id);
+CREATE INDEX IF NOT EXISTS book_year_keyset_idx ON book ((COALESCE(year_published, 0)), book_id);
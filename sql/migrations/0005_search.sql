@@ -0,0 +1,17 @@
+-- Full-text and typo-tolerant search over books and members (see queries.SEARCH_BOOKS and SEARCH_MEMBERS).
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- 'simple' keeps names and titles unstemmed, so prefix matching while typing behaves predictably
+ALTER TABLE book ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', title), 'A') || setweight(to_tsvector('simple', author), 'B')
+) STORED;
+CREATE INDEX IF NOT EXISTS book_search_vector_idx ON book USING gin (search_vector);
+CREATE INDEX IF NOT EXISTS book_title_trgm_idx ON book USING gin (title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS book_author_trgm_idx ON book USING gin (author gin_trgm_ops);
+
+ALTER TABLE member ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', first_name || ' ' || last_name), 'A') || setweight(to_tsvector('simple', email), 'B')
+) STORED;
+CREATE INDEX IF NOT EXISTS member_search_vector_idx ON member USING gin (search_vector);
+CREATE INDEX IF NOT EXISTS member_name_trgm_idx ON member USING gin ((first_name || ' ' || last_name) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS member_email_trgm_idx ON member USING gin (email gin_trgm_ops);
@@ -0,0 +1,3 @@
+-- Overdue loans are open loans past their due date; only open loans are indexed, so the index stays
+-- small however long the loan history grows.
+CREATE INDEX IF NOT EXISTS loan_open_due_date_idx ON loan (due_date) WHERE date_returned IS NULL;
@@ -0,0 +1,62 @@
+-- Publish every committed change to book, member, loan and publisher on the 'lms_changes' channel, so
+-- running clients can patch the affected rows instead of polling (see database.ChangeListener).
+--
+-- Triggers fire once per statement and send the changed IDs in one payload. A statement touching more
+-- rows than fit comfortably in a NOTIFY payload (8000 bytes) sends RELOAD instead, as does TRUNCATE.
+CREATE OR REPLACE FUNCTION lms_notify_changes() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    changed_ids integer[];
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        PERFORM pg_notify('lms_changes', json_build_object('table', TG_TABLE_NAME, 'op', 'RELOAD')::text);
+        RETURN NULL;
+    END IF;
+
+    EXECUTE format('SELECT array_agg(%I ORDER BY %I) FROM changed_rows', TG_ARGV[0], TG_ARGV[0]) INTO changed_ids;
+    IF changed_ids IS NULL THEN
+        RETURN NULL;
+    ELSIF cardinality(changed_ids) > 500 THEN
+        PERFORM pg_notify('lms_changes', json_build_object('table', TG_TABLE_NAME, 'op', 'RELOAD')::text);
+    ELSE
+        PERFORM pg_notify(
+            'lms_changes', json_build_object('table', TG_TABLE_NAME, 'op', TG_OP, 'ids', changed_ids)::text
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DO $$
+DECLARE
+    tracked RECORD;
+BEGIN
+    FOR tracked IN
+        SELECT * FROM (VALUES ('book', 'book_id'), ('member', 'member_id'), ('loan', 'loan_id'),
+                              ('publisher', 'publisher_id')) AS t (table_name, id_column)
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tracked.table_name || '_notify_insert', tracked.table_name);
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER INSERT ON %I REFERENCING NEW TABLE AS changed_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION lms_notify_changes(%L)',
+            tracked.table_name || '_notify_insert', tracked.table_name, tracked.id_column
+        );
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tracked.table_name || '_notify_update', tracked.table_name);
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER UPDATE ON %I REFERENCING NEW TABLE AS changed_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION lms_notify_changes(%L)',
+            tracked.table_name || '_notify_update', tracked.table_name, tracked.id_column
+        );
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tracked.table_name || '_notify_delete', tracked.table_name);
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER DELETE ON %I REFERENCING OLD TABLE AS changed_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION lms_notify_changes(%L)',
+            tracked.table_name || '_notify_delete', tracked.table_name, tracked.id_column
+        );
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tracked.table_name || '_notify_truncate', tracked.table_name);
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER TRUNCATE ON %I FOR EACH STATEMENT EXECUTE FUNCTION lms_notify_changes(%L)',
+            tracked.table_name || '_notify_truncate', tracked.table_name, tracked.id_column
+        );
+    END LOOP;
+END;
+$$;
@@ -0,0 +1,24 @@
+-- A copy can be out on at most one loan at a time. The unique partial index makes the database refuse
+-- a second open loan of the same book, so concurrent desks cannot lend one copy twice, and it answers
+-- "is this book available" with a single index probe however long the loan history grows.
+
+-- Older duplicates of an open loan were returned when the copy was lent again.
+UPDATE loan l
+SET date_returned = (
+    SELECT min(n.date_borrowed) FROM loan n
+    WHERE n.book_id = l.book_id AND n.date_returned IS NULL
+      AND (n.date_borrowed, n.loan_id) > (l.date_borrowed, l.loan_id)
+)
+WHERE l.date_returned IS NULL
+  AND EXISTS (
+    SELECT 1 FROM loan n
+    WHERE n.book_id = l.book_id AND n.date_returned IS NULL
+      AND (n.date_borrowed, n.loan_id) > (l.date_borrowed, l.loan_id)
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS loan_open_book_id_key ON loan (book_id) WHERE date_returned IS NULL;
+-- superseded by the unique index above
+DROP INDEX IF EXISTS loan_open_book_id_idx;
+
+-- Renewals are capped per loan.
+ALTER TABLE loan ADD COLUMN IF NOT EXISTS renewals SMALLINT NOT NULL DEFAULT 0;
@@ -0,0 +1,143 @@
+-- Circulation statistics kept up to date as loans are written, so reports read a few indexed rows
+-- instead of aggregating the whole loan history (see reporting.py).
+--
+-- book_circulation, member_circulation and daily_circulation are maintained incrementally by
+-- statement-level triggers on loan: every statement contributes +1 for each new row version and -1
+-- for each old one, summed per key, so a renewal nets to nothing and a return moves one loan from
+-- open to closed. Overdue counts change with the calendar rather than with writes, so
+-- overdue_by_publisher is a materialized view refreshed concurrently on a schedule.
+
+CREATE TABLE IF NOT EXISTS book_circulation (
+    book_id INTEGER PRIMARY KEY REFERENCES book (book_id) ON DELETE CASCADE,
+    borrow_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS book_circulation_borrow_count_idx ON book_circulation (borrow_count DESC, book_id);
+
+CREATE TABLE IF NOT EXISTS member_circulation (
+    member_id INTEGER PRIMARY KEY REFERENCES member (member_id) ON DELETE CASCADE,
+    open_loans INTEGER NOT NULL DEFAULT 0,
+    total_loans INTEGER NOT NULL DEFAULT 0
+);
+-- members with books out, most first; members with nothing out are not indexed
+CREATE INDEX IF NOT EXISTS member_circulation_open_loans_idx
+    ON member_circulation (open_loans DESC, total_loans DESC, member_id) WHERE open_loans > 0;
+
+CREATE TABLE IF NOT EXISTS daily_circulation (
+    day DATE PRIMARY KEY,
+    checkouts INTEGER NOT NULL DEFAULT 0,
+    returns INTEGER NOT NULL DEFAULT 0
+);
+
+DO $$
+BEGIN
+    CREATE TYPE lms_loan_delta AS (book_id INTEGER, member_id INTEGER, date_borrowed DATE, date_returned DATE, sign INTEGER);
+EXCEPTION WHEN duplicate_object THEN
+    NULL;
+END;
+$$;
+
+-- Keys are written in order, so concurrent statements lock summary rows in the same order. Loans
+-- removed by deleting their book or member are skipped: the summary row went with the parent row.
+CREATE OR REPLACE FUNCTION lms_apply_loan_deltas(deltas lms_loan_delta[]) RETURNS void LANGUAGE sql AS $$
+    INSERT INTO book_circulation AS c (book_id, borrow_count)
+    SELECT d.book_id, sum(d.sign) FROM unnest(deltas) AS d
+    WHERE EXISTS (SELECT 1 FROM book b WHERE b.book_id = d.book_id)
+    GROUP BY d.book_id HAVING sum(d.sign) <> 0 ORDER BY d.book_id
+    ON CONFLICT (book_id) DO UPDATE SET borrow_count = c.borrow_count + EXCLUDED.borrow_count;
+
+    INSERT INTO member_circulation AS c (member_id, open_loans, total_loans)
+    SELECT member_id, open_loans, total_loans FROM (
+        SELECT d.member_id, coalesce(sum(d.sign) FILTER (WHERE d.date_returned IS NULL), 0) AS open_loans,
+               sum(d.sign) AS total_loans
+        FROM unnest(deltas) AS d
+        WHERE EXISTS (SELECT 1 FROM member m WHERE m.member_id = d.member_id)
+        GROUP BY d.member_id
+    ) AS d
+    WHERE open_loans <> 0 OR total_loans <> 0 ORDER BY member_id
+    ON CONFLICT (member_id) DO UPDATE
+        SET open_loans = c.open_loans + EXCLUDED.open_loans, total_loans = c.total_loans + EXCLUDED.total_loans;
+
+    INSERT INTO daily_circulation AS c (day, checkouts, returns)
+    SELECT day, sum(checkouts), sum(returns) FROM (
+        SELECT date_borrowed AS day, sign AS checkouts, 0 AS returns FROM unnest(deltas)
+        UNION ALL
+        SELECT date_returned, 0, sign FROM unnest(deltas) WHERE date_returned IS NOT NULL
+    ) AS d
+    GROUP BY day HAVING sum(checkouts) <> 0 OR sum(returns) <> 0 ORDER BY day
+    ON CONFLICT (day) DO UPDATE
+        SET checkouts = c.checkouts + EXCLUDED.checkouts, returns = c.returns + EXCLUDED.returns;
+$$;
+
+CREATE OR REPLACE FUNCTION lms_track_circulation() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        -- the summaries may already be truncated along with book or member in the same statement
+        DELETE FROM book_circulation;
+        DELETE FROM member_circulation;
+        DELETE FROM daily_circulation;
+    ELSIF TG_OP = 'INSERT' THEN
+        PERFORM lms_apply_loan_deltas(ARRAY(
+            SELECT (book_id, member_id, date_borrowed, date_returned, 1)::lms_loan_delta FROM new_rows
+        ));
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM lms_apply_loan_deltas(ARRAY(
+            SELECT (book_id, member_id, date_borrowed, date_returned, -1)::lms_loan_delta FROM old_rows
+        ));
+    ELSE
+        PERFORM lms_apply_loan_deltas(ARRAY(
+            SELECT (book_id, member_id, date_borrowed, date_returned, 1)::lms_loan_delta FROM new_rows
+            UNION ALL
+            SELECT (book_id, member_id, date_borrowed, date_returned, -1)::lms_loan_delta FROM old_rows
+        ));
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS loan_circulation_insert ON loan;
+CREATE TRIGGER loan_circulation_insert AFTER INSERT ON loan REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION lms_track_circulation();
+DROP TRIGGER IF EXISTS loan_circulation_update ON loan;
+CREATE TRIGGER loan_circulation_update AFTER UPDATE ON loan REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION lms_track_circulation();
+DROP TRIGGER IF EXISTS loan_circulation_delete ON loan;
+CREATE TRIGGER loan_circulation_delete AFTER DELETE ON loan REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION lms_track_circulation();
+DROP TRIGGER IF EXISTS loan_circulation_truncate ON loan;
+CREATE TRIGGER loan_circulation_truncate AFTER TRUNCATE ON loan
+    FOR EACH STATEMENT EXECUTE FUNCTION lms_track_circulation();
+
+-- Recomputes every summary from the loan history; used for the backfill below and by
+-- reporting.rebuild_summaries to repair drift.
+CREATE OR REPLACE FUNCTION lms_rebuild_circulation() RETURNS void LANGUAGE sql AS $$
+    DELETE FROM book_circulation;
+    DELETE FROM member_circulation;
+    DELETE FROM daily_circulation;
+
+    INSERT INTO book_circulation (book_id, borrow_count)
+    SELECT book_id, count(*) FROM loan GROUP BY book_id;
+
+    INSERT INTO member_circulation (member_id, open_loans, total_loans)
+    SELECT member_id, count(*) FILTER (WHERE date_returned IS NULL), count(*) FROM loan GROUP BY member_id;
+
+    INSERT INTO daily_circulation (day, checkouts, returns)
+    SELECT day, sum(checkouts), sum(returns) FROM (
+        SELECT date_borrowed AS day, count(*) AS checkouts, 0 AS returns FROM loan GROUP BY date_borrowed
+        UNION ALL
+        SELECT date_returned, 0, count(*) FROM loan WHERE date_returned IS NOT NULL GROUP BY date_returned
+    ) AS d
+    GROUP BY day;
+$$;
+
+SELECT lms_rebuild_circulation();
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS overdue_by_publisher AS
+SELECT p.publisher_id, p.name, count(*) AS overdue_loans, max(CURRENT_DATE - l.due_date) AS max_days_overdue,
+       CURRENT_DATE AS as_of
+FROM loan l
+JOIN book b ON b.book_id = l.book_id
+JOIN publisher p ON p.publisher_id = b.publisher_id
+WHERE l.date_returned IS NULL AND l.due_date < CURRENT_DATE
+GROUP BY p.publisher_id, p.name;
+-- required by REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE UNIQUE INDEX IF NOT EXISTS overdue_by_publisher_key ON overdue_by_publisher (publisher_id);
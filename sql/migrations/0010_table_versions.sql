@@ -0,0 +1,35 @@
+-- A version number per table, bumped by every statement that changes it, so HTTP clients can
+-- revalidate a cached listing with one primary-key lookup (see service.py). The bump is an ordinary
+-- row update, so a new version becomes visible exactly when the change that caused it commits.
+-- Statements that match no rows bump it too, which only costs clients one needless refetch.
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name VARCHAR(63) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO table_versions (table_name)
+VALUES ('book'), ('member'), ('loan'), ('publisher'), ('staff')
+ON CONFLICT (table_name) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION lms_bump_table_version() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = TG_TABLE_NAME;
+    RETURN NULL;
+END;
+$$;
+
+DO $$
+DECLARE
+    tracked TEXT;
+BEGIN
+    FOREACH tracked IN ARRAY ARRAY['book', 'member', 'loan', 'publisher', 'staff']
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tracked || '_bump_version', tracked);
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I '
+            'FOR EACH STATEMENT EXECUTE FUNCTION lms_bump_table_version()',
+            tracked || '_bump_version', tracked
+        );
+    END LOOP;
+END;
+$$;
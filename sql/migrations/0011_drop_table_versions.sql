@@ -0,0 +1,16 @@
+-- Reverts 0010. Its per-statement UPDATE of one table_versions row per table held that row locked
+-- until commit, so every writer to a table queued behind the others. service.py now versions tables
+-- in process from the change notifications of 0007, which take no lock on the write path.
+DO $$
+DECLARE
+    tracked TEXT;
+BEGIN
+    FOREACH tracked IN ARRAY ARRAY['book', 'member', 'loan', 'publisher', 'staff']
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tracked || '_bump_version', tracked);
+    END LOOP;
+END;
+$$;
+
+DROP FUNCTION IF EXISTS lms_bump_table_version();
+DROP TABLE IF EXISTS table_versions;
@@ -0,0 +1,37 @@
+-- Spreads each day of daily_circulation over 16 slot rows. With one row per day,
+-- every checkout and return of the day upserted the same row and held its lock until commit, so the
+-- desks queued on it. Each connection now writes the slot of its backend PID, and readers sum the
+-- slots of a day (see reporting.SELECT_DAILY_CIRCULATION). Existing rows stay in slot 0.
+ALTER TABLE daily_circulation ADD COLUMN IF NOT EXISTS slot SMALLINT NOT NULL DEFAULT 0;
+ALTER TABLE daily_circulation DROP CONSTRAINT IF EXISTS daily_circulation_pkey;
+ALTER TABLE daily_circulation ADD PRIMARY KEY (day, slot);
+
+CREATE OR REPLACE FUNCTION lms_apply_loan_deltas(deltas lms_loan_delta[]) RETURNS void LANGUAGE sql AS $$
+    INSERT INTO book_circulation AS c (book_id, borrow_count)
+    SELECT d.book_id, sum(d.sign) FROM unnest(deltas) AS d
+    WHERE EXISTS (SELECT 1 FROM book b WHERE b.book_id = d.book_id)
+    GROUP BY d.book_id HAVING sum(d.sign) <> 0 ORDER BY d.book_id
+    ON CONFLICT (book_id) DO UPDATE SET borrow_count = c.borrow_count + EXCLUDED.borrow_count;
+
+    INSERT INTO member_circulation AS c (member_id, open_loans, total_loans)
+    SELECT member_id, open_loans, total_loans FROM (
+        SELECT d.member_id, coalesce(sum(d.sign) FILTER (WHERE d.date_returned IS NULL), 0) AS open_loans,
+               sum(d.sign) AS total_loans
+        FROM unnest(deltas) AS d
+        WHERE EXISTS (SELECT 1 FROM member m WHERE m.member_id = d.member_id)
+        GROUP BY d.member_id
+    ) AS d
+    WHERE open_loans <> 0 OR total_loans <> 0 ORDER BY member_id
+    ON CONFLICT (member_id) DO UPDATE
+        SET open_loans = c.open_loans + EXCLUDED.open_loans, total_loans = c.total_loans + EXCLUDED.total_loans;
+
+    INSERT INTO daily_circulation AS c (day, slot, checkouts, returns)
+    SELECT day, (pg_backend_pid() % 16)::smallint, sum(checkouts), sum(returns) FROM (
+        SELECT date_borrowed AS day, sign AS checkouts, 0 AS returns FROM unnest(deltas)
+        UNION ALL
+        SELECT date_returned, 0, sign FROM unnest(deltas) WHERE date_returned IS NOT NULL
+    ) AS d
+    GROUP BY day HAVING sum(checkouts) <> 0 OR sum(returns) <> 0 ORDER BY day
+    ON CONFLICT (day, slot) DO UPDATE
+        SET checkouts = c.checkouts + EXCLUDED.checkouts, returns = c.returns + EXCLUDED.returns;
+$$;
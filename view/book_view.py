@@ -1,21 +1,49 @@
-from typing import Tuple
+from typing import List, Optional, Tuple
 
+from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QFormLayout, QLineEdit, QLabel, QPushButton, QHBoxLayout,
-    QTableWidget, QTableWidgetItem, QMessageBox
+    QTableView, QAbstractItemView, QMessageBox, QProgressBar
 )
 
-from controller import BookController
+from cache import book_keyset
+from controller import BookController, to_optional_int
+from events import ChangeEvent, ChangeKind
+from model import Book
 from utils import logger
+from view.table_model import ColumnTableModel
+from view.worker import TaskRunner
+
+BOOK_HEADERS = ["Book ID", "Title", "Author", "Publisher ID", "ISBN", "Year"]
+
+# columns the listing can be ordered by when their header is clicked
+BOOK_SORT_KEYS = {0: "book_id", 1: "title", 2: "author", 5: "year_published"}
+
+
+def book_row(book: Book) -> Tuple:
+    """Map a Book onto the cell values of the books table."""
+    return book.id, book.title, book.author, book.publisher_id, book.isbn, book.year_published
 
 
 class BookTab(QWidget):
     """Tab widget for managing books, including adding, updating, and deleting book records."""
 
-    def __init__(self) -> None:
-        """Initialize the BookTab and set up the UI."""
+    # re-emits controller change events, which may come from worker threads, on the GUI thread
+    book_changed = pyqtSignal(object)
+
+    def __init__(self, controller: Optional[BookController] = None) -> None:
+        """
+        Initialize the BookTab and set up the UI.
+
+        Args:
+            controller (Optional[BookController]): A controller created beforehand, e.g. off the GUI thread.
+        """
         super().__init__()
-        self.controller = BookController()
+        self.controller = controller or BookController()
+        self.runner = TaskRunner(self)
+        self.sort_key = "book_id"
+        self.book_changed.connect(self.on_book_changed)
+        self.controller.changes.subscribe(self.book_changed.emit)
         self.init_ui()
         self.refresh_book_table()
 
@@ -28,9 +56,11 @@ class BookTab(QWidget):
         self.create_form_fields()
         self.create_buttons()
         self.setup_books_table()
+        self.setup_progress_bar()
 
         self.main_layout.addLayout(self.form_layout)
         self.main_layout.addLayout(self.button_layout)
+        self.main_layout.addWidget(self.progress_bar)
         self.main_layout.addWidget(self.books_table)
         self.setLayout(self.main_layout)
 
@@ -72,13 +102,13 @@ class BookTab(QWidget):
             }
 
             /* Table styling for a clean and modern look */
-            QTableWidget {
+            QTableView {
                 border: 1px solid #ddd;
                 font-size: 13px;
                 background: #fff;
                 gridline-color: #ccc;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
                 border-bottom: 1px solid #eee;
             }
@@ -124,31 +154,94 @@ class BookTab(QWidget):
 
     def setup_books_table(self) -> None:
         """Set up the book table for displaying book records."""
-        self.books_table = QTableWidget()
-        self.books_table.setColumnCount(6)
-        self.books_table.setHorizontalHeaderLabels(["Book ID", "Title", "Author", "Publisher ID", "ISBN", "Year"])
-        self.books_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.books_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.books_model = ColumnTableModel(BOOK_HEADERS, self, runner = self.runner)
+        self.books_model.fetch_failed.connect(self.on_fetch_failed)
+
+        self.books_table = QTableView()
+        self.books_table.setModel(self.books_model)
+        self.books_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.books_table.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.books_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.books_table.verticalHeader().setVisible(False)
         self.books_table.horizontalHeader().setStretchLastSection(True)
+        self.books_table.horizontalHeader().setSortIndicatorShown(True)
+        self.books_table.horizontalHeader().setSortIndicator(0, Qt.AscendingOrder)
+        self.books_table.horizontalHeader().sectionClicked.connect(self.sort_by_column)
+
+    def setup_progress_bar(self) -> None:
+        """Set up a busy indicator that is shown while database calls are running."""
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setMaximumHeight(6)
+        self.progress_bar.setTextVisible(False)
+        self.progress_bar.setVisible(False)
+        self.runner.busy_changed.connect(self.progress_bar.setVisible)
+
+    def sort_by_column(self, column: int) -> None:
+        """Re-list the books ordered by the clicked column, if it is sortable."""
+        sort_key = BOOK_SORT_KEYS.get(column)
+        if sort_key is None:
+            return
+        self.books_table.horizontalHeader().setSortIndicator(column, Qt.AscendingOrder)
+        if sort_key != self.sort_key:
+            self.sort_key = sort_key
+            self.refresh_book_table()
 
     def refresh_book_table(self) -> None:
-        """Refresh the book table with the latest records from the database."""
+        """Refresh the book table; the first page is shown immediately and later pages load on scroll."""
         try:
-            self.books_table.setRowCount(0)
-            books = self.controller.getall()
-
-            for book_index, book in enumerate(books):
-                self.books_table.insertRow(book_index)
-                self.books_table.setItem(book_index, 0, QTableWidgetItem(str(book.id)))
-                self.books_table.setItem(book_index, 1, QTableWidgetItem(book.title))
-                self.books_table.setItem(book_index, 2, QTableWidgetItem(book.author))
-                self.books_table.setItem(book_index, 3, QTableWidgetItem(str(book.publisher_id)))
-                self.books_table.setItem(book_index, 4, QTableWidgetItem(book.isbn))
-                self.books_table.setItem(book_index, 5, QTableWidgetItem(str(book.year_published)))
+            self.books_model.reset(
+                BOOK_HEADERS,
+                batches = self.controller.iter_book_pages(sort_key = self.sort_key),
+                row_mapper = book_row
+            )
         except Exception as e:
             logger.critical(f"Failed to refresh the book table: {e}")
             QMessageBox.critical(self, "Error", "Failed to retrieve books. Check the logs for details.")
 
+    def on_book_changed(self, event: ChangeEvent) -> None:
+        """Patch the single row touched by a write instead of reloading the whole table."""
+        if event.kind is ChangeKind.RELOAD:
+            self.refresh_book_table()
+            return
+
+        model = self.books_model
+        row = model.find_row(event.row_id)
+
+        if event.kind is ChangeKind.DELETE or event.row is None:
+            if row >= 0:
+                model.remove_row(row)
+            return
+
+        def key(values: List) -> tuple:
+            return book_keyset(Book(*values), self.sort_key)
+
+        target = book_keyset(event.row, self.sort_key)
+        if row >= 0:
+            still_ordered = (
+                (row == 0 or key(model.row(row - 1)) < target)
+                and (row == model.rowCount() - 1 or target < key(model.row(row + 1)))
+            )
+            if still_ordered:
+                model.set_row(row, event.row)
+                return
+            model.remove_row(row)
+
+        position = model.insertion_point(key, target)
+        # rows past the loaded range arrive with a later page
+        if position < model.rowCount() or not model.canFetchMore():
+            model.insert_row(position, event.row)
+
+    def on_fetch_failed(self, message: str) -> None:
+        """Report a failure to load more rows into the book table."""
+        logger.critical(f"Failed to load books: {message}")
+        QMessageBox.critical(self, "Error", "Failed to retrieve books. Check the logs for details.")
+
+    def selected_rows(self) -> List[List]:
+        """Return the cell values of every selected row, in table order."""
+        indexes = sorted(index.row() for index in self.books_table.selectionModel().selectedRows())
+        return [self.books_model.row(row) for row in indexes]
+
     def add_book(self) -> None:
         """Add a new book using the form input."""
         title, author, publisher, isbn, year = self.get_form_input()
@@ -157,81 +250,99 @@ class BookTab(QWidget):
             return
 
         try:
-            BookController.add_book(self.controller, title, author, publisher, isbn, year)
-            QMessageBox.information(self, "Success", "Book added successfully!")
-            self.refresh_book_table()
+            to_optional_int(publisher), to_optional_int(year)
         except ValueError:
             QMessageBox.warning(self, "Input Error", "Year and Publisher must be integers.")
-        except Exception as e:
-            logger.error(f"Failed to add book: {e}")
+            return
+
+        def on_error(message: str) -> None:
+            logger.error(f"Failed to add book: {message}")
             QMessageBox.critical(self, "Error", "Failed to add a new book. Check the logs for details.")
 
+        self.runner.submit(
+            None, self.controller.add_book, title, author, publisher, isbn, year,
+            on_result = lambda book: QMessageBox.information(self, "Success", "Book added successfully!"),
+            on_error = on_error
+        )
+
     def update_book(self) -> None:
-        """Update the selected book with the new values from the form."""
-        selected_items = self.books_table.selectedItems()
-        if not selected_items:
+        """Update the selected books with the non-empty values from the form."""
+        selected = self.selected_rows()
+        if not selected:
             QMessageBox.warning(self, "No Selection", "Please select a book to update.")
             return
 
-        book_id = int(selected_items[0].text())
-        book_title, book_author, book_publisher_id, book_isbn, book_year = (
-            selected_items[1].text(),
-            selected_items[2].text(),
-            selected_items[3].text(),
-            selected_items[4].text(),
-            selected_items[5].text(),
-        )
-
         title, author, publisher, isbn, year = self.get_form_input()
 
-        # checks if the fields are changed
-        if title:
-            book_title = title
-        if author:
-            book_author = author
-        if publisher:
-            book_publisher_id = publisher
-        if isbn:
-            book_isbn = isbn
-        if year:
-            book_year = year
-
-        try:
-            BookController.update_book(self.controller, book_id, title, author, publisher, isbn, year)
-            QMessageBox.information(self, "Success", "Book updated successfully!")
-            self.refresh_book_table()
-        except ValueError:
-            QMessageBox.warning(self, "Input Error", "Year and Publisher must be integers.")
-        except Exception as e:
-            logger.error(f"Failed to update book {book_id}: {e}")
-            QMessageBox.critical(self, "Error", f"Failed to update the book. Check the logs for details.")
+        books = []
+        for book_id, book_title, book_author, book_publisher_id, book_isbn, book_year in selected:
+            # checks if the fields are changed
+            if title:
+                book_title = title
+            if author:
+                book_author = author
+            if publisher:
+                book_publisher_id = publisher
+            if isbn:
+                book_isbn = isbn
+            if year:
+                book_year = year
+
+            try:
+                books.append(Book(
+                    id = book_id,
+                    title = book_title,
+                    author = book_author,
+                    publisher_id = to_optional_int(book_publisher_id),
+                    isbn = book_isbn or None,
+                    year_published = to_optional_int(book_year)
+                ))
+            except ValueError:
+                QMessageBox.warning(self, "Input Error", "Year and Publisher must be integers.")
+                return
+
+        def on_error(message: str) -> None:
+            logger.error(f"Failed to update books {[book.id for book in books]}: {message}")
+            QMessageBox.critical(self, "Error", "Failed to update the book. Check the logs for details.")
+
+        message = "Book updated successfully!" if len(books) == 1 else f"{len(books)} books updated successfully!"
+        self.runner.submit(
+            None, self.controller.update_books, books,
+            on_result = lambda _: QMessageBox.information(self, "Success", message),
+            on_error = on_error
+        )
 
     def delete_book(self) -> None:
-        """Delete the selected book after user confirmation."""
-        selected_items = self.books_table.selectedItems()
-        if not selected_items:
+        """Delete the selected books after user confirmation."""
+        selected = self.selected_rows()
+        if not selected:
             QMessageBox.warning(self, "No Selection", "Please select a book to delete.")
             return
 
-        book_id = int(selected_items[0].text())
-        book_title = selected_items[1].text()
+        book_ids = [row[0] for row in selected]
+        if len(selected) == 1:
+            question = f"Are you sure you want to delete the book '{selected[0][1]}'?"
+        else:
+            question = f"Are you sure you want to delete {len(selected)} books?"
 
         confirmation = QMessageBox.question(
-            self, "Confirm Deletion",
-            f"Are you sure you want to delete the book '{book_title}'?",
+            self, "Confirm Deletion", question,
             QMessageBox.Yes | QMessageBox.No, QMessageBox.No
         )
 
         if confirmation == QMessageBox.No:
             return
 
-        try:
-            BookController.delete_by_id(self.controller, book_id)
-            QMessageBox.information(self, "Success", "Book deleted successfully!")
-            self.refresh_book_table()
-        except Exception as e:
-            logger.error(f"Failed to delete book {book_id}: {e}")
-            QMessageBox.critical(self, "Error", f"Failed to delete the book. Check the logs for details.")
+        def on_error(message: str) -> None:
+            logger.error(f"Failed to delete books {book_ids}: {message}")
+            QMessageBox.critical(self, "Error", "Failed to delete the book. Check the logs for details.")
+
+        message = "Book deleted successfully!" if len(book_ids) == 1 else f"{len(book_ids)} books deleted successfully!"
+        self.runner.submit(
+            None, self.controller.delete_by_ids, book_ids,
+            on_result = lambda _: QMessageBox.information(self, "Success", message),
+            on_error = on_error
+        )
 
     def get_form_input(self) -> Tuple[str, str, str, str, str]:
         """Get and return the form input as a tuple of strings."""
@@ -0,0 +1,139 @@
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableView, QAbstractItemView
+)
+
+from controller import DiagnosticsController
+from view.table_model import ColumnTableModel
+
+QUERY_HEADERS = ["Method", "Calls", "Rows", "Errors", "p50 ms", "p95 ms", "p99 ms", "Max ms", "Total ms", "Query"]
+STATEMENT_HEADERS = ["Statement", "Executions", "Mean ms", "Max ms", "Total ms", "Query"]
+
+# how often the statistics are refreshed while the tab is visible
+REFRESH_INTERVAL_MS = 2000
+
+
+def query_row(summary: Dict[str, Any]) -> Sequence[Any]:
+    """Map a query summary onto the cells of the statistics table."""
+    return (
+        summary["caller"], summary["calls"], summary["rows"], summary["errors"],
+        f"{summary['p50_ms']:.1f}", f"{summary['p95_ms']:.1f}", f"{summary['p99_ms']:.1f}",
+        f"{summary['max_ms']:.1f}", f"{summary['total_ms']:.0f}", " ".join(summary["query"].split())
+    )
+
+
+def query_key(row: Sequence[Any]) -> Any:
+    """A call site: the method and the statement it ran."""
+    return row[0], row[-1]
+
+
+def statement_row(stats: Dict[str, Any]) -> Sequence[Any]:
+    """Map the statistics of a prepared statement onto the cells of the statements table."""
+    return (
+        stats["name"], stats["executions"], f"{stats['mean_ms']:.2f}", f"{stats['max_ms']:.1f}",
+        f"{stats['total_ms']:.0f}", " ".join(stats["query"].split())
+    )
+
+
+def statement_key(row: Sequence[Any]) -> Any:
+    return row[0]
+
+
+class DiagnosticsTab(QWidget):
+    """Live query latency, connection pool and cache statistics of this application."""
+
+    def __init__(self, controller: Optional[DiagnosticsController] = None) -> None:
+        super().__init__()
+        self.controller = controller or DiagnosticsController()
+        self.init_ui()
+
+        # statistics live in memory, so refreshing is cheap enough for the GUI thread
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(REFRESH_INTERVAL_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def init_ui(self) -> None:
+        self.main_layout = QVBoxLayout()
+        self.top_layout = QHBoxLayout()
+
+        self.pool_label = QLabel()
+        self.cache_label = QLabel()
+        self.reset_button = QPushButton("Reset")
+        self.reset_button.clicked.connect(self.reset_stats)
+        self.top_layout.addWidget(self.pool_label)
+        self.top_layout.addWidget(self.cache_label)
+        self.top_layout.addStretch()
+        self.top_layout.addWidget(self.reset_button)
+
+        self.query_model = ColumnTableModel(QUERY_HEADERS, parent = self)
+        self.query_model.reset(QUERY_HEADERS, row_mapper = query_row)
+        self.query_table = self.create_table(self.query_model)
+        self.statement_model = ColumnTableModel(STATEMENT_HEADERS, parent = self)
+        self.statement_model.reset(STATEMENT_HEADERS, row_mapper = statement_row)
+        self.statement_table = self.create_table(self.statement_model)
+
+        self.main_layout.addLayout(self.top_layout)
+        self.main_layout.addWidget(QLabel("Queries"))
+        self.main_layout.addWidget(self.query_table, 2)
+        self.main_layout.addWidget(QLabel("Prepared statements"))
+        self.main_layout.addWidget(self.statement_table, 1)
+        self.setLayout(self.main_layout)
+
+    @staticmethod
+    def create_table(model: ColumnTableModel) -> QTableView:
+        table = QTableView()
+        table.setModel(model)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setStretchLastSection(True)
+        return table
+
+    def showEvent(self, event) -> None:
+        super().showEvent(event)
+        self.refresh()
+        self.refresh_timer.start()
+
+    def hideEvent(self, event) -> None:
+        super().hideEvent(event)
+        self.refresh_timer.stop()
+
+    def refresh(self) -> None:
+        """Show the current statistics."""
+        pool = self.controller.pool_stats()
+        if pool:
+            self.pool_label.setText(
+                f"Pool: {pool['in_use']} in use, {pool['idle']} idle of {pool['max_size']}"
+            )
+        else:
+            self.pool_label.setText("Pool: not open")
+
+        caches = self.controller.cache_stats()
+        hits = sum(counters["hits"] for counters in caches.values())
+        lookups = hits + sum(counters["misses"] + counters["expirations"] for counters in caches.values())
+        hit_rate = f"{hits / lookups:.0%}" if lookups else "n/a"
+        self.cache_label.setText(f"Cache: {hit_rate} hits over {lookups} lookups")
+
+        # refreshed in place so the selection and scroll position survive; the rows are only re-sorted
+        # when a call site or statement appears or goes
+        self.update_model(self.query_model, QUERY_HEADERS, self.controller.query_stats(), query_row, query_key)
+        self.update_model(
+            self.statement_model, STATEMENT_HEADERS, self.controller.statement_stats(), statement_row, statement_key
+        )
+
+    @staticmethod
+    def update_model(
+            model: ColumnTableModel,
+            headers: Sequence[str],
+            rows: Sequence[Dict[str, Any]],
+            row_mapper: Callable[[Dict[str, Any]], Sequence[Any]],
+            key: Callable[[Sequence[Any]], Any]
+    ) -> None:
+        if not model.update_rows(rows, key):
+            model.reset(headers, rows = rows, row_mapper = row_mapper)
+
+    def reset_stats(self) -> None:
+        self.controller.reset_query_stats()
+        self.refresh()
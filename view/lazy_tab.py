@@ -0,0 +1,78 @@
+from typing import Callable, Optional
+
+from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtWidgets import QLabel, QMessageBox, QPushButton, QVBoxLayout, QWidget
+
+from utils import logger
+from view.worker import TaskRunner
+
+# runs on a worker thread: imports the view, connects and creates its controller, and returns a
+# function that builds the widget on the GUI thread
+TabLoader = Callable[[], Callable[[], QWidget]]
+
+
+class LazyTab(QWidget):
+    """
+    Placeholder for a tab whose widget is only built the first time the tab is shown.
+
+    The expensive part of building a tab, importing its modules and creating a controller that
+    connects to the database, runs on a worker thread while a "Loading…" label is shown, so the
+    window can be painted before any tab has touched the database. Only the widget itself is created
+    on the GUI thread once the loader is done.
+    """
+
+    loaded = pyqtSignal(object)
+
+    def __init__(self, title: str, loader: TabLoader) -> None:
+        super().__init__()
+        self.title = title
+        self.loader = loader
+        self.widget: Optional[QWidget] = None
+        self.runner = TaskRunner(self)
+
+        self.status_label = QLabel(f"Loading {title}…")
+        self.status_label.setAlignment(Qt.AlignCenter)
+        # only shown after a failed load; showEvent does not fire again while the tab stays selected
+        self.retry_button = QPushButton("Retry")
+        self.retry_button.clicked.connect(self.activate)
+        self.retry_button.hide()
+        self.main_layout = QVBoxLayout()
+        self.main_layout.setContentsMargins(0, 0, 0, 0)
+        self.main_layout.addStretch()
+        self.main_layout.addWidget(self.status_label)
+        self.main_layout.addWidget(self.retry_button, alignment = Qt.AlignCenter)
+        self.main_layout.addStretch()
+        self.setLayout(self.main_layout)
+
+    def showEvent(self, event) -> None:
+        super().showEvent(event)
+        self.activate()
+
+    def activate(self) -> None:
+        """Starts loading the tab, unless it is loaded or loading already."""
+        if self.widget is not None or self.runner.is_busy("load"):
+            return
+        self.status_label.setText(f"Loading {self.title}…")
+        self.retry_button.hide()
+        self.runner.submit("load", self.loader, on_result = self.on_loaded, on_error = self.on_load_failed)
+
+    def on_loaded(self, build: Callable[[], QWidget]) -> None:
+        try:
+            widget = build()
+        except Exception as e:
+            logger.error(f"Failed to build the {self.title} tab: {e}")
+            self.on_load_failed(str(e))
+            return
+        self.widget = widget
+        for placeholder in (self.status_label, self.retry_button):
+            self.main_layout.removeWidget(placeholder)
+            placeholder.deleteLater()
+        while self.main_layout.count():
+            self.main_layout.takeAt(0)
+        self.main_layout.addWidget(widget)
+        self.loaded.emit(widget)
+
+    def on_load_failed(self, message: str) -> None:
+        self.status_label.setText(f"{self.title} could not be loaded.")
+        self.retry_button.show()
+        QMessageBox.critical(self, "Error", f"Failed to load {self.title}: {message}")
@@ -0,0 +1,186 @@
+from typing import Any, Optional, Sequence
+
+from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QFormLayout, QHBoxLayout, QLineEdit, QLabel, QPushButton, QComboBox,
+    QTableView, QAbstractItemView, QMessageBox, QProgressBar
+)
+
+from controller import LoanController
+from events import ChangeEvent
+from model import Loan
+from utils import logger
+from view.table_model import ColumnTableModel
+from view.worker import TaskRunner
+
+LOAN_HEADERS = ["Loan ID", "Book ID", "Member ID", "Staff ID", "Borrowed", "Due", "Renewals"]
+
+
+def loan_row(loan: Loan) -> Sequence[Any]:
+    return loan.id, loan.book_id, loan.member_id, loan.staff_id, loan.date_borrowed, loan.due_date, loan.renewals
+
+
+class LoanTab(QWidget):
+    """Tab widget for the circulation desk: lending, returning and renewing books."""
+
+    # re-emits controller change events, which may come from worker threads, on the GUI thread
+    loan_changed = pyqtSignal(object)
+
+    def __init__(self, controller: Optional[LoanController] = None) -> None:
+        super().__init__()
+        self.controller = controller or LoanController()
+        self.runner = TaskRunner(self)
+        self.loan_changed.connect(self.on_loan_changed)
+        self.controller.changes.subscribe(self.loan_changed.emit)
+        self.init_ui()
+        self.load_staff()
+        self.refresh_loans()
+
+    def init_ui(self) -> None:
+        self.main_layout = QVBoxLayout()
+        self.form_layout = QFormLayout()
+
+        self.book_input = QLineEdit()
+        self.book_input.setPlaceholderText("Book ID")
+        self.member_input = QLineEdit()
+        self.member_input.setPlaceholderText("Member ID; also filters the open loans below")
+        self.member_input.editingFinished.connect(self.refresh_loans)
+        self.staff_input = QComboBox()
+        self.availability_label = QLabel()
+
+        self.form_layout.addRow(QLabel("Book:"), self.book_input)
+        self.form_layout.addRow(QLabel("Member:"), self.member_input)
+        self.form_layout.addRow(QLabel("Staff:"), self.staff_input)
+        self.form_layout.addRow(QLabel("Status:"), self.availability_label)
+
+        self.button_layout = QHBoxLayout()
+        self.borrow_button = QPushButton("Borrow")
+        self.return_button = QPushButton("Return")
+        self.renew_button = QPushButton("Renew")
+        self.check_button = QPushButton("Check Availability")
+        self.borrow_button.clicked.connect(self.borrow_book)
+        self.return_button.clicked.connect(self.return_book)
+        self.renew_button.clicked.connect(self.renew_loan)
+        self.check_button.clicked.connect(self.check_availability)
+        for button in (self.borrow_button, self.return_button, self.renew_button, self.check_button):
+            self.button_layout.addWidget(button)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setMaximumHeight(6)
+        self.progress_bar.setTextVisible(False)
+        self.progress_bar.setVisible(False)
+        self.runner.busy_changed.connect(self.progress_bar.setVisible)
+
+        self.loans_model = ColumnTableModel(LOAN_HEADERS, parent = self)
+        self.loans_table = QTableView()
+        self.loans_table.setModel(self.loans_model)
+        self.loans_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.loans_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.loans_table.verticalHeader().setVisible(False)
+        self.loans_table.horizontalHeader().setStretchLastSection(True)
+        self.loans_table.clicked.connect(
+            lambda index: self.book_input.setText(str(self.loans_model.row(index.row())[1]))
+        )
+
+        self.main_layout.addLayout(self.form_layout)
+        self.main_layout.addLayout(self.button_layout)
+        self.main_layout.addWidget(self.progress_bar)
+        self.main_layout.addWidget(self.loans_table)
+        self.setLayout(self.main_layout)
+
+    def load_staff(self) -> None:
+        def on_result(staff) -> None:
+            self.staff_input.clear()
+            for member in staff:
+                self.staff_input.addItem(f"{member.first_name} {member.last_name} ({member.role})", member.id)
+
+        self.runner.submit("staff", self.controller.get_all_staff, on_result = on_result, on_error = self.on_failed)
+
+    def refresh_loans(self) -> None:
+        """List the open loans of the member in the form, or of every member if it is blank."""
+        member = self.member_input.text().strip()
+        if member and not member.isdigit():
+            return
+        self.runner.submit(
+            "loans", self.controller.get_open_loans, member,
+            on_result = lambda loans: self.loans_model.reset(LOAN_HEADERS, rows = loans, row_mapper = loan_row),
+            on_error = self.on_failed
+        )
+
+    def on_loan_changed(self, event: ChangeEvent) -> None:
+        self.refresh_loans()
+
+    def book_id(self) -> Optional[str]:
+        """The book ID from the form, or None after telling the user it is missing."""
+        book = self.book_input.text().strip()
+        if not book.isdigit():
+            QMessageBox.warning(self, "Input Error", "Enter the numeric ID of the book.")
+            return None
+        return book
+
+    def borrow_book(self) -> None:
+        book = self.book_id()
+        member = self.member_input.text().strip()
+        staff = self.staff_input.currentData()
+        if book is None:
+            return
+        if not member.isdigit() or staff is None:
+            QMessageBox.warning(self, "Input Error", "Enter the numeric ID of the member and choose a staff member.")
+            return
+
+        def on_result(loan: Optional[Loan]) -> None:
+            if loan is None:
+                QMessageBox.warning(self, "Not Available", f"Book {book} is already on loan.")
+            else:
+                QMessageBox.information(self, "Success", f"Book {book} lent until {loan.due_date}.")
+
+        self.runner.submit(None, self.controller.borrow, book, member, staff, on_result = on_result, on_error = self.on_failed)
+
+    def return_book(self) -> None:
+        book = self.book_id()
+        if book is None:
+            return
+
+        def on_result(loan: Optional[Loan]) -> None:
+            if loan is None:
+                QMessageBox.warning(self, "Not On Loan", f"Book {book} is not on loan.")
+            else:
+                QMessageBox.information(self, "Success", f"Book {book} returned by member {loan.member_id}.")
+
+        self.runner.submit(None, self.controller.return_book, book, on_result = on_result, on_error = self.on_failed)
+
+    def renew_loan(self) -> None:
+        book = self.book_id()
+        if book is None:
+            return
+
+        def on_result(loan: Optional[Loan]) -> None:
+            if loan is None:
+                QMessageBox.warning(
+                    self, "Cannot Renew",
+                    f"Book {book} is not on loan, is overdue or has been renewed {self.controller.max_renewals} times."
+                )
+            else:
+                QMessageBox.information(self, "Success", f"Book {book} renewed until {loan.due_date}.")
+
+        self.runner.submit(None, self.controller.renew, book, on_result = on_result, on_error = self.on_failed)
+
+    def check_availability(self) -> None:
+        book = self.book_id()
+        if book is None:
+            return
+
+        def on_result(loan: Optional[Loan]) -> None:
+            if loan is None:
+                self.availability_label.setText(f"Book {book} is available.")
+            else:
+                self.availability_label.setText(
+                    f"Book {book} is on loan to member {loan.member_id} until {loan.due_date}."
+                )
+
+        self.runner.submit("availability", self.controller.get_open_loan, book, on_result = on_result, on_error = self.on_failed)
+
+    def on_failed(self, message: str) -> None:
+        logger.error(f"Circulation request failed: {message}")
+        QMessageBox.critical(self, "Error", "The request failed. Check the logs for details.")
@@ -1,13 +1,16 @@
 from enum import Enum
-from typing import List, Dict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
 
+from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QComboBox, QPushButton,
-    QTableWidget, QFormLayout, QLabel, QLineEdit, QMessageBox, QTableWidgetItem
+    QTableView, QAbstractItemView, QFormLayout, QLabel, QLineEdit, QMessageBox, QProgressBar
 )
 
 from controller import QueryController
 from utils import logger
+from view.table_model import ColumnTableModel
+from view.worker import TaskRunner
 
 
 class QueryIndex(Enum):
@@ -16,6 +19,16 @@ class QueryIndex(Enum):
     LIST_ALL_MEMBERS = 2
     LIST_MEMBERS_BY_BOOK = 3
     LIST_MEMBERS_BORROWED_AT_LEAST_ONE_BOOK = 4
+    SEARCH_BOOKS = 5
+    SEARCH_MEMBERS = 6
+    LIST_OVERDUE_LOANS = 7
+    MOST_BORROWED_BOOKS = 8
+    MOST_ACTIVE_MEMBERS = 9
+    DAILY_CIRCULATION = 10
+    OVERDUE_BY_PUBLISHER = 11
+    BOOKS_PER_DECADE = 12
+    LOANS_PER_MONTH = 13
+    LOAN_DURATIONS = 14
 
 
 QUERY_DESCRIPTIONS: Dict[int, str] = {
@@ -24,13 +37,47 @@ QUERY_DESCRIPTIONS: Dict[int, str] = {
     QueryIndex.LIST_ALL_MEMBERS.value: "List all members",
     QueryIndex.LIST_MEMBERS_BY_BOOK.value: "List all members who borrowed a particular book",
     QueryIndex.LIST_MEMBERS_BORROWED_AT_LEAST_ONE_BOOK.value: "List all members who borrowed at least one book",
+    QueryIndex.SEARCH_BOOKS.value: "Search books by title or author",
+    QueryIndex.SEARCH_MEMBERS.value: "Search members by name or email",
+    QueryIndex.LIST_OVERDUE_LOANS.value: "List all overdue loans",
+    QueryIndex.MOST_BORROWED_BOOKS.value: "Most borrowed books",
+    QueryIndex.MOST_ACTIVE_MEMBERS.value: "Members with the most books out",
+    QueryIndex.DAILY_CIRCULATION.value: "Checkouts and returns per day",
+    QueryIndex.OVERDUE_BY_PUBLISHER.value: "Overdue loans per publisher",
+    QueryIndex.BOOKS_PER_DECADE.value: "Books per decade of publication",
+    QueryIndex.LOANS_PER_MONTH.value: "Loans and late returns per month",
+    QueryIndex.LOAN_DURATIONS.value: "How long loans are kept",
 }
 
+BOOK_RESULT_HEADERS = ["Book ID", "Title", "Author", "Publisher ID", "ISBN", "Year"]
+MEMBER_RESULT_HEADERS = ["Member ID", "First Name", "Last Name", "Email", "Phone Number", "Address", "Membership Date"]
+
+# how long typing has to pause before a search is sent
+SEARCH_DEBOUNCE_MS = 250
+SEARCH_LIMIT = 100
+
+# rows shown by the circulation reports
+REPORT_LIMIT = 100
+REPORT_DAYS = 90
+REPORT_MONTHS = 24
+
+
+def book_result(book) -> Sequence[Any]:
+    return book.id, book.title, book.author, book.publisher_id, book.isbn, book.year_published
+
+
+def member_result(member) -> Sequence[Any]:
+    return (
+        member.id, member.first_name, member.last_name, member.email, member.phone, member.address,
+        member.date_of_membership
+    )
+
 
 class QueryTab(QWidget):
-    def __init__(self) -> None:
+    def __init__(self, controller: Optional[QueryController] = None) -> None:
         super().__init__()
-        self.controller = QueryController()
+        self.controller = controller or QueryController()
+        self.runner = TaskRunner(self)
         self.init_ui()
 
     def init_ui(self) -> None:
@@ -53,18 +100,42 @@ class QueryTab(QWidget):
         self.form_layout = QFormLayout()
         self.author_input = QLineEdit()
         self.book_input = QLineEdit()
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Start typing to search")
+        self.search_input.setClearButtonEnabled(True)
         self.form_layout.addRow(QLabel("Author:"), self.author_input)
         self.form_layout.addRow(QLabel("Book:"), self.book_input)
+        self.form_layout.addRow(QLabel("Search:"), self.search_input)
+
+        # Search as you type: every keystroke restarts the timer, so a search only runs once typing pauses
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.execute_search)
+        self.search_input.textChanged.connect(self.search_timer.start)
+
+        # Busy indicator shown while a query runs in the background
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setMaximumHeight(6)
+        self.progress_bar.setTextVisible(False)
+        self.progress_bar.setVisible(False)
+        self.runner.busy_changed.connect(self.progress_bar.setVisible)
 
         # Table to display results
-        self.result_table = QTableWidget()
-        self.result_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.result_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.result_model = ColumnTableModel(parent = self, runner = self.runner)
+        self.result_model.fetch_failed.connect(self.on_fetch_failed)
+        self.result_table = QTableView()
+        self.result_table.setModel(self.result_model)
+        self.result_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.result_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.result_table.verticalHeader().setVisible(False)
         self.result_table.horizontalHeader().setStretchLastSection(True)
 
         # Adding layouts
         self.main_layout.addLayout(self.top_layout)
         self.main_layout.addLayout(self.form_layout)
+        self.main_layout.addWidget(self.progress_bar)
         self.main_layout.addWidget(self.result_table)
         self.setLayout(self.main_layout)
 
@@ -107,11 +178,11 @@ class QueryTab(QWidget):
             QPushButton:hover {
                 background-color: #5a009e;  /* Slightly darker purple for hover */
             }
-            QTableWidget {
+            QTableView {
                 border: 1px solid #ddd;
                 font-size: 13px;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 5px;
             }
         """)
@@ -123,6 +194,9 @@ class QueryTab(QWidget):
         selected_index = self.query_combo.currentIndex()
         self.author_input.setVisible(selected_index == QueryIndex.FIND_BOOKS_BY_AUTHOR.value)
         self.book_input.setVisible(selected_index == QueryIndex.LIST_MEMBERS_BY_BOOK.value)
+        self.search_input.setVisible(selected_index in (QueryIndex.SEARCH_BOOKS.value, QueryIndex.SEARCH_MEMBERS.value))
+        for field in (self.author_input, self.book_input, self.search_input):
+            self.form_layout.labelForField(field).setVisible(field.isVisible())
 
     def execute_query(self) -> None:
         """Execute the selected query and display results."""
@@ -142,102 +216,197 @@ class QueryTab(QWidget):
         elif current_index == QueryIndex.LIST_MEMBERS_BORROWED_AT_LEAST_ONE_BOOK.value:
             self.execute_list_members_borrowed_at_least_one_book()
 
+        elif current_index == QueryIndex.LIST_OVERDUE_LOANS.value:
+            self.execute_list_overdue_loans()
+
+        elif current_index in (QueryIndex.SEARCH_BOOKS.value, QueryIndex.SEARCH_MEMBERS.value):
+            self.execute_search()
+
+        elif current_index == QueryIndex.MOST_BORROWED_BOOKS.value:
+            self.execute_most_borrowed_books()
+
+        elif current_index == QueryIndex.MOST_ACTIVE_MEMBERS.value:
+            self.execute_most_active_members()
+
+        elif current_index == QueryIndex.DAILY_CIRCULATION.value:
+            self.execute_daily_circulation()
+
+        elif current_index == QueryIndex.OVERDUE_BY_PUBLISHER.value:
+            self.execute_overdue_by_publisher()
+
+        elif current_index == QueryIndex.BOOKS_PER_DECADE.value:
+            self.execute_books_per_decade()
+
+        elif current_index == QueryIndex.LOANS_PER_MONTH.value:
+            self.execute_loans_per_month()
+
+        elif current_index == QueryIndex.LOAN_DURATIONS.value:
+            self.execute_loan_durations()
+
     def execute_find_books_by_author(self) -> None:
         author_name = self.author_input.text().strip()
         if not author_name:
             QMessageBox.warning(self, "Warning", "Author name is not provided.")
             return
-        try:
-            books = QueryController.get_book_by_author(self.controller, author_name)
-        except Exception as e:
-            logger.debug(str(e))
-            QMessageBox.critical(self, "Error", "Failed to retrieve data. Check logs for debugging.")
-            return
-
-        self.populate_table(
-            books,
-            headers = ["Book ID", "Title", "Author", "Publisher ID", "ISBN", "Year"],
-            data_formatter = lambda book: [
-                str(book.id), book.title, book.author,
-                str(book.publisher_id), book.isbn, str(book.year_published)
-            ]
+        self.run_query(
+            self.controller.get_book_by_author, author_name,
+            headers = BOOK_RESULT_HEADERS,
+            data_formatter = book_result
         )
 
     def execute_list_all_publishers(self) -> None:
-        try:
-            publishers = QueryController.get_all_publishers(self.controller)
-        except Exception as e:
-            logger.debug(str(e))
-            QMessageBox.critical(self, "Error", "Failed to retrieve data. Check logs for debugging.")
-            return
-
         self.populate_table(
-            publishers,
             headers = ["Publisher ID", "Name", "Address", "Phone", "Email"],
-            data_formatter = lambda pub: [
-                str(pub.id), pub.name, pub.address, pub.phone, pub.email
-            ]
+            data_formatter = lambda pub: (pub.id, pub.name, pub.address, pub.phone, pub.email),
+            batches = self.controller.iter_publisher_pages()
         )
 
     def execute_list_all_members(self) -> None:
-        try:
-            members = QueryController.get_all_members(self.controller)
-        except Exception as e:
-            logger.debug(str(e))
-            QMessageBox.critical(self, "Error", "Failed to retrieve data. Check logs for debugging.")
-            return
         self.populate_table(
-            members,
-            headers = ["Member ID", "First Name", "Last Name", "Email", "Phone Number", "Address", "Membership Date"],
-            data_formatter = lambda mem: [
-                str(mem.id), mem.first_name, mem.last_name, mem.email, mem.phone, mem.address,
-                str(mem.date_of_membership)
-            ]
+            headers = MEMBER_RESULT_HEADERS,
+            data_formatter = member_result,
+            batches = self.controller.iter_member_pages()
         )
 
-    def execute_list_all_member_by_book(self):
+    def execute_search(self) -> None:
+        """Search books or members for the typed text; a newer search supersedes one still running."""
+        self.search_timer.stop()
+        current_index = self.query_combo.currentIndex()
+        text = self.search_input.text().strip()
+        if not text:
+            self.runner.cancel("query")
+            self.result_model.clear()
+            return
 
+        if current_index == QueryIndex.SEARCH_BOOKS.value:
+            self.run_query(
+                self.controller.search_books, text, SEARCH_LIMIT,
+                headers = BOOK_RESULT_HEADERS,
+                data_formatter = book_result,
+                keep_results = True
+            )
+        elif current_index == QueryIndex.SEARCH_MEMBERS.value:
+            self.run_query(
+                self.controller.search_members, text, SEARCH_LIMIT,
+                headers = MEMBER_RESULT_HEADERS,
+                data_formatter = member_result,
+                keep_results = True
+            )
+
+    def execute_list_all_member_by_book(self) -> None:
         book_name = self.book_input.text().strip()
         if not book_name:
             QMessageBox.warning(self, "Warning", "Book title is not provided.")
             return
-        try:
-            results = QueryController.get_all_member_by_book(self.controller, book_name)
-        except Exception as e:
-            logger.debug(str(e))
-            QMessageBox.critical(self, "Error", "Failed to retrieve data. Check logs for debugging.")
-            return
-        self.populate_table(
-            results,
-            headers = ['First Name', 'Last Name', 'Title', "Date Borrowed", "Due Date", "Date Returned"],
-            data_formatter = lambda r: [r[0], r[1], r[2], str(r[3]), str(r[4]), str(r[5])]
+        self.run_query(
+            self.controller.get_all_member_by_book, book_name,
+            headers = ["Member ID", "First Name", "Last Name", "Title", "Date Borrowed", "Due Date", "Date Returned"],
+            data_formatter = lambda r: (
+                r.member_id, r.first_name, r.last_name, r.title, r.date_borrowed, r.due_date, r.date_returned
+            )
         )
 
-    def execute_list_members_borrowed_at_least_one_book(self):
+    def execute_list_members_borrowed_at_least_one_book(self) -> None:
+        self.run_query(
+            self.controller.get_members_with_loans,
+            headers = MEMBER_RESULT_HEADERS,
+            data_formatter = member_result
+        )
 
-        try:
-            # idk if this works in python, filter if member is in loan
-            # loans is not oop in an oop program??
-            # have to figure that out
-            results = filter(lambda x : x in QueryController.get_all_loans(self.controller), QueryController.get_all_members(self.controller))
-        except Exception as e:
-            logger.debug(str(e))
-            QMessageBox.warning(self, "Error", "Failed to retrieve data. Check logs for debugging.")
-            return
+    def execute_list_overdue_loans(self) -> None:
+        self.run_query(
+            self.controller.get_overdue_loans,
+            headers = ["Loan ID", "Member ID", "First Name", "Last Name", "Book ID", "Title", "Due Date", "Days Overdue"],
+            data_formatter = lambda r: (
+                r.loan_id, r.member_id, r.first_name, r.last_name, r.book_id, r.title, r.due_date, r.days_overdue
+            )
+        )
 
-        self.populate_table(
-            results,
-            headers = ['First Name', 'Last Name', 'Title', "Date Borrowed", "Due Date", "Date Returned"],
-            data_formatter = lambda r: [r[0], r[1], r[2], str(r[3]), str(r[4]), str(r[5])]
+    def execute_most_borrowed_books(self) -> None:
+        self.run_query(
+            self.controller.get_most_borrowed_books, REPORT_LIMIT,
+            headers = ["Book ID", "Title", "Author", "Times Borrowed"],
+            data_formatter = tuple
         )
 
-    def populate_table(self, items: List[object], headers: List[str], data_formatter: callable) -> None:
-        """Helper method to populate the result table."""
-        self.result_table.setRowCount(0)
-        self.result_table.setColumnCount(len(headers))
-        self.result_table.setHorizontalHeaderLabels(headers)
+    def execute_most_active_members(self) -> None:
+        self.run_query(
+            self.controller.get_active_members, REPORT_LIMIT,
+            headers = ["Member ID", "First Name", "Last Name", "Books Out", "Total Loans"],
+            data_formatter = tuple
+        )
+
+    def execute_daily_circulation(self) -> None:
+        self.run_query(
+            self.controller.get_daily_circulation, REPORT_DAYS,
+            headers = ["Day", "Checkouts", "Returns"],
+            data_formatter = tuple
+        )
+
+    def execute_overdue_by_publisher(self) -> None:
+        self.run_query(
+            self.controller.get_overdue_by_publisher,
+            headers = ["Publisher ID", "Name", "Overdue Loans", "Most Days Overdue", "As Of"],
+            data_formatter = tuple
+        )
+
+    def execute_books_per_decade(self) -> None:
+        self.run_query(
+            self.controller.get_books_per_decade,
+            headers = ["Decade", "Books"],
+            data_formatter = lambda r: (f"{r.decade}s", r.books)
+        )
+
+    def execute_loans_per_month(self) -> None:
+        self.run_query(
+            self.controller.get_loans_per_month, REPORT_MONTHS,
+            headers = ["Month", "Loans", "Returned Late"],
+            data_formatter = lambda r: (r.month.strftime("%Y-%m"), r.loans, r.late_returns)
+        )
+
+    def execute_loan_durations(self) -> None:
+        self.run_query(
+            self.controller.get_loan_durations,
+            headers = ["Kept For", "Loans"],
+            data_formatter = tuple
+        )
+
+    def run_query(
+            self,
+            fn: Callable[..., Iterable[object]],
+            *args: Any,
+            headers: List[str],
+            data_formatter: Callable[[Any], Sequence[Any]],
+            keep_results: bool = False
+    ) -> None:
+        """
+        Run a controller query on a worker thread and show its results when they arrive. A query
+        started while another is still running supersedes it. With ``keep_results`` the previous
+        results stay visible until they are replaced, which avoids flicker while searching.
+        """
+        if not keep_results:
+            self.result_model.clear()
+        self.runner.submit(
+            "query", fn, *args,
+            on_result = lambda items: self.result_model.reset(headers, rows = items, row_mapper = data_formatter),
+            on_error = self.on_fetch_failed
+        )
 
-        for row_index, item in enumerate(items):
-            self.result_table.insertRow(row_index)
-            for col_index, data in enumerate(data_formatter(item)):
-                self.result_table.setItem(row_index, col_index, QTableWidgetItem(data))
+    def populate_table(
+            self,
+            items: Iterable[object] = (),
+            headers: List[str] = (),
+            data_formatter: Callable[[Any], Sequence[Any]] = tuple,
+            batches: Optional[Iterator[List[object]]] = None
+    ) -> None:
+        """
+        Helper method to populate the result table. Items are loaded immediately, batches are
+        pulled in as the user scrolls.
+        """
+        self.runner.cancel("query")
+        self.result_model.reset(headers, rows = items, batches = batches, row_mapper = data_formatter)
+
+    def on_fetch_failed(self, message: str) -> None:
+        """Report a failure to load more rows into the result table."""
+        logger.debug(message)
+        QMessageBox.critical(self, "Error", "Failed to retrieve data. Check logs for debugging.")
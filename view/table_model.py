@@ -0,0 +1,234 @@
+from typing import Any, Callable, Hashable, Iterable, Iterator, List, Optional, Sequence
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+
+from utils import logger
+from view.worker import TaskRunner
+
+
+class ColumnTableModel(QAbstractTableModel):
+    """
+    Read-only table model that stores rows column by column and formats a cell only when a view
+    asks to paint it.
+
+    Rows can be loaded up front or pulled lazily from an iterator of batches; Qt calls
+    ``fetchMore`` when the user scrolls near the end of what has been loaded. Given a TaskRunner,
+    each batch is fetched on a worker thread so the GUI never waits on the database.
+    """
+
+    fetch_failed = pyqtSignal(str)
+
+    def __init__(self, headers: Sequence[str] = (), parent = None, runner: Optional[TaskRunner] = None) -> None:
+        super().__init__(parent)
+        self._headers: List[str] = list(headers)
+        self._columns: List[List[Any]] = [[] for _ in self._headers]
+        self._row_count = 0
+        self._batches: Optional[Iterator[Sequence[Any]]] = None
+        self._row_mapper: Callable[[Any], Sequence[Any]] = tuple
+
+        # with a runner, batches are fetched on a worker thread and appended when they arrive
+        self._runner = runner
+        self._channel = f"fetch-{id(self)}"
+        self._fetching = False
+        self._generation = 0
+
+    def reset(
+            self,
+            headers: Sequence[str],
+            rows: Iterable[Any] = (),
+            batches: Optional[Iterator[Sequence[Any]]] = None,
+            row_mapper: Optional[Callable[[Any], Sequence[Any]]] = None
+    ) -> None:
+        """
+        Replaces the model contents.
+
+        Args:
+            headers (Sequence[str]): Column headers.
+            rows (Iterable[Any]): Items to load immediately.
+            batches (Optional[Iterator[Sequence[Any]]]): Batches of items to load on demand.
+            row_mapper (Optional[Callable]): Converts an item into a sequence of cell values.
+        """
+        self.beginResetModel()
+        self._close_batches()
+        self._headers = list(headers)
+        self._columns = [[] for _ in self._headers]
+        self._row_count = 0
+        self._batches = batches
+        self._row_mapper = row_mapper or tuple
+        self._append(rows)
+        self.endResetModel()
+
+        if self._batches is not None and not self._row_count:
+            self.fetchMore(QModelIndex())
+
+    def clear(self) -> None:
+        """Removes all rows but keeps the headers."""
+        self.reset(self._headers)
+
+    def row(self, row: int) -> List[Any]:
+        """Returns the raw cell values of the given row."""
+        return [column[row] for column in self._columns]
+
+    def find_row(self, value: Any, column: int = 0) -> int:
+        """Returns the first row whose cell in ``column`` equals ``value``, or -1."""
+        try:
+            return self._columns[column].index(value)
+        except ValueError:
+            return -1
+
+    def insertion_point(self, key: Callable[[List[Any]], Any], target: Any) -> int:
+        """
+        Binary-searches the loaded rows, assumed ordered by ``key``, for the position ``target``
+        would be inserted at.
+        """
+        low, high = 0, self._row_count
+        while low < high:
+            middle = (low + high) // 2
+            if key(self.row(middle)) < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def insert_row(self, position: int, item: Any) -> None:
+        """Inserts a single item at ``position``."""
+        values = self._row_mapper(item)
+        self.beginInsertRows(QModelIndex(), position, position)
+        for column, value in zip(self._columns, values):
+            column.insert(position, value)
+        self._row_count += 1
+        self.endInsertRows()
+
+    def set_row(self, row: int, item: Any) -> None:
+        """Replaces the values of a single row in place."""
+        for column, value in zip(self._columns, self._row_mapper(item)):
+            column[row] = value
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self._columns) - 1))
+
+    def update_rows(self, items: Iterable[Any], key: Callable[[Sequence[Any]], Hashable]) -> bool:
+        """
+        Refreshes the values of the loaded rows in place, keeping their order, so that views keep their
+        selection and scroll position.
+
+        Args:
+            items (Iterable[Any]): The new items, one for each loaded row.
+            key (Callable): Identifies a row by its cell values.
+
+        Returns:
+            bool: False, with nothing changed, unless the keys of ``items`` are exactly those of the
+            loaded rows; the caller then resets the model instead.
+        """
+        rows = [self._row_mapper(item) for item in items]
+        positions = {key(self.row(row)): row for row in range(self._row_count)}
+        keys = [key(values) for values in rows]
+        if len(keys) != len(positions) or set(keys) != set(positions):
+            return False
+
+        for row_key, values in zip(keys, rows):
+            for column, value in zip(self._columns, values):
+                column[positions[row_key]] = value
+        if self._row_count:
+            self.dataChanged.emit(self.index(0, 0), self.index(self._row_count - 1, len(self._columns) - 1))
+        return True
+
+    def remove_row(self, row: int) -> None:
+        """Removes a single row."""
+        self.beginRemoveRows(QModelIndex(), row, row)
+        for column in self._columns:
+            del column[row]
+        self._row_count -= 1
+        self.endRemoveRows()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._headers)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        value = self._columns[index.column()][index.row()]
+        return "" if value is None else str(value)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole) -> Any:
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self._headers[section] if section < len(self._headers) else None
+        return str(section + 1)
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        # iterators that know they are exhausted expose it as ``has_more``
+        return not parent.isValid() and self._batches is not None and getattr(self._batches, "has_more", True)
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()) -> None:
+        if parent.isValid() or self._batches is None or self._fetching:
+            return
+
+        generation = self._generation
+        if self._runner is None:
+            try:
+                self._receive_batch(generation, self._next_batch(self._batches))
+            except Exception as e:
+                self._fetch_error(generation, str(e))
+            return
+
+        self._fetching = True
+        self._runner.submit(
+            self._channel,
+            self._next_batch,
+            self._batches,
+            on_result = lambda batch: self._receive_batch(generation, batch),
+            on_error = lambda message: self._fetch_error(generation, message)
+        )
+
+    @staticmethod
+    def _next_batch(batches: Iterator[Sequence[Any]]) -> Optional[Sequence[Any]]:
+        try:
+            return next(batches)
+        except StopIteration:
+            return None
+
+    def _receive_batch(self, generation: int, batch: Optional[Sequence[Any]]) -> None:
+        if generation != self._generation:
+            return
+        self._fetching = False
+        if batch is None or not getattr(self._batches, "has_more", True):
+            self._batches = None
+        if not batch:
+            return
+
+        items = [self._row_mapper(item) for item in batch]
+        self.beginInsertRows(QModelIndex(), self._row_count, self._row_count + len(items) - 1)
+        self._append(items, mapped = True)
+        self.endInsertRows()
+
+    def _fetch_error(self, generation: int, message: str) -> None:
+        if generation != self._generation:
+            return
+        logger.error(f"Failed to fetch more rows: {message}")
+        self._fetching = False
+        self._batches = None
+        self.fetch_failed.emit(message)
+
+    def _append(self, rows: Iterable[Any], mapped: bool = False) -> None:
+        columns = self._columns
+        for item in rows:
+            values = item if mapped else self._row_mapper(item)
+            for column, value in zip(columns, values):
+                column.append(value)
+            self._row_count += 1
+
+    def _close_batches(self) -> None:
+        self._generation += 1
+        if self._fetching:
+            # a worker is still advancing the iterator; it is dropped once that fetch completes
+            self._runner.cancel(self._channel)
+        else:
+            # closing a generator releases any server-side cursor it still holds
+            close = getattr(self._batches, "close", None)
+            if close is not None:
+                close()
+        self._fetching = False
+        self._batches = None
@@ -0,0 +1,136 @@
+import itertools
+from typing import Any, Callable, Dict, Optional
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from database import CancelToken, cancel_scope
+from utils import logger
+
+
+class TaskSignals(QObject):
+    """Signals a Task emits from its worker thread; Qt queues them to the receiver's thread."""
+
+    succeeded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    done = pyqtSignal()
+
+
+class Task(QRunnable):
+    """
+    Runs a single controller call on a pool thread. Its statements can be interrupted through
+    ``token`` and nothing is emitted once it has been cancelled.
+    """
+
+    def __init__(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.token = CancelToken()
+        self.signals = TaskSignals()
+
+    def cancel(self) -> None:
+        self.token.cancel()
+
+    def run(self) -> None:
+        try:
+            if self.token.cancelled:
+                return
+            with cancel_scope(self.token):
+                result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            if not self.token.cancelled:
+                logger.error(f"Background task {getattr(self.fn, '__name__', self.fn)} failed: {e}")
+                self.signals.failed.emit(str(e))
+        else:
+            if not self.token.cancelled:
+                self.signals.succeeded.emit(result)
+        finally:
+            self.signals.done.emit()
+
+
+class TaskRunner(QObject):
+    """
+    Runs controller calls off the GUI thread and delivers their results through signals.
+
+    Tasks are submitted on a named channel; submitting a new task on a channel cancels the one it
+    supersedes, so a slow query can never overwrite the results of a newer one. Tasks submitted
+    without a channel, such as writes, never supersede each other.
+    """
+
+    busy_changed = pyqtSignal(bool)
+
+    def __init__(self, parent: Optional[QObject] = None, pool: Optional[QThreadPool] = None) -> None:
+        super().__init__(parent)
+        self.pool = pool or QThreadPool.globalInstance()
+        self._latest: Dict[str, Task] = {}
+        self._running = 0
+        self._anonymous = itertools.count()
+
+    def submit(
+            self,
+            channel: Optional[str],
+            fn: Callable[..., Any],
+            *args: Any,
+            on_result: Optional[Callable[[Any], None]] = None,
+            on_error: Optional[Callable[[str], None]] = None,
+            **kwargs: Any
+    ) -> Task:
+        """
+        Schedules ``fn(*args, **kwargs)`` on the thread pool.
+
+        Args:
+            channel (Optional[str]): Tasks on the same channel supersede each other; None never supersedes.
+            fn (Callable): The blocking call to run.
+            on_result (Optional[Callable]): Called on the GUI thread with the return value.
+            on_error (Optional[Callable]): Called on the GUI thread with the error message.
+
+        Returns:
+            Task: The scheduled task, which can be cancelled.
+        """
+        if channel is None:
+            channel = f"task-{next(self._anonymous)}"
+        self.cancel(channel)
+
+        task = Task(fn, *args, **kwargs)
+        self._latest[channel] = task
+
+        def deliver(result: Any) -> None:
+            if self._latest.get(channel) is task and on_result is not None:
+                on_result(result)
+
+        def report(message: str) -> None:
+            if self._latest.get(channel) is task and on_error is not None:
+                on_error(message)
+
+        def finish() -> None:
+            if self._latest.get(channel) is task:
+                del self._latest[channel]
+            self._set_running(self._running - 1)
+
+        task.signals.succeeded.connect(deliver)
+        task.signals.failed.connect(report)
+        task.signals.done.connect(finish)
+
+        self._set_running(self._running + 1)
+        self.pool.start(task)
+        return task
+
+    def cancel(self, channel: str) -> None:
+        """Cancels the pending or running task on ``channel``, if any."""
+        task = self._latest.pop(channel, None)
+        if task is not None:
+            task.cancel()
+
+    def cancel_all(self) -> None:
+        for channel in list(self._latest):
+            self.cancel(channel)
+
+    def is_busy(self, channel: Optional[str] = None) -> bool:
+        return channel in self._latest if channel is not None else self._running > 0
+
+    def _set_running(self, running: int) -> None:
+        was_busy = self._running > 0
+        self._running = running
+        if was_busy != (running > 0):
+            self.busy_changed.emit(running > 0)